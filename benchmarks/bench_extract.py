@@ -0,0 +1,125 @@
+"""
+블로그 본문 추출 엔진 벤치마크.
+
+저장해 둔 티스토리 페이지(*.html) 모음에 대해 엔진별로
+페이지당 파싱 시간(중앙값)과 최대 메모리 사용량을 측정하고,
+결과가 기존 BeautifulSoup 경로와 같은지 확인한다.
+
+    python benchmarks/bench_extract.py --pages ./saved_pages --repeat 20
+
+--pages를 주지 않으면 티스토리 구조를 흉내 낸 합성 페이지로 측정한다.
+"""
+import os
+import sys
+import glob
+import time
+import random
+import argparse
+import resource
+import statistics
+import tracemalloc
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import blog_extractor
+
+def synthetic_page(seed, paragraphs, code_lines):
+    """헤더/사이드바/댓글 사이에 본문 div가 있는 티스토리형 페이지 생성"""
+    rng = random.Random(seed)
+    words = ["백준", "풀이", "자바", "BFS", "DP", "배열", "반복문", "입력", "출력", "시간복잡도"]
+
+    def sentence():
+        return " ".join(rng.choice(words) for _ in range(rng.randint(8, 20)))
+
+    head = "".join(f"<script>var tracker{i} = '{'x' * 200}';</script>" for i in range(30))
+    sidebar = "".join(f"<li><a href='/entry/{i}'>{sentence()}</a></li>" for i in range(80))
+    body = "".join(f"<p>{sentence()}</p>" for _ in range(paragraphs))
+    code = "\n".join(f"        int v{i} = sc.nextInt(); // {sentence()}" for i in range(code_lines))
+    comments = "".join(
+        f"<div class='comment'><p>{sentence()}</p><div class='reply'>{sentence()}</div></div>"
+        for _ in range(rng.randint(20, 60))
+    )
+    return (
+        f"<html><head><meta name='generator' content='TISTORY'>{head}</head><body>"
+        f"<div id='wrap'><div class='area_sidebar'><ul>{sidebar}</ul></div>"
+        f"<div class='article_view'><div class='tt_article_useless_p_margin contents_style'>"
+        f"{body}<pre class='java'><code>import java.util.*;\npublic class Main {{\n"
+        f"    public static void main(String[] args) {{\n        Scanner sc = new Scanner(System.in);\n"
+        f"{code}\n    }}\n}}</code></pre>{body}</div></div>"
+        f"<div class='area_reply'>{comments}</div></div></body></html>"
+    )
+
+def load_pages(pages_dir):
+    if pages_dir:
+        paths = sorted(glob.glob(os.path.join(pages_dir, "*.html")))
+        if not paths:
+            sys.exit(f"{pages_dir}에 *.html 파일이 없습니다.")
+        pages = []
+        for path in paths:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                pages.append((os.path.basename(path), f.read()))
+        return pages
+    sizes = [(10, 20), (40, 60), (120, 150), (400, 300)]
+    return [(f"synthetic_{p}p_{c}l", synthetic_page(i, p, c)) for i, (p, c) in enumerate(sizes)]
+
+def _measure(engine_name, pages, repeat, queue):
+    engine = blog_extractor.get_engine(engine_name)
+    # 지연 import 등 첫 호출 비용이 측정에 섞이지 않도록 한 번 미리 실행
+    engine.extract(pages[0][1], blog_extractor.detect_profile(html=pages[0][1]))
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rows = []
+    for name, html in pages:
+        profile = blog_extractor.detect_profile(html=html)
+        tracemalloc.start()
+        result = engine.extract(html, profile)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            engine.extract(html, profile)
+            timings.append(time.perf_counter() - started)
+        rows.append({
+            "page": name,
+            "bytes": len(html.encode("utf-8")),
+            "median_ms": statistics.median(timings) * 1000,
+            "py_peak_kb": peak / 1024,
+            "result": result,
+        })
+    rss_growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline_rss
+    queue.put((engine_name, rows, rss_growth))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", help="저장된 블로그 HTML 디렉터리")
+    parser.add_argument("--repeat", type=int, default=10, help="페이지당 반복 횟수")
+    parser.add_argument("--engines", nargs="*", default=blog_extractor.available_engines())
+    args = parser.parse_args()
+
+    pages = load_pages(args.pages)
+    print(f"페이지 {len(pages)}개, 반복 {args.repeat}회, 엔진: {', '.join(args.engines)}\n")
+
+    # 엔진마다 별도 프로세스에서 측정해 메모리 수치가 섞이지 않게 한다.
+    ctx = multiprocessing.get_context("spawn")
+    results = {}
+    for engine_name in args.engines:
+        queue = ctx.Queue()
+        process = ctx.Process(target=_measure, args=(engine_name, pages, args.repeat, queue))
+        process.start()
+        results[engine_name] = queue.get()
+        process.join()
+
+    reference = results.get("bs4")
+    print(f"{'engine':<11} {'page':<24} {'KB':>7} {'median ms':>10} {'py peak KB':>11}  same")
+    for engine_name, rows, rss_growth in results.values():
+        for idx, row in enumerate(rows):
+            same = "-" if reference is None else ("yes" if row["result"] == reference[1][idx]["result"] else "NO")
+            print(f"{engine_name:<11} {row['page'][:24]:<24} {row['bytes'] / 1024:>7.1f} "
+                  f"{row['median_ms']:>10.2f} {row['py_peak_kb']:>11.1f}  {same}")
+        total = sum(row["median_ms"] for row in rows)
+        print(f"{engine_name:<11} {'(합계)':<24} {'':>7} {total:>10.2f}   RSS 증가 {rss_growth / 1024:.1f} MB\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,421 @@
+"""
+문제 생성 파이프라인(process_problem) 전체 벤치마크.
+
+실제 Google 검색, 블로그, OpenAI, GitHub, Firestore 대신
+지연 시간을 흉내 내는 로컬 서버(별도 프로세스)와 메모리 Firestore를 사용해
+문제 N개를 지정한 동시성으로 처리하고 다음을 보고한다.
+
+  - 문제당 전체 소요 시간 p50/p95/max
+  - 분당 처리량 (problems/min)
+  - 최대 RSS
+  - 단계별 평균 소요 시간 (process_problem의 timings)
+  - 가짜 서버가 받은 외부 호출 수
+
+    python benchmarks/bench_pipeline.py --problems 40 --concurrency 4
+    python benchmarks/bench_pipeline.py --save baseline.json
+    python benchmarks/bench_pipeline.py --compare baseline.json --tolerance 0.1
+
+--fixtures DIR을 주면 DIR/blogs/*.html(저장해 둔 블로그 페이지)과
+DIR/llm/summary.txt, DIR/llm/integration.txt(미리 받아 둔 LLM 응답)를 사용하고,
+없으면 bench_extract의 합성 티스토리 페이지와 기본 응답을 사용한다.
+"""
+import os
+import sys
+import json
+import glob
+import math
+import time
+import random
+import asyncio
+import logging
+import argparse
+import resource
+import tempfile
+import statistics
+import multiprocessing
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_extract import synthetic_page
+
+DEFAULT_SUMMARY = "입력을 받아 배열에 저장한 뒤 BFS로 최단 거리를 구하는 풀이입니다."
+DEFAULT_INTEGRATION = (
+    "import java.util.*;\n\npublic class Main {\n    public static void main(String[] args) {\n"
+    "        Scanner sc = new Scanner(System.in);\n        int a = sc.nextInt();\n"
+    "        int b = sc.nextInt();\n        System.out.println(a + b);\n    }\n}"
+)
+
+def load_fixtures(fixtures_dir):
+    """(블로그 HTML 목록, 요약 응답, 통합 응답)"""
+    blogs, summary, integration = [], DEFAULT_SUMMARY, DEFAULT_INTEGRATION
+    if fixtures_dir:
+        for path in sorted(glob.glob(os.path.join(fixtures_dir, "blogs", "*.html"))):
+            with open(path, encoding="utf-8", errors="replace") as f:
+                blogs.append(f.read())
+        for name in ("summary", "integration"):
+            path = os.path.join(fixtures_dir, "llm", f"{name}.txt")
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    if name == "summary":
+                        summary = f.read()
+                    else:
+                        integration = f.read()
+    if not blogs:
+        sizes = [(10, 20), (40, 60), (120, 150), (40, 60)]
+        blogs = [synthetic_page(i, p, c) for i, (p, c) in enumerate(sizes)]
+        # 완성 코드가 아닌 글도 섞어 요약 LLM 경로를 함께 측정한다.
+        blogs += [html.replace("public static void main(String[] args)", "static void solve()") for html in blogs[:2]]
+    return blogs, summary, integration
+
+# ---------------------------------------------------------------------------
+# 가짜 외부 서비스 (별도 프로세스에서 실행)
+# ---------------------------------------------------------------------------
+
+def _serve(config, ready):
+    from aiohttp import web
+
+    rng = random.Random(config["seed"])
+    blogs, summary, integration = load_fixtures(config["fixtures"])
+    counts = {}
+    github = {"head": "c0", "trees": {"c0": "t0"}, "n": 0}
+
+    async def delay(median):
+        # 실제 네트워크처럼 꼬리가 긴 로그정규 분포
+        if median > 0:
+            await asyncio.sleep(median * math.exp(rng.gauss(0, config["jitter"])))
+
+    def count(kind):
+        counts[kind] = counts.get(kind, 0) + 1
+
+    async def search(request):
+        count("search")
+        await delay(config["search_latency"])
+        problem = request.query.get("q", "").split()[2] if len(request.query.get("q", "").split()) > 2 else "0"
+        base = f"http://{request.host}"
+        items = [{"link": f"{base}/blog/{problem}/{i}"} for i in range(config["blogs"])]
+        return web.json_response({"items": items})
+
+    async def blog(request):
+        count("blog")
+        await delay(config["blog_latency"])
+        index = (int(request.match_info["problem"]) + int(request.match_info["index"])) % len(blogs)
+        return web.Response(text=blogs[index], content_type="text/html")
+
+    async def problem_page(request):
+        count("problem_page")
+        await delay(config["blog_latency"])
+        problem = request.match_info["problem"]
+        page = (
+            f'<span id="problem_title">벤치 문제 {problem}</span>'
+            '<table id="problem-info"><tbody><tr><td>1 초</td><td>256 MB</td></tr></tbody></table>'
+            '<div id="problem_description"><p>두 정수 A와 B를 입력받은 다음, A+B를 출력하는 프로그램을 작성하시오.</p></div>'
+            '<div id="problem_input"><p>첫째 줄에 A와 B가 주어진다.</p></div>'
+            '<div id="problem_output"><p>첫째 줄에 A+B를 출력한다.</p></div>'
+            '<pre class="sampledata" id="sample-input-1">1 2\n</pre>'
+            '<pre class="sampledata" id="sample-output-1">3\n</pre>'
+        )
+        return web.Response(text=page, content_type="text/html")
+
+    async def chat(request):
+        body = await request.json()
+        kind = "integration" if "integrating" in body["messages"][0]["content"] else "summary"
+        count(f"llm_{kind}")
+        text = integration if kind == "integration" else summary
+        completion_tokens = max(1, len(text) // 3)
+        prompt_tokens = sum(len(m["content"]) for m in body["messages"]) // 3
+        await delay(config["llm_latency"] + completion_tokens * config["llm_token_seconds"])
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                 "total_tokens": prompt_tokens + completion_tokens}
+        if not body.get("stream"):
+            return web.json_response({
+                "id": "bench", "object": "chat.completion", "created": 0, "model": body["model"],
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": text}}],
+                "usage": usage,
+            })
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for start in range(0, len(text), 40):
+            chunk = {"id": "bench", "object": "chat.completion.chunk", "created": 0, "model": body["model"],
+                     "choices": [{"index": 0, "delta": {"content": text[start:start + 40]}, "finish_reason": None}]}
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        final = {"id": "bench", "object": "chat.completion.chunk", "created": 0, "model": body["model"],
+                 "choices": [], "usage": usage}
+        await response.write(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode())
+        return response
+
+    async def github_ref(request):
+        count("github")
+        await delay(config["github_latency"])
+        return web.json_response({"object": {"sha": github["head"]}}, headers={"ETag": f'"{github["head"]}"'})
+
+    async def github_commit(request):
+        count("github")
+        await delay(config["github_latency"])
+        return web.json_response({"tree": {"sha": github["trees"].get(request.match_info["sha"], "t0")}})
+
+    async def github_tree_list(request):
+        count("github")
+        await delay(config["github_latency"])
+        return web.json_response({"tree": [], "truncated": False})
+
+    async def github_create(request):
+        count("github")
+        await delay(config["github_latency"])
+        github["n"] += 1
+        body = await request.json()
+        sha = f"{request.match_info['kind'][0]}{github['n']}"
+        if request.match_info["kind"] == "commits":
+            github["trees"][sha] = body["tree"]
+        return web.json_response({"sha": sha}, status=201)
+
+    async def github_update_ref(request):
+        count("github")
+        await delay(config["github_latency"])
+        github["head"] = (await request.json())["sha"]
+        return web.json_response({})
+
+    async def stats(request):
+        return web.json_response(counts)
+
+    app = web.Application()
+    app.router.add_get("/customsearch/v1", search)
+    app.router.add_get("/blog/{problem}/{index}", blog)
+    app.router.add_get("/problem/{problem}", problem_page)
+    app.router.add_post("/v1/chat/completions", chat)
+    app.router.add_get("/repos/{owner}/{repo}/git/ref/heads/{branch}", github_ref)
+    app.router.add_get("/repos/{owner}/{repo}/git/commits/{sha}", github_commit)
+    app.router.add_get("/repos/{owner}/{repo}/git/trees/{sha}", github_tree_list)
+    app.router.add_post("/repos/{owner}/{repo}/git/{kind}", github_create)
+    app.router.add_patch("/repos/{owner}/{repo}/git/refs/heads/{branch}", github_update_ref)
+    app.router.add_get("/__stats", stats)
+
+    async def start():
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        ready.put(site._server.sockets[0].getsockname()[1])
+        await asyncio.Event().wait()
+
+    asyncio.run(start())
+
+# ---------------------------------------------------------------------------
+# 메모리 Firestore (process_problem이 쓰는 document().update()와 batch()만 구현)
+# ---------------------------------------------------------------------------
+
+class _MemoryDocument:
+    def __init__(self, store, key):
+        self.store = store
+        self.key = key
+
+    async def update(self, data):
+        self.store.setdefault(self.key, {}).update(data)
+
+class _MemoryBatch:
+    def __init__(self, db):
+        self.db = db
+        self.writes = []
+
+    def update(self, document, data):
+        self.writes.append((document, data))
+
+    async def commit(self):
+        self.db.commits += 1
+        for document, data in self.writes:
+            await document.update(data)
+
+class _MemoryCollection:
+    def __init__(self, store, name):
+        self.store = store
+        self.name = name
+
+    def document(self, doc_id):
+        return _MemoryDocument(self.store, (self.name, doc_id))
+
+class MemoryFirestore:
+    def __init__(self):
+        self.store = {}
+        self.commits = 0
+
+    def batch(self):
+        return _MemoryBatch(self)
+
+    def collection(self, name):
+        return _MemoryCollection(self.store, name)
+
+# ---------------------------------------------------------------------------
+
+def percentile(values, q):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))
+    return ordered[index]
+
+def configure_environment(base_url, args):
+    # problem_parser를 import하기 전에 모든 외부 주소를 가짜 서버로 돌린다.
+    workdir = tempfile.mkdtemp(prefix="bench_pipeline_")
+    os.environ.update({
+        "OPENAI_API_KEY": "bench",
+        "OPENAI_BASE_URL": f"{base_url}/v1",
+        "GCP_API_KEY": "bench",
+        "CSE_ID": "bench",
+        "SEARCH_API_URL": f"{base_url}/customsearch/v1",
+        "SEARCH_QUERY_TEMPLATE": "백준 풀이 {problem_id}",
+        "SEARCH_DAILY_QUOTA": "1000000",
+        "SEARCH_PER_MINUTE": "1000000",
+        "GITHUB_API_URL": base_url,
+        "GITHUB_REPO": "bench/solutions",
+        "GITHUB_TOKEN": "bench",
+        "CACHE_DB_PATH": os.path.join(workdir, "cache.sqlite3"),
+        "BOJ_PROBLEM_URL": f"{base_url}/problem/{{problem_id}}",
+        "PROBLEM_STORE_PATH": os.path.join(workdir, "problems.sqlite3"),
+        "BOJ_CRAWL_INTERVAL": "0",
+        "JOB_QUEUE_ENABLED": "false",
+        "WARM_UP_ON_START": "off",
+        "PROBLEM_CODE_CACHE_LISTENER": "false",
+        "COMPLETE_CHECK_JAVAC": "true" if args.javac else "false",
+        # 가짜 통합 코드는 가짜 문제의 예제를 풀지 못하므로 예제 실행 대신 컴파일만 검증한다.
+        "VERIFY_MODE": "compile" if args.javac else "off",
+    })
+    if args.github_batch_delay is not None:
+        os.environ["GITHUB_BATCH_DELAY"] = str(args.github_batch_delay)
+
+def run_benchmark(args, base_url):
+    configure_environment(base_url, args)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    import problem_parser as pp
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.WARNING)
+
+    memory_db = MemoryFirestore()
+    pp._firebase_db = memory_db
+    pp._firebase_ready = True
+    pp._async_db = memory_db
+
+    async def run_all(problem_ids):
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def one(problem_id):
+            async with semaphore:
+                started = time.perf_counter()
+                result = await pp.process_problem(str(problem_id))
+                return time.perf_counter() - started, result
+
+        return await asyncio.gather(*(one(problem_id) for problem_id in problem_ids))
+
+    # 지연 import/연결 생성 비용을 빼기 위한 예열
+    pp.run_async(run_all([999]))
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    commits_before = memory_db.commits
+
+    started = time.perf_counter()
+    results = pp.run_async(run_all(range(1000, 1000 + args.problems)))
+    wall = time.perf_counter() - started
+    firestore_commits = memory_db.commits - commits_before
+
+    latencies = [elapsed for elapsed, _ in results]
+    failures = sum(1 for _, result in results if result.get("error"))
+    stages = {}
+    for _, result in results:
+        for stage, elapsed in (result.get("timings") or {}).get("by_stage", {}).items():
+            stages.setdefault(stage, []).append(elapsed)
+    return {
+        "problems": args.problems,
+        "concurrency": args.concurrency,
+        "failures": failures,
+        "wall_seconds": round(wall, 3),
+        "p50": round(percentile(latencies, 0.50), 4),
+        "p95": round(percentile(latencies, 0.95), 4),
+        "max": round(max(latencies), 4),
+        "problems_per_minute": round(args.problems / wall * 60, 2),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "rss_growth_mb": round((resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024, 1),
+        "firestore_commits": firestore_commits,
+        "stages": {stage: round(statistics.mean(values), 4) for stage, values in sorted(stages.items())},
+    }
+
+def fetch_server_stats(base_url):
+    import urllib.request
+    with urllib.request.urlopen(f"{base_url}/__stats") as response:
+        return json.loads(response.read())
+
+# 값이 커지면 나빠지는 지표 / 작아지면 나빠지는 지표
+LOWER_IS_BETTER = ("p50", "p95", "peak_rss_mb")
+HIGHER_IS_BETTER = ("problems_per_minute",)
+
+def compare(report, baseline, tolerance):
+    """기준 결과 대비 변화를 출력하고, tolerance보다 나빠진 지표 목록을 반환"""
+    regressions = []
+    print(f"\n기준 대비 ({tolerance:.0%} 이상 나빠지면 회귀)")
+    for key in LOWER_IS_BETTER + HIGHER_IS_BETTER:
+        old, new = baseline.get(key), report.get(key)
+        if not old:
+            continue
+        change = (new - old) / old
+        worse = change > tolerance if key in LOWER_IS_BETTER else change < -tolerance
+        if worse:
+            regressions.append(key)
+        print(f"  {key:<20} {old:>10} → {new:<10} ({change:+.1%}){'  ← 회귀' if worse else ''}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--problems", type=int, default=40, help="처리할 문제 수")
+    parser.add_argument("--concurrency", type=int, default=4, help="동시에 처리할 문제 수")
+    parser.add_argument("--blogs", type=int, default=3, help="검색 결과당 블로그 수")
+    parser.add_argument("--fixtures", help="저장된 블로그 HTML/LLM 응답 디렉터리")
+    parser.add_argument("--search-latency", type=float, default=0.3, help="검색 API 지연 중앙값(초)")
+    parser.add_argument("--blog-latency", type=float, default=0.4, help="블로그 페이지 지연 중앙값(초)")
+    parser.add_argument("--llm-latency", type=float, default=0.8, help="LLM 첫 응답까지 지연 중앙값(초)")
+    parser.add_argument("--llm-token-seconds", type=float, default=0.01, help="LLM 출력 토큰당 추가 지연(초)")
+    parser.add_argument("--github-latency", type=float, default=0.15, help="GitHub API 지연 중앙값(초)")
+    parser.add_argument("--github-batch-delay", type=float, help="GITHUB_BATCH_DELAY 재정의")
+    parser.add_argument("--jitter", type=float, default=0.4, help="지연 시간 로그정규 분산(σ)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--javac", action="store_true", help="완성 코드 판별과 업로드 전 검증에 javac 사용")
+    parser.add_argument("--save", help="결과를 JSON으로 저장")
+    parser.add_argument("--compare", help="기준 결과 JSON과 비교 (회귀가 있으면 종료 코드 1)")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="회귀로 볼 변화율")
+    parser.add_argument("--verbose", action="store_true", help="파이프라인 로그 출력")
+    args = parser.parse_args()
+
+    config = {key: getattr(args, key) for key in (
+        "seed", "fixtures", "blogs", "jitter", "search_latency", "blog_latency",
+        "llm_latency", "llm_token_seconds", "github_latency",
+    )}
+    # 가짜 서버는 별도 프로세스에서 실행해 측정 대상의 CPU/메모리와 섞이지 않게 한다.
+    ctx = multiprocessing.get_context("spawn")
+    ready = ctx.Queue()
+    server = ctx.Process(target=_serve, args=(config, ready), daemon=True)
+    server.start()
+    try:
+        base_url = f"http://127.0.0.1:{ready.get(timeout=30)}"
+        report = run_benchmark(args, base_url)
+        report["external_calls"] = fetch_server_stats(base_url)
+    finally:
+        server.terminate()
+
+    print(f"문제 {report['problems']}개, 동시 {report['concurrency']}개, 실패 {report['failures']}개")
+    print(f"  지연 p50 {report['p50']:.3f}s  p95 {report['p95']:.3f}s  max {report['max']:.3f}s")
+    print(f"  처리량 {report['problems_per_minute']:.1f} problems/min (총 {report['wall_seconds']:.1f}s)")
+    print(f"  최대 RSS {report['peak_rss_mb']:.1f} MB (측정 중 증가 {report['rss_growth_mb']:.1f} MB)")
+    print(f"  Firestore 커밋 {report['firestore_commits']}회")
+    print("  단계별 평균(문제당 합계):")
+    for stage, elapsed in report["stages"].items():
+        print(f"    {stage:<18} {elapsed:.3f}s")
+    print(f"  외부 호출: {json.dumps(report['external_calls'], ensure_ascii=False, sort_keys=True)}")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.tolerance):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+콜드 스타트 벤치마크: problem_parser import부터 첫 /health 응답까지의 시간.
+
+새 파이썬 프로세스를 여러 번 띄워 각각
+  - import 소요 시간
+  - import 시작부터 첫 /health 응답까지 시간
+  - /warmup(지연 초기화하는 클라이언트 예열) 소요 시간
+을 재고 중앙값을 보고한다. 첫 응답 중앙값이 --target-ms를 넘으면 종료 코드 1.
+
+    python benchmarks/bench_startup.py --runs 5 --target-ms 1000
+    python benchmarks/bench_startup.py --importtime   # 누적 import 시간 상위 모듈
+
+Firebase 인증 정보가 없는 환경에서는 /warmup의 firebase 단계가 실패하지만
+(인증 조회 시간은 그대로 측정된다) /health 측정에는 영향이 없다.
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MEASURE = r"""
+import json, time
+started = time.perf_counter()
+import problem_parser
+imported = time.perf_counter()
+client = problem_parser.app.test_client()
+response = client.get("/health")
+first_response = time.perf_counter()
+assert response.status_code == 200, response.status_code
+result = {"import_ms": (imported - started) * 1000, "first_response_ms": (first_response - started) * 1000}
+if WARM:
+    warm_started = time.perf_counter()
+    result["warmup"] = client.get("/warmup").get_json()["seconds"]
+    result["warmup_ms"] = (time.perf_counter() - warm_started) * 1000
+print("RESULT " + json.dumps(result))
+"""
+
+def run_once(warm, mode):
+    env = dict(os.environ)
+    env.setdefault("OPENAI_API_KEY", "bench")
+    env["WARM_UP_ON_START"] = mode
+    env["JOB_QUEUE_ENABLED"] = "false"
+    code = MEASURE.replace("WARM", "True" if warm else "False", 1)
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, timeout=120
+    )
+    for line in output.stdout.splitlines():
+        if line.startswith("RESULT "):
+            return json.loads(line[len("RESULT "):])
+    raise RuntimeError(f"측정 실패:\n{output.stderr[-2000:]}")
+
+def import_profile(top):
+    """python -X importtime 결과에서 누적 시간이 큰 모듈"""
+    env = dict(os.environ, OPENAI_API_KEY=os.environ.get("OPENAI_API_KEY", "bench"),
+               WARM_UP_ON_START="off", JOB_QUEUE_ENABLED="false")
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import problem_parser"],
+        cwd=ROOT, env=env, capture_output=True, text=True, timeout=120
+    )
+    rows = []
+    for line in output.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = [part.strip() for part in line.replace("import time:", "").split("|")]
+        rows.append((int(cumulative_us), int(self_us), name))
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for cumulative_us, self_us, name in sorted(rows, reverse=True)[:top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {name}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--mode", default="off", choices=["off", "background"],
+                        help="WARM_UP_ON_START 값 (background는 예열 스레드와 경쟁하는 경우를 측정)")
+    parser.add_argument("--no-warmup", action="store_true", help="/warmup 측정 생략")
+    parser.add_argument("--target-ms", type=float, default=1000, help="첫 /health 응답 목표(중앙값, ms)")
+    parser.add_argument("--importtime", action="store_true", help="import 시간 상위 모듈 출력")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.importtime:
+        import_profile(args.top)
+        return
+
+    runs = [run_once(not args.no_warmup, args.mode) for _ in range(args.runs)]
+    imports = [run["import_ms"] for run in runs]
+    first = [run["first_response_ms"] for run in runs]
+    print(f"실행 {args.runs}회 (WARM_UP_ON_START={args.mode})")
+    print(f"  import            중앙값 {statistics.median(imports):8.1f} ms  (최대 {max(imports):.1f})")
+    print(f"  첫 /health 응답   중앙값 {statistics.median(first):8.1f} ms  (최대 {max(first):.1f})")
+    if not args.no_warmup:
+        warm = [run["warmup_ms"] for run in runs]
+        print(f"  /warmup           중앙값 {statistics.median(warm):8.1f} ms")
+        for step in runs[0]["warmup"]:
+            values = [run["warmup"][step] * 1000 for run in runs]
+            print(f"    {step:<15} 중앙값 {statistics.median(values):8.1f} ms")
+
+    median_first = statistics.median(first)
+    verdict = "통과" if median_first <= args.target_ms else "초과"
+    print(f"  목표 {args.target_ms:.0f} ms: {verdict}")
+    if median_first > args.target_ms:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,510 @@
+import os
+import re
+import logging
+import threading
+import urllib.parse
+import importlib.util
+from html.parser import HTMLParser
+
+logger = logging.getLogger(__name__)
+
+def _installed(module):
+    try:
+        return importlib.util.find_spec(module) is not None
+    except ImportError:
+        return False
+
+# 선택적 고속 파서 (설치되어 있으면 사용). import 비용이 있으므로 엔진을 만들 때 import한다.
+SELECTOLAX_AVAILABLE = _installed("selectolax")
+LXML_AVAILABLE = _installed("lxml")
+
+_SELECTOR_RE = re.compile(r"^(?P<tag>[a-z][a-z0-9]*)(?P<rest>(?:[.#][\w-]+)*)$")
+
+class Selector:
+    """
+    'div.a.b', 'div#id', 'article' 형태의 단순 선택자.
+    엔진마다 필요한 형태(CSS, XPath, 태그 매칭 함수)로 미리 변환해 둔다.
+    """
+
+    def __init__(self, text):
+        match = _SELECTOR_RE.match(text)
+        if not match:
+            raise ValueError(f"지원하지 않는 선택자: {text}")
+        self.text = text
+        self.tag = match.group("tag")
+        parts = re.findall(r"([.#])([\w-]+)", match.group("rest"))
+        self.classes = tuple(name for kind, name in parts if kind == ".")
+        ids = [name for kind, name in parts if kind == "#"]
+        self.id = ids[0] if ids else None
+
+    def xpath(self, axis="descendant"):
+        conditions = [
+            f"contains(concat(' ', normalize-space(@class), ' '), ' {c} ')" for c in self.classes
+        ]
+        if self.id:
+            conditions.append(f"@id='{self.id}'")
+        predicate = f"[{' and '.join(conditions)}]" if conditions else ""
+        return f"{axis}::{self.tag}{predicate}"
+
+    def matches(self, tag, attrs):
+        if tag != self.tag:
+            return False
+        if self.id and attrs.get("id") != self.id:
+            return False
+        if self.classes:
+            classes = (attrs.get("class") or "").split()
+            return all(c in classes for c in self.classes)
+        return True
+
+    def __repr__(self):
+        return f"Selector({self.text!r})"
+
+class CodeRule:
+    """
+    코드 블록 추출 규칙.
+    block에 해당하는 요소마다 첫 번째 inner 요소(없으면 block 자신)의 텍스트를 코드 하나로 본다.
+    lines=True이면 block 하나가 코드 한 줄이고, 모든 줄을 이어 코드 하나를 만든다 (GitHub Gist).
+    """
+
+    def __init__(self, block, inner=None, lines=False):
+        self.block = Selector(block)
+        self.inner = Selector(inner) if inner else None
+        self.lines = lines
+
+class SiteProfile:
+    """블로그 서비스/테마별 추출 설정"""
+
+    def __init__(self, name, containers, code_rules=None, host=None, meta=None, fetch_url=None):
+        self.name = name
+        self.containers = [Selector(text) for text in containers]
+        self.code_rules = code_rules or [CodeRule("pre", "code")]
+        self.host = re.compile(host, re.I) if host else None
+        self.meta = re.compile(meta, re.I) if meta else None
+        self._fetch_url = fetch_url
+
+    def fetch_url(self, url):
+        """실제로 요청할 URL (예: 네이버 블로그는 iframe 안의 본문 주소)"""
+        return self._fetch_url(url) if self._fetch_url else url
+
+def _naver_post_view_url(url):
+    # blog.naver.com/{blogId}/{logNo}는 프레임 페이지이므로 본문 페이지로 바꾼다.
+    parsed = urllib.parse.urlparse(url)
+    match = re.match(r"^/([\w-]+)/(\d+)", parsed.path)
+    if not match:
+        return url
+    query = urllib.parse.urlencode({"blogId": match.group(1), "logNo": match.group(2)})
+    return f"https://blog.naver.com/PostView.naver?{query}"
+
+# 티스토리 스킨별 본문 컨테이너 (우선순위 순)
+TISTORY_CONTAINERS = [
+    "div.tt_article_useless_p_margin.contents_style",
+    "div.tt_article_useless_p_margin",
+    "div.contents_style",
+    "div#article-view",
+    "div.article-view",
+    "div.entry-content",
+    "div.area_view",
+    "div.article_view",
+]
+
+# 등록된 사이트 프로필 (감지 순서대로). 마지막 generic은 어느 것에도 해당하지 않을 때 사용.
+PROFILES = [
+    SiteProfile(
+        "tistory",
+        containers=TISTORY_CONTAINERS,
+        host=r"(^|\.)tistory\.com$",
+        meta=r"tistory",
+    ),
+    SiteProfile(
+        "velog",
+        containers=["div.atom-one", "div.markdown-body"],
+        host=r"(^|\.)velog\.io$",
+        meta=r"velog",
+    ),
+    SiteProfile(
+        "gist",
+        containers=["div.js-gist-file-update-container", "div.repository-content", "div.file"],
+        code_rules=[CodeRule("td.blob-code-inner", lines=True)],
+        host=r"^gist\.github\.com$",
+    ),
+    SiteProfile(
+        "naver",
+        containers=["div.se-main-container", "div#postViewArea", "div#viewTypeSelector"],
+        code_rules=[CodeRule("div.se-code-source"), CodeRule("pre", "code"), CodeRule("code.__se_code_view")],
+        host=r"(^|\.)blog\.naver\.com$",
+        meta=r"naver\s*blog|blog\.naver\.com",
+        fetch_url=_naver_post_view_url,
+    ),
+    SiteProfile(
+        "generic",
+        # 개인 도메인을 쓰는 티스토리 블로그도 여기로 오므로 티스토리 컨테이너를 먼저 시도
+        containers=TISTORY_CONTAINERS + ["article", "div.post-content", "div.markdown-body", "main"],
+    ),
+]
+PROFILES_BY_NAME = {profile.name: profile for profile in PROFILES}
+
+_META_TAG_RE = re.compile(r"<meta\b[^>]*>", re.I)
+_HEAD_END_RE = re.compile(r"</head\s*>", re.I)
+
+def detect_profile(url=None, html=None):
+    """URL 호스트와 <head>의 <meta> 태그만 보고 프로필을 고른다 (문서 전체를 파싱하지 않음)."""
+    if url:
+        host = urllib.parse.urlparse(url).hostname or ""
+        for profile in PROFILES:
+            if profile.host and profile.host.search(host):
+                return profile
+    if html:
+        head_end = _HEAD_END_RE.search(html, 0, 65536)
+        head = html[:head_end.start() if head_end else 65536]
+        meta_tags = " ".join(_META_TAG_RE.findall(head))
+        for profile in PROFILES:
+            if profile.meta and profile.meta.search(meta_tags):
+                return profile
+    return PROFILES_BY_NAME["generic"]
+
+def fetch_url_for(url):
+    return detect_profile(url).fetch_url(url)
+
+def _join_fragments(fragments):
+    # BeautifulSoup의 get_text(separator="\n", strip=True)와 같은 규칙으로 합친다.
+    return "\n".join(text for text in (fragment.strip() for fragment in fragments) if text)
+
+def _join_lines(lines):
+    # 한 줄 단위 코드(Gist)는 줄 안의 들여쓰기를 보존하고 앞뒤 빈 줄만 제거
+    return "\n".join(line.rstrip() for line in lines).strip("\n")
+
+def _collect_code(per_rule_blocks):
+    # 규칙 순서대로 모으되, 여러 규칙에 동시에 걸린 같은 코드는 한 번만 사용
+    # (블록 경계는 완성 코드 판단에 쓰이므로 합치지 않고 목록으로 돌려준다)
+    code_blocks = []
+    for blocks in per_rule_blocks:
+        for code_text in blocks:
+            if code_text and code_text not in code_blocks:
+                code_blocks.append(code_text)
+    return code_blocks
+
+class BeautifulSoupEngine:
+    """기존 방식: 문서 전체를 html.parser로 트리화 (가장 느리지만 가장 관대함)"""
+
+    name = "bs4"
+
+    def __init__(self, profiles=PROFILES):
+        import soupsieve
+
+        # 프로필별 선택자를 한 번만 컴파일
+        self._compiled = {}
+        for profile in profiles:
+            self._compiled[profile.name] = (
+                [soupsieve.compile(sel.text) for sel in profile.containers],
+                [(soupsieve.compile(rule.block.text),
+                  soupsieve.compile(rule.inner.text) if rule.inner else None,
+                  rule.lines) for rule in profile.code_rules],
+            )
+
+    def extract(self, html, profile):
+        from bs4 import BeautifulSoup
+
+        containers, rules = self._compiled[profile.name]
+        soup = BeautifulSoup(html, "html.parser")
+        main_content_div = None
+        for container in containers:
+            main_content_div = container.select_one(soup)
+            if main_content_div is not None:
+                break
+        if main_content_div is None:
+            return None
+
+        # 스크립트/스타일 제거
+        for tag in main_content_div.find_all(['script', 'style']):
+            tag.decompose()
+
+        blog_text_full = main_content_div.get_text(separator="\n", strip=True)
+
+        # 코드 블록 추출
+        per_rule_blocks = []
+        for block, inner, lines in rules:
+            matched = block.select(main_content_div)
+            if lines:
+                per_rule_blocks.append([_join_lines(tag.get_text() for tag in matched)])
+                continue
+            blocks = []
+            for block_tag in matched:
+                code_tag = inner.select_one(block_tag) if inner else block_tag
+                if code_tag is not None:
+                    blocks.append(code_tag.get_text(separator="\n", strip=True))
+            per_rule_blocks.append(blocks)
+        return blog_text_full, _collect_code(per_rule_blocks)
+
+class SelectolaxEngine:
+    """selectolax(lexbor) 기반 추출: C 파서라 가장 빠르다."""
+
+    name = "selectolax"
+
+    def __init__(self, profiles=PROFILES):
+        from selectolax.lexbor import LexborHTMLParser
+
+        self._parser = LexborHTMLParser
+        self._profiles = {profile.name: profile for profile in profiles}
+
+    def extract(self, html, profile):
+        tree = self._parser(html)
+        main_content_div = None
+        for container in profile.containers:
+            main_content_div = tree.css_first(container.text)
+            if main_content_div is not None:
+                break
+        if main_content_div is None:
+            return None
+        main_content_div.strip_tags(['script', 'style'], recursive=True)
+
+        blog_text_full = self._text(main_content_div)
+        per_rule_blocks = []
+        for rule in profile.code_rules:
+            matched = main_content_div.css(rule.block.text)
+            if rule.lines:
+                per_rule_blocks.append([_join_lines(node.text(deep=True) for node in matched)])
+                continue
+            blocks = []
+            for block in matched:
+                code_tag = block.css_first(rule.inner.text) if rule.inner else block
+                if code_tag is not None:
+                    blocks.append(self._text(code_tag))
+            per_rule_blocks.append(blocks)
+        return blog_text_full, _collect_code(per_rule_blocks)
+
+    @staticmethod
+    def _text(node):
+        # 텍스트 노드 경계를 보존하기 위해 NUL로 합친 뒤 다시 나눈다.
+        return _join_fragments(node.text(deep=True, separator="\0").split("\0"))
+
+class LxmlEngine:
+    """lxml 기반 추출: libxml2 파서 + 미리 컴파일한 XPath"""
+
+    name = "lxml"
+
+    def __init__(self, profiles=PROFILES):
+        import lxml.html
+        from lxml import etree
+
+        self._fromstring = lxml.html.fromstring
+        self._compiled = {}
+        for profile in profiles:
+            self._compiled[profile.name] = (
+                [etree.XPath(f"({sel.xpath('descendant-or-self')})[1]") for sel in profile.containers],
+                [(etree.XPath(rule.block.xpath()),
+                  etree.XPath(f"({rule.inner.xpath()})[1]") if rule.inner else None,
+                  rule.lines) for rule in profile.code_rules],
+            )
+
+    def extract(self, html, profile):
+        containers, rules = self._compiled[profile.name]
+        root = self._fromstring(html)
+        main_content_div = None
+        for container in containers:
+            found = container(root)
+            if found:
+                main_content_div = found[0]
+                break
+        if main_content_div is None:
+            return None
+        for tag in list(main_content_div.iter('script', 'style')):
+            tag.drop_tree()
+
+        blog_text_full = _join_fragments(main_content_div.itertext())
+        per_rule_blocks = []
+        for block, inner, lines in rules:
+            matched = block(main_content_div)
+            if lines:
+                per_rule_blocks.append([_join_lines("".join(el.itertext()) for el in matched)])
+                continue
+            blocks = []
+            for block_el in matched:
+                found = inner(block_el) if inner is not None else [block_el]
+                if found:
+                    blocks.append(_join_fragments(found[0].itertext()))
+            per_rule_blocks.append(blocks)
+        return blog_text_full, _collect_code(per_rule_blocks)
+
+class _StopParsing(Exception):
+    pass
+
+class _RuleState:
+    """스트리밍 파서에서 코드 규칙 하나의 진행 상태"""
+
+    def __init__(self, rule):
+        self.rule = rule
+        self.block_depth = 0      # 현재 block 요소 안에서의 같은 태그 중첩 깊이
+        self.inner_taken = False  # 현재 block에서 이미 inner를 수집했는지
+        self.inner_depth = 0
+        self.fragments = []
+        self.blocks = []
+
+class _ArticleParser(HTMLParser):
+    """본문 컨테이너만 따라가며 텍스트/코드를 모으고, 컨테이너가 닫히면 즉시 중단하는 파서"""
+
+    def __init__(self, container, code_rules):
+        super().__init__(convert_charrefs=True)
+        self.container = container
+        self.rules = [_RuleState(rule) for rule in code_rules]
+        self.found = False
+        self.text_fragments = []
+        self._depth = 0       # 컨테이너 안에서의 컨테이너 태그 중첩 깊이
+        self._skip_depth = 0  # script/style 안
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if not self.found:
+            if self.container.matches(tag, attrs):
+                self.found = True
+                self._depth = 1
+            return
+
+        if tag == self.container.tag:
+            self._depth += 1
+        if tag in ('script', 'style'):
+            self._skip_depth += 1
+
+        for state in self.rules:
+            rule = state.rule
+            if state.block_depth:
+                if tag == rule.block.tag:
+                    state.block_depth += 1
+                if rule.inner:
+                    if state.inner_depth:
+                        if tag == rule.inner.tag:
+                            state.inner_depth += 1
+                    elif not state.inner_taken and rule.inner.matches(tag, attrs):
+                        state.inner_depth = 1
+                        state.inner_taken = True
+                        state.fragments = []
+            elif rule.block.matches(tag, attrs):
+                state.block_depth = 1
+                state.inner_taken = False
+                if not rule.inner:
+                    state.fragments = []
+
+    def handle_endtag(self, tag):
+        if not self.found:
+            return
+        for state in self.rules:
+            rule = state.rule
+            if not state.block_depth:
+                continue
+            if rule.inner and state.inner_depth and tag == rule.inner.tag:
+                state.inner_depth -= 1
+                if state.inner_depth == 0:
+                    state.blocks.append(_join_fragments(state.fragments))
+            if tag == rule.block.tag:
+                state.block_depth -= 1
+                if state.block_depth == 0 and not rule.inner:
+                    if rule.lines:
+                        state.blocks.append("".join(state.fragments))
+                    else:
+                        state.blocks.append(_join_fragments(state.fragments))
+
+        if tag in ('script', 'style'):
+            self._skip_depth = max(0, self._skip_depth - 1)
+        if tag == self.container.tag:
+            self._depth -= 1
+            if self._depth == 0:
+                raise _StopParsing()
+
+    def handle_data(self, data):
+        if not self.found or self._skip_depth:
+            return
+        self.text_fragments.append(data)
+        for state in self.rules:
+            if state.inner_depth or (state.block_depth and not state.rule.inner):
+                state.fragments.append(data)
+
+    def code(self):
+        per_rule_blocks = []
+        for state in self.rules:
+            if state.rule.lines:
+                per_rule_blocks.append([_join_lines(state.blocks)])
+            else:
+                per_rule_blocks.append(state.blocks)
+        return _collect_code(per_rule_blocks)
+
+class StreamingEngine:
+    """
+    표준 라이브러리 HTMLParser로 이벤트 단위 파싱.
+    트리를 만들지 않고, 본문 컨테이너가 닫히는 순간 나머지 문서(댓글, 사이드바 등)는 건너뛴다.
+    컨테이너 후보마다 한 번씩 시도하므로 첫 후보가 맞는 경우에 가장 빠르다.
+    """
+
+    name = "streaming"
+
+    def __init__(self, profiles=PROFILES):
+        pass
+
+    def extract(self, html, profile):
+        for container in profile.containers:
+            parser = _ArticleParser(container, profile.code_rules)
+            try:
+                parser.feed(html)
+                parser.close()
+            except _StopParsing:
+                pass
+            if parser.found:
+                return _join_fragments(parser.text_fragments), parser.code()
+        return None
+
+ENGINES = {
+    "selectolax": SelectolaxEngine if SELECTOLAX_AVAILABLE else None,
+    "lxml": LxmlEngine if LXML_AVAILABLE else None,
+    "streaming": StreamingEngine,
+    "bs4": BeautifulSoupEngine,
+}
+
+def available_engines():
+    return [name for name, engine in ENGINES.items() if engine is not None]
+
+def get_engine(name="auto"):
+    """
+    이름으로 추출 엔진을 고른다.
+    auto는 selectolax → lxml → streaming 순으로 사용 가능한 것을 선택한다.
+    """
+    if name == "auto":
+        name = available_engines()[0]
+    engine = ENGINES.get(name)
+    if engine is None:
+        logger.warning(f"추출 엔진 '{name}'을(를) 사용할 수 없어 bs4로 대체합니다.")
+        engine = BeautifulSoupEngine
+    return engine()
+
+# 엔진(프로필 선택자 컴파일 포함)은 처음 추출할 때 만든다. 미리 만들려면 warm_up()을 호출한다.
+_engine = None
+_fallback = None
+_engine_lock = threading.Lock()
+
+def warm_up():
+    """추출 엔진과 bs4 대체 경로를 미리 만들어 둔다 (bs4/soupsieve import와 선택자 컴파일)."""
+    global _engine, _fallback
+    if _engine is None or _fallback is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = get_engine(os.getenv("BLOG_PARSER_ENGINE", "auto"))
+            if _fallback is None:
+                _fallback = BeautifulSoupEngine()
+                import bs4  # noqa: F401  (첫 대체 추출 때 import 비용이 들지 않도록)
+    return _engine
+
+def extract_article(html, url=None, engine=None):
+    """
+    블로그 HTML에서 (본문 텍스트, 코드 블록 목록) 튜플을 추출한다. 본문이 없으면 None.
+    사이트/테마는 URL과 <meta> 태그로 감지하고,
+    고속 엔진이 예외를 내면 기존 BeautifulSoup 경로로 다시 시도한다.
+    """
+    engine = engine or _engine or warm_up()
+    profile = detect_profile(url, html)
+    try:
+        return engine.extract(html, profile)
+    except Exception as e:
+        if engine.name == BeautifulSoupEngine.name:
+            raise
+        logger.warning(f"{engine.name} 추출 실패, bs4로 재시도: {e}")
+        if _fallback is None:
+            # 엔진을 직접 넘긴 호출은 warm_up()을 거치지 않으므로 여기서 대체 경로를 만든다.
+            warm_up()
+        return _fallback.extract(html, profile)
@@ -0,0 +1,260 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import asyncio
+import logging
+import threading
+import datetime
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# 로컬 디스크 캐시 기본 경로 (Cloud Run에서는 /tmp만 쓰기 가능)
+DEFAULT_CACHE_DB_PATH = os.getenv("CACHE_DB_PATH", "/tmp/autobackjoon_cache.sqlite3")
+
+def content_hash(text):
+    """본문 텍스트의 내용 기반 키 (공백 차이는 무시)"""
+    normalized = " ".join(text.split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+class LRUCache:
+    """프로세스 내 LRU 캐시 (TTL + 최대 항목 수 기반 제거)"""
+
+    def __init__(self, max_entries=512, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = ttl if ttl is not None else self.ttl
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+class SQLiteCache:
+    """로컬 디스크(SQLite) 캐시 (TTL + 최대 행 수 기반 제거, 값은 JSON으로 저장)"""
+
+    def __init__(self, path=DEFAULT_CACHE_DB_PATH, table="cache", max_rows=10000, ttl=None):
+        self.path = path
+        self.table = table
+        self.max_rows = max_rows
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "expires_at REAL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {table}_accessed ON {table} (accessed_at)"
+            )
+
+    def get(self, key):
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else None
+
+    def get_entry(self, key):
+        """(값, 만료 시각(epoch 초) 또는 None). 없거나 만료됐으면 None."""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at is not None and expires_at < now:
+                self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                return None
+            self._conn.execute(
+                f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+        return json.loads(value), expires_at
+
+    def set(self, key, value, ttl=None):
+        ttl = ttl if ttl is not None else self.ttl
+        now = time.time()
+        expires_at = now + ttl if ttl else None
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), expires_at, now)
+            )
+            self._evict(now)
+
+    def delete(self, key):
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def _evict(self, now):
+        # 만료된 항목 제거 후, 최대 행 수를 넘으면 가장 오래 사용되지 않은 항목부터 제거
+        self._conn.execute(
+            f"DELETE FROM {self.table} WHERE expires_at IS NOT NULL AND expires_at < ?", (now,)
+        )
+        (count,) = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+        overflow = count - self.max_rows
+        if overflow > 0:
+            self._conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN ("
+                f"SELECT key FROM {self.table} ORDER BY accessed_at ASC LIMIT ?)",
+                (overflow,)
+            )
+
+    def __len__(self):
+        with self._lock:
+            (count,) = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+        return count
+
+class FirestoreCache:
+    """
+    Firestore 컬렉션 기반 캐시 (인스턴스 간 공유용, 선택 사항).
+    만료는 읽을 때 확인하며, 크기 제한은 'expires_at' 필드에
+    Firestore TTL 정책을 걸어 처리한다.
+    """
+
+    def __init__(self, db, collection="cache", ttl=None):
+        self.db = db
+        self.collection = collection
+        self.ttl = ttl
+
+    def _doc(self, key):
+        # 문서 ID에는 '/'를 쓸 수 없으므로 키를 해시해서 사용
+        doc_id = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return self.db.collection(self.collection).document(doc_id)
+
+    def get(self, key):
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else None
+
+    def get_entry(self, key):
+        """(값, 만료 시각(epoch 초) 또는 None). 없거나 만료됐으면 None."""
+        doc = self._doc(key).get()
+        if not doc.exists:
+            return None
+        data = doc.to_dict()
+        expires_at = data.get("expires_at")
+        if expires_at is not None and expires_at < datetime.datetime.now(datetime.timezone.utc):
+            return None
+        return json.loads(data["value"]), expires_at.timestamp() if expires_at is not None else None
+
+    def set(self, key, value, ttl=None):
+        ttl = ttl if ttl is not None else self.ttl
+        expires_at = None
+        if ttl:
+            expires_at = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=ttl)
+        self._doc(key).set({
+            "key": key,
+            "value": json.dumps(value, ensure_ascii=False),
+            "expires_at": expires_at,
+        })
+
+    def delete(self, key):
+        self._doc(key).delete()
+
+class TieredCache:
+    """
+    메모리(LRU) → 로컬 디스크 → (선택) Firestore 순으로 조회하는 계층형 캐시.
+    하위 계층에서 찾은 값은 남은 만료 시간으로 상위 계층에 다시 채운다.
+    백엔드 오류는 캐시 미스로 취급한다.
+    """
+
+    def __init__(self, memory, stores=()):
+        self.memory = memory
+        self.stores = [store for store in stores if store is not None]
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        for depth, store in enumerate(self.stores):
+            try:
+                entry = store.get_entry(key)
+            except Exception as e:
+                logger.warning(f"캐시 조회 오류 ({type(store).__name__}): {e}")
+                continue
+            if entry is None:
+                continue
+            value, expires_at = entry
+            # 만료 시각이 없는 항목은 각 계층의 기본 TTL을 쓴다.
+            ttl = None if expires_at is None else expires_at - time.time()
+            if ttl is not None and ttl <= 0:
+                continue
+            self.memory.set(key, value, ttl)
+            for upper in self.stores[:depth]:
+                self._safe_set(upper, key, value, ttl)
+            self.hits += 1
+            return value
+        self.misses += 1
+        return None
+
+    def set(self, key, value, ttl=None):
+        self.memory.set(key, value, ttl)
+        for store in self.stores:
+            self._safe_set(store, key, value, ttl)
+
+    def delete(self, key):
+        self.memory.delete(key)
+        for store in self.stores:
+            try:
+                store.delete(key)
+            except Exception as e:
+                logger.warning(f"캐시 삭제 오류 ({type(store).__name__}): {e}")
+
+    @staticmethod
+    def _safe_set(store, key, value, ttl=None):
+        try:
+            store.set(key, value, ttl)
+        except Exception as e:
+            logger.warning(f"캐시 저장 오류 ({type(store).__name__}): {e}")
+
+    async def aget(self, key):
+        """이벤트 루프용 조회: 메모리 적중은 바로 반환하고, 하위 계층은 스레드에서 조회"""
+        value = self.memory.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        if not self.stores:
+            self.misses += 1
+            return None
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key, value, ttl=None):
+        self.memory.set(key, value, ttl)
+        if self.stores:
+            await asyncio.to_thread(self.set, key, value, ttl)
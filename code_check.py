@@ -0,0 +1,129 @@
+import os
+import re
+import shutil
+import asyncio
+import logging
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+MAIN_CLASS_RE = re.compile(r"\bclass\s+Main\b")
+MAIN_METHOD_RE = re.compile(
+    r"\bstatic\s+(?:public\s+)?void\s+main\s*\(\s*(?:final\s+)?"
+    r"String\s*(?:\[\s*\]|\.\.\.)?\s*\w+\s*(?:\[\s*\])?\s*\)"
+)
+# 블로그 코드에 자주 있는 생략 표시 (완성된 코드가 아님)
+PLACEHOLDER_RE = re.compile(r"^\s*(\.\.\.|…|// ?\.\.\.|/\* ?\.\.\. ?\*/)\s*$", re.M)
+
+JAVAC = shutil.which("javac")
+JAVAC_TIMEOUT = int(os.getenv("JAVAC_TIMEOUT", 20))
+
+def braces_balanced(code):
+    """문자열/문자 리터럴/주석을 제외하고 {}()[] 짝이 맞는지 확인"""
+    pairs = {"}": "{", ")": "(", "]": "["}
+    stack = []
+    i, n = 0, len(code)
+    while i < n:
+        ch = code[i]
+        if code.startswith("//", i):
+            end = code.find("\n", i)
+            i = n if end < 0 else end
+            continue
+        if code.startswith("/*", i):
+            end = code.find("*/", i + 2)
+            if end < 0:
+                return False
+            i = end + 2
+            continue
+        if code.startswith('"""', i):
+            end = code.find('"""', i + 3)
+            if end < 0:
+                return False
+            i = end + 3
+            continue
+        if ch in "\"'":
+            i += 1
+            while i < n and code[i] != ch:
+                if code[i] == "\\":
+                    i += 1
+                elif code[i] == "\n":
+                    return False
+                i += 1
+            i += 1
+            continue
+        if ch in "{([":
+            stack.append(ch)
+        elif ch in "})]":
+            if not stack or stack.pop() != pairs[ch]:
+                return False
+        i += 1
+    return not stack
+
+def looks_complete(code):
+    """javac 없이 판단할 수 있는 완성도 검사: Main 클래스, main 메서드, 괄호 짝, 생략 표시 없음"""
+    return bool(
+        code
+        and MAIN_CLASS_RE.search(code)
+        and MAIN_METHOD_RE.search(code)
+        and not PLACEHOLDER_RE.search(code)
+        and braces_balanced(code)
+    )
+
+async def javac_compiles(code, slots=None):
+    """
+    로컬 javac로 컴파일되는지 확인. javac가 없으면 None.
+    slots(asyncio.Semaphore)를 넘기면 그 안에서 실행해 동시에 뜨는 JVM 수를 제한한다.
+    """
+    if not JAVAC:
+        return None
+    if slots is not None:
+        async with slots:
+            return await _javac(code)
+    return await _javac(code)
+
+async def _javac(code):
+    with tempfile.TemporaryDirectory(prefix="boj_javac_") as workdir:
+        with open(os.path.join(workdir, "Main.java"), "w", encoding="utf-8") as f:
+            f.write(code)
+        process = await asyncio.create_subprocess_exec(
+            JAVAC, "-encoding", "UTF-8", "-nowarn", "-d", workdir, "Main.java",
+            cwd=workdir, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            _, stderr = await asyncio.wait_for(process.communicate(), JAVAC_TIMEOUT)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            logger.warning("javac 컴파일 시간 초과")
+            return False
+        if process.returncode != 0:
+            logger.info(f"    ⤷ javac 컴파일 실패: {stderr.decode(errors='replace')[:200]}")
+        return process.returncode == 0
+
+def candidate_programs(blocks):
+    """
+    블로그 코드 블록 목록에서 완성 프로그램 후보를 만든다.
+    Main 클래스가 있는 각 블록을 먼저 보고, import/클래스가 여러 블록으로 나뉜 경우를 위해
+    Main 클래스가 하나뿐일 때만 전체 합본도 본다.
+    """
+    if isinstance(blocks, str):
+        blocks = [blocks]
+    blocks = [block for block in blocks if block and block.strip()]
+    candidates = [block for block in blocks if MAIN_CLASS_RE.search(block)]
+    if len(blocks) > 1 and len(candidates) <= 1:
+        candidates.append("\n\n".join(blocks))
+    elif not candidates and blocks:
+        candidates.append(blocks[0])
+    return candidates
+
+async def find_complete_solution(blocks, use_javac=True, slots=None):
+    """코드 블록 목록에서 완성된 Java 풀이로 판단되는 코드를 반환 (없으면 None)"""
+    for candidate in candidate_programs(blocks or []):
+        if not looks_complete(candidate):
+            continue
+        if use_javac:
+            compiled = await javac_compiles(candidate, slots)
+            if compiled is False:
+                continue
+        return candidate
+    return None
@@ -0,0 +1,102 @@
+import re
+import hashlib
+
+# Java 토큰: 주석, 문자열/문자 리터럴, 식별자, 숫자, 그 밖의 기호 한 글자
+TOKEN_RE = re.compile(
+    r"//[^\n]*|/\*.*?\*/"
+    r"|\"(?:\\.|[^\"\\\n])*\"|'(?:\\.|[^'\\\n])*'"
+    r"|[A-Za-z_$][\w$]*|\d[\w.]*|\S",
+    re.S,
+)
+
+# 이보다 짧은 코드(import 한 줄, 입력 예시 등)는 중복 판단에서 뺀다.
+MIN_TOKENS = 30
+
+def code_tokens(code):
+    """주석과 공백을 뺀 토큰 목록 (들여쓰기, 줄바꿈, 주석만 다른 코드는 같은 토큰이 된다)"""
+    return [token for token in TOKEN_RE.findall(code or "") if not token.startswith(("//", "/*"))]
+
+def code_fingerprint(code, min_tokens=MIN_TOKENS):
+    """정규화한 코드의 해시 (토큰이 min_tokens개보다 적으면 None)"""
+    tokens = code_tokens(code)
+    if len(tokens) < min_tokens:
+        return None
+    return hashlib.sha256(" ".join(tokens).encode("utf-8")).hexdigest()[:32]
+
+# 이름을 바꿔도 남는 Java 예약어 (나머지 식별자는 처음 나온 순서대로 번호를 붙인다)
+JAVA_KEYWORDS = frozenset("""
+abstract assert boolean break byte case catch char class const continue default do double else enum
+extends final finally float for goto if implements import instanceof int interface long native new
+package private protected public return short static strictfp super switch synchronized this throw
+throws transient try void volatile while var record true false null
+""".split())
+
+IDENTIFIER_RE = re.compile(r"[A-Za-z_$][\w$]*$")
+
+def shape_fingerprint(code, min_tokens=MIN_TOKENS):
+    """
+    식별자 이름을 등장 순서 번호로 바꾼 코드의 해시. 변수/메서드 이름만 바꾼 복사본은 같은 값이 된다.
+    (토큰이 min_tokens개보다 적으면 None)
+    """
+    tokens = code_tokens(code)
+    if len(tokens) < min_tokens:
+        return None
+    names = {}
+    shaped = []
+    for token in tokens:
+        if token not in JAVA_KEYWORDS and IDENTIFIER_RE.match(token):
+            token = names.setdefault(token, f"${len(names)}")
+        shaped.append(token)
+    return hashlib.sha256(" ".join(shaped).encode("utf-8")).hexdigest()[:32]
+
+def shingles(tokens, size=5):
+    """연속한 size개 토큰 묶음의 집합"""
+    if len(tokens) < size:
+        return {tuple(tokens)} if tokens else set()
+    return {tuple(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+def similarity(a, b):
+    """두 shingle 집합의 자카드 유사도"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+def collapse_duplicates(urls, results, threshold=0.8, shingle_size=5, min_tokens=MIN_TOKENS):
+    """
+    같거나 거의 같은 코드를 가진 블로그 결과를 하나로 합친다 (검색 순위 순서 유지).
+    코드가 없거나 min_tokens개보다 짧은 결과는 그대로 둔다.
+    묶음에서는 완성 코드로 판단된 결과를, 그다음은 앞 순위를 남기고,
+    남긴 결과에 요약이 없으면 합쳐진 결과의 요약을 가져온다.
+    반환값은 (남긴 URL 목록, 남긴 결과 목록, {중복 URL: 남긴 URL}).
+    """
+    kept = []  # [url, result, shingles]
+    mirrors = {}
+    for url, result in zip(urls, results):
+        tokens = code_tokens(result.get("code")) if result else []
+        current = shingles(tokens, shingle_size) if len(tokens) >= min_tokens else set()
+        match = None
+        if current:
+            for entry in kept:
+                if entry[2] and similarity(current, entry[2]) >= threshold:
+                    match = entry
+                    break
+        if match is None:
+            kept.append([url, result, current])
+            continue
+
+        if result.get("complete") and not match[1].get("complete"):
+            # 완성 코드가 있는 쪽을 남기고 기존 결과를 미러로 돌린다.
+            previous_url, previous = match[0], match[1]
+            match[0], match[1], match[2] = url, dict(result), current
+            for mirror, canonical in mirrors.items():
+                if canonical == previous_url:
+                    mirrors[mirror] = url
+            mirrors[previous_url] = url
+            result = previous
+        else:
+            mirrors[url] = match[0]
+            match[1] = dict(match[1])
+        if not match[1].get("summary") and result.get("summary"):
+            match[1]["summary"] = result["summary"]
+
+    return [entry[0] for entry in kept], [entry[1] for entry in kept], mirrors
@@ -0,0 +1,174 @@
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Firestore 커밋 하나에 넣을 수 있는 최대 쓰기 수
+MAX_BATCH_WRITES = 500
+
+class FirestoreWriteBuffer:
+    """
+    문서 갱신(update)을 잠시 모았다가 WriteBatch 한 번으로 커밋하는 write-behind 버퍼.
+    - 같은 문서에 대한 갱신은 하나로 합친다 (processing → completed가 한 번에 모이면 쓰기 1회).
+    - flush_delay가 지나거나 max_writes개가 모이면 여러 문제의 갱신을 한 커밋으로 보낸다.
+    - 배치가 실패하면(예: 없는 문서가 섞임) 문서별로 다시 써서 나머지 갱신은 반영되게 한다.
+    - close()는 남은 갱신을 모두 커밋한다 (종료 시 호출).
+    이벤트 루프 안에서만 사용한다.
+    """
+
+    def __init__(self, get_client, collection, flush_delay=0.2, max_writes=MAX_BATCH_WRITES, on_written=None):
+        self.get_client = get_client
+        self.collection = collection
+        self.flush_delay = flush_delay
+        self.max_writes = min(max_writes, MAX_BATCH_WRITES)
+        self.on_written = on_written
+        self._pending = {}  # doc_id -> (data, [future, ...])
+        self._refs = {}  # doc_id -> DocumentReference
+        self._wake = None
+        self._flusher = None
+        self._commit_lock = None
+        self.commits = 0
+        self.writes = 0
+        self.merged = 0
+        self.fallbacks = 0
+
+    def _ref(self, doc_id):
+        ref = self._refs.get(doc_id)
+        if ref is None:
+            if len(self._refs) >= 10000:
+                self._refs.clear()
+            ref = self._refs[doc_id] = self.get_client().collection(self.collection).document(doc_id)
+        return ref
+
+    async def update(self, doc_id, data, wait=True):
+        """
+        갱신을 버퍼에 넣는다. wait=True이면 커밋될 때까지 기다려 성공 여부를 반환하고,
+        wait=False이면 바로 반환한다 (실패는 로그로만 남음).
+        """
+        if self._wake is None:
+            self._wake = asyncio.Event()
+            self._commit_lock = asyncio.Lock()
+        previous = self._pending.get(doc_id)
+        if previous is not None:
+            self.merged += 1
+            data = {**previous[0], **data}
+        futures = previous[1] if previous is not None else []
+        future = None
+        if wait:
+            future = asyncio.get_running_loop().create_future()
+            futures = futures + [future]
+        self._pending[doc_id] = (data, futures)
+        if len(self._pending) >= self.max_writes:
+            self._wake.set()
+        if self._flusher is None:
+            self._flusher = asyncio.ensure_future(self._flush_after_delay())
+        if future is None:
+            return True
+        return await future
+
+    async def _flush_after_delay(self):
+        try:
+            await asyncio.wait_for(self._wake.wait(), self.flush_delay)
+        except asyncio.TimeoutError:
+            pass
+        self._wake.clear()
+        batch, self._pending = self._pending, {}
+        self._flusher = None
+        async with self._commit_lock:
+            results = await self._commit(batch)
+        for doc_id, (_, futures) in batch.items():
+            for future in futures:
+                if not future.done():
+                    future.set_result(results.get(doc_id, False))
+
+    async def _commit(self, batch):
+        """문서별 성공 여부 {doc_id: bool}"""
+        if not batch:
+            return {}
+        try:
+            write_batch = self.get_client().batch()
+            for doc_id, (data, _) in batch.items():
+                write_batch.update(self._ref(doc_id), data)
+            await write_batch.commit()
+            self.commits += 1
+            self.writes += len(batch)
+            results = {doc_id: True for doc_id in batch}
+        except Exception as e:
+            if len(batch) == 1:
+                logger.error(f"Firestore 갱신 실패 ({next(iter(batch))}): {e}")
+                results = {doc_id: False for doc_id in batch}
+            else:
+                logger.warning(f"Firestore 배치 커밋 실패, 문서별로 다시 씁니다 ({len(batch)}개): {e}")
+                self.fallbacks += 1
+                results = await self._commit_each(batch)
+        self._notify(results)
+        return results
+
+    async def _commit_each(self, batch):
+        async def write(doc_id, data):
+            try:
+                await self._ref(doc_id).update(data)
+                self.commits += 1
+                self.writes += 1
+                return True
+            except Exception as e:
+                logger.error(f"Firestore 갱신 실패 ({doc_id}): {e}")
+                return False
+
+        doc_ids = list(batch)
+        outcomes = await asyncio.gather(*(write(doc_id, batch[doc_id][0]) for doc_id in doc_ids))
+        return dict(zip(doc_ids, outcomes))
+
+    def _notify(self, results):
+        if self.on_written is None:
+            return
+        for doc_id, ok in results.items():
+            if ok:
+                try:
+                    self.on_written(doc_id)
+                except Exception as e:
+                    logger.warning(f"쓰기 후 처리 중 오류 ({doc_id}): {e}")
+
+    async def flush(self):
+        """대기 중인 갱신을 바로 커밋하고 끝날 때까지 기다린다."""
+        while self._flusher is not None:
+            flusher = self._flusher
+            self._wake.set()
+            await flusher
+
+    async def close(self):
+        await self.flush()
+        if self._commit_lock is not None:
+            # 진행 중인 커밋이 있으면 끝날 때까지 기다린다.
+            async with self._commit_lock:
+                pass
+
+    def stats(self):
+        return {
+            "pending": len(self._pending),
+            "commits": self.commits,
+            "writes": self.writes,
+            "merged": self.merged,
+            "fallbacks": self.fallbacks,
+        }
+
+def commit_in_batches(db, writes, op="set", batch_size=MAX_BATCH_WRITES):
+    """
+    (DocumentReference, data) 목록을 동기 클라이언트의 WriteBatch로 batch_size개씩 쓰고 커밋 수를 반환.
+    op는 "set" 또는 "update"이며, 배치 하나는 원자적으로 반영된다.
+    """
+    commits = 0
+    batch = db.batch()
+    count = 0
+    for ref, data in writes:
+        getattr(batch, op)(ref, data)
+        count += 1
+        if count == batch_size:
+            batch.commit()
+            commits += 1
+            batch = db.batch()
+            count = 0
+    if count:
+        batch.commit()
+        commits += 1
+    return commits
@@ -0,0 +1,269 @@
+import os
+import time
+import asyncio
+import hashlib
+import logging
+
+import http_client
+
+logger = logging.getLogger(__name__)
+
+GITHUB_API = os.getenv("GITHUB_API_URL", "https://api.github.com")
+
+# 업로드 결과
+UPLOADED = "uploaded"
+UNCHANGED = "unchanged"
+FAILED = "failed"
+
+def git_blob_sha(content):
+    """git이 파일 내용에 붙이는 blob SHA-1 (git hash-object와 같은 값)"""
+    data = content.encode("utf-8")
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+class GitHubError(Exception):
+    def __init__(self, status, message):
+        super().__init__(f"GitHub API 오류 {status}: {message}")
+        self.status = status
+
+class GitHubClient:
+    """
+    GitHub REST API 호출 도우미.
+    - GET 응답의 ETag를 기억해 두고 If-None-Match로 다시 요청한다 (304는 호출 한도에서 차감되지 않음).
+    - X-RateLimit-Remaining이 0이거나 403/429 + Retry-After를 받으면 리셋 시각까지 기다린 뒤 재시도한다.
+    """
+
+    def __init__(self, get_session, token, limiter=None, max_wait=60, attempts=3):
+        self.get_session = get_session
+        self.headers = {
+            "Authorization": f"Bearer {token}",
+            "Accept": "application/vnd.github+json",
+            "X-GitHub-Api-Version": "2022-11-28",
+        }
+        self.limiter = limiter
+        self.max_wait = max_wait
+        self.attempts = attempts
+        self._etags = {}  # url -> (etag, data)
+        self._blocked_until = 0.0
+        self.calls = 0
+        self.not_modified = 0
+
+    def _note_rate_limit(self, response):
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        reset = response.headers.get("X-RateLimit-Reset")
+        if remaining == "0" and reset:
+            self._blocked_until = max(self._blocked_until, float(reset))
+        retry_after = response.headers.get("Retry-After")
+        if retry_after and response.status in (403, 429):
+            self._blocked_until = max(self._blocked_until, time.time() + float(retry_after))
+
+    async def _wait_if_blocked(self):
+        wait = self._blocked_until - time.time()
+        if wait <= 0:
+            return
+        if wait > self.max_wait:
+            raise GitHubError(429, f"호출 한도 초과, {int(wait)}초 뒤 리셋")
+        logger.warning(f"GitHub 호출 한도 대기: {wait:.1f}초")
+        await asyncio.sleep(wait)
+
+    async def _send(self, method, url, json):
+        session = await self.get_session()
+        headers = dict(self.headers)
+        cached = self._etags.get(url) if method == "GET" else None
+        if cached:
+            headers["If-None-Match"] = cached[0]
+        # 연결 오류와 5xx는 공용 재시도에 맡기고, 호출 한도(403/429)는 아래 request()에서 처리
+        response = await http_client.request(session, method, url, headers=headers, json=json,
+                                             retry_statuses=(500, 502, 503, 504))
+        self.calls += 1
+        self._note_rate_limit(response)
+        if response.status == 304 and cached:
+            self.not_modified += 1
+            return 200, cached[1]
+        data = await response.json(content_type=None) if response.status != 204 else None
+        if method == "GET" and response.status == 200 and response.headers.get("ETag"):
+            self._etags[url] = (response.headers["ETag"], data)
+        return response.status, data
+
+    async def request(self, method, path, json=None):
+        """(status, data)를 반환. 호출 한도 초과는 기다렸다가 재시도한다."""
+        url = path if path.startswith("http") else f"{GITHUB_API}{path}"
+        for attempt in range(self.attempts):
+            await self._wait_if_blocked()
+            if self.limiter is not None:
+                async with self.limiter():
+                    status, data = await self._send(method, url, json)
+            else:
+                status, data = await self._send(method, url, json)
+            limited = status == 429 or (status == 403 and self._blocked_until > time.time())
+            if not limited or attempt == self.attempts - 1:
+                return status, data
+        return status, data
+
+class GitHubBatchUploader:
+    """
+    여러 파일을 Git Data API(trees/commits/refs)로 한 번의 커밋에 올린다.
+    upload()는 파일을 대기열에 넣고, batch_delay 동안 모인 파일(최대 max_files개)을
+    한 커밋으로 만든 뒤 각 호출자에게 파일별 결과를 돌려준다.
+    파일마다 contents API의 GET+PUT을 부르던 방식과 달리 배치당 호출 수가 고정(약 4회)이고,
+    브랜치가 그 사이에 움직였으면(422) 최신 커밋 기준으로 다시 만든다.
+    저장소 트리 목록(트리 SHA별로 캐시)의 blob SHA가 로컬에서 계산한 값과 같은 파일은 커밋에서 뺀다.
+    """
+
+    def __init__(self, client, repo, branch="main", batch_delay=2.0, max_files=20, attempts=3):
+        self.client = client
+        self.repo = repo
+        self.branch = branch
+        self.batch_delay = batch_delay
+        self.max_files = max_files
+        self.attempts = attempts
+        self._pending = {}  # path -> (content, message, [future, ...])
+        self._wake = None
+        self._flusher = None
+        self._commit_lock = None
+        self._trees = {}  # commit sha -> tree sha (커밋은 불변이므로 계속 캐시)
+        self._listings = {}  # tree sha -> {path: blob sha} (최근 몇 개만 유지)
+        self.commits = 0
+
+    async def upload(self, path, content, message=None):
+        """파일을 다음 배치 커밋에 넣고, 커밋이 끝나면 UPLOADED/UNCHANGED/FAILED 중 하나를 반환"""
+        if self._wake is None:
+            self._wake = asyncio.Event()
+            self._commit_lock = asyncio.Lock()
+        future = asyncio.get_running_loop().create_future()
+        previous = self._pending.get(path)
+        futures = (previous[2] if previous else []) + [future]
+        # 같은 파일이 다시 들어오면 최신 내용만 커밋하고 결과는 모두에게 전달
+        self._pending[path] = (content, message, futures)
+        if len(self._pending) >= self.max_files:
+            self._wake.set()
+        if self._flusher is None:
+            self._flusher = asyncio.ensure_future(self._flush_after_delay())
+        return await future
+
+    async def _flush_after_delay(self):
+        try:
+            await asyncio.wait_for(self._wake.wait(), self.batch_delay)
+        except asyncio.TimeoutError:
+            pass
+        self._wake.clear()
+        batch, self._pending = self._pending, {}
+        self._flusher = None
+        async with self._commit_lock:
+            try:
+                results = await self._commit(batch)
+            except Exception as e:
+                logger.error(f"GitHub 배치 커밋 중 오류: {e}", exc_info=True)
+                results = {}
+        for path, (_, _, futures) in batch.items():
+            for future in futures:
+                if not future.done():
+                    future.set_result(results.get(path, FAILED))
+
+    async def _head(self):
+        status, data = await self.client.request("GET", f"/repos/{self.repo}/git/ref/heads/{self.branch}")
+        if status != 200:
+            raise GitHubError(status, f"브랜치 {self.branch} 조회 실패")
+        return data["object"]["sha"]
+
+    async def _tree_of(self, commit_sha):
+        tree_sha = self._trees.get(commit_sha)
+        if tree_sha is None:
+            status, data = await self.client.request("GET", f"/repos/{self.repo}/git/commits/{commit_sha}")
+            if status != 200:
+                raise GitHubError(status, f"커밋 {commit_sha} 조회 실패")
+            tree_sha = data["tree"]["sha"]
+            self._trees[commit_sha] = tree_sha
+        return tree_sha
+
+    def _remember_listing(self, tree_sha, listing):
+        self._listings[tree_sha] = listing
+        while len(self._listings) > 4:
+            self._listings.pop(next(iter(self._listings)))
+
+    async def _listing(self, tree_sha):
+        """트리의 {경로: blob SHA}. 목록이 잘렸거나 조회에 실패하면 None (비교 없이 모두 커밋)."""
+        listing = self._listings.get(tree_sha)
+        if listing is not None:
+            return listing
+        status, data = await self.client.request(
+            "GET", f"/repos/{self.repo}/git/trees/{tree_sha}?recursive=1"
+        )
+        if status != 200 or data.get("truncated"):
+            logger.warning(f"GitHub 트리 목록을 사용할 수 없어 변경 비교를 건너뜁니다: {status}")
+            return None
+        listing = {item["path"]: item["sha"] for item in data.get("tree", []) if item.get("type") == "blob"}
+        self._remember_listing(tree_sha, listing)
+        return listing
+
+    @staticmethod
+    def _message(batch):
+        paths = sorted(batch)
+        if len(paths) == 1:
+            return batch[paths[0]][1] or f"Update {paths[0]}"
+        return f"Update {len(paths)} solutions\n\n" + "\n".join(f"- {path}" for path in paths)
+
+    async def _commit(self, batch):
+        """경로별 결과 {path: UPLOADED|UNCHANGED}를 반환 (실패는 예외)"""
+        if not batch:
+            return {}
+        blob_shas = {path: git_blob_sha(content) for path, (content, _, _) in batch.items()}
+        for attempt in range(self.attempts):
+            head = await self._head()
+            base_tree = await self._tree_of(head)
+            listing = await self._listing(base_tree)
+            changed = {
+                path: batch[path] for path in batch
+                if listing is None or listing.get(path) != blob_shas[path]
+            }
+            results = {path: UNCHANGED if path not in changed else UPLOADED for path in batch}
+            if not changed:
+                logger.info(f"GitHub 변경 없음, 커밋 생략: {', '.join(sorted(batch))}")
+                return results
+
+            # 파일 내용을 트리 항목에 직접 넣으면 blob 생성 호출이 필요 없다.
+            entries = [
+                {"path": path, "mode": "100644", "type": "blob", "content": content}
+                for path, (content, _, _) in changed.items()
+            ]
+            status, tree = await self.client.request(
+                "POST", f"/repos/{self.repo}/git/trees", json={"base_tree": base_tree, "tree": entries}
+            )
+            if status != 201:
+                raise GitHubError(status, f"트리 생성 실패: {tree}")
+            if tree["sha"] == base_tree:
+                logger.info(f"GitHub 변경 없음, 커밋 생략: {', '.join(sorted(batch))}")
+                return {path: UNCHANGED for path in batch}
+
+            status, commit = await self.client.request(
+                "POST", f"/repos/{self.repo}/git/commits",
+                json={"message": self._message(changed), "tree": tree["sha"], "parents": [head]},
+            )
+            if status != 201:
+                raise GitHubError(status, f"커밋 생성 실패: {commit}")
+            self._trees[commit["sha"]] = tree["sha"]
+
+            status, data = await self.client.request(
+                "PATCH", f"/repos/{self.repo}/git/refs/heads/{self.branch}",
+                json={"sha": commit["sha"], "force": False},
+            )
+            if status == 200:
+                self.commits += 1
+                if listing is not None:
+                    # 새 트리 목록은 기존 목록에 이번 파일만 반영하면 되므로 다시 조회하지 않는다.
+                    self._remember_listing(tree["sha"], {**listing, **{path: blob_shas[path] for path in changed}})
+                logger.info(f"✅ GitHub 커밋 완료 ({len(changed)}개 파일, 변경 없음 "
+                            f"{len(batch) - len(changed)}개): {commit['sha'][:7]}")
+                return results
+            if status == 422 and attempt < self.attempts - 1:
+                # 다른 커밋이 먼저 들어가 fast-forward가 아님: 최신 HEAD 기준으로 다시 시도
+                logger.warning("GitHub 브랜치가 변경되어 커밋을 다시 만듭니다.")
+                continue
+            raise GitHubError(status, f"브랜치 갱신 실패: {data}")
+        return {}
+
+    def stats(self):
+        return {
+            "commits": self.commits,
+            "api_calls": self.client.calls,
+            "not_modified": self.client.not_modified,
+        }
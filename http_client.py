@@ -0,0 +1,190 @@
+import os
+import random
+import asyncio
+import logging
+import datetime
+import email.utils
+import importlib.util
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# 공용 HTTP 설정 (검색, 블로그, GitHub는 aiohttp / OpenAI는 httpx)
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 100))
+HTTP_POOL_PER_HOST = int(os.getenv("HTTP_POOL_PER_HOST", 10))
+HTTP_KEEPALIVE_SECONDS = float(os.getenv("HTTP_KEEPALIVE_SECONDS", 30))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 5))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", 20))
+HTTP_TOTAL_TIMEOUT = float(os.getenv("HTTP_TOTAL_TIMEOUT", 60))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", 2))
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", 0.5))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", 10))
+
+OPENAI_POOL_SIZE = int(os.getenv("OPENAI_POOL_SIZE", 20))
+OPENAI_READ_TIMEOUT = float(os.getenv("OPENAI_READ_TIMEOUT", 120))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", 2))
+# HTTP/2는 h2 패키지가 있을 때만 켤 수 있다 (aiohttp는 HTTP/1.1만 지원).
+OPENAI_HTTP2 = os.getenv("OPENAI_HTTP2", "auto").lower()
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+class PoolMetrics:
+    """커넥션 풀 사용 현황 (새 연결, 재사용, 풀 대기, 요청/오류 수)"""
+
+    def __init__(self):
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.pool_waits = 0
+        self.pool_wait_seconds = 0.0
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.openai_requests = 0
+        self._queued_at = {}
+
+    def trace_config(self):
+        trace = aiohttp.TraceConfig()
+
+        async def on_queued_start(session, context, params):
+            self._queued_at[id(context)] = asyncio.get_running_loop().time()
+
+        async def on_queued_end(session, context, params):
+            started = self._queued_at.pop(id(context), None)
+            if started is not None:
+                self.pool_waits += 1
+                self.pool_wait_seconds += asyncio.get_running_loop().time() - started
+
+        async def on_create_end(session, context, params):
+            self.connections_created += 1
+
+        async def on_reuse(session, context, params):
+            self.connections_reused += 1
+
+        async def on_request_end(session, context, params):
+            self.requests += 1
+
+        async def on_request_exception(session, context, params):
+            self.errors += 1
+
+        trace.on_connection_queued_start.append(on_queued_start)
+        trace.on_connection_queued_end.append(on_queued_end)
+        trace.on_connection_create_end.append(on_create_end)
+        trace.on_connection_reuseconn.append(on_reuse)
+        trace.on_request_end.append(on_request_end)
+        trace.on_request_exception.append(on_request_exception)
+        return trace
+
+    def snapshot(self, session=None):
+        data = {
+            "connections_created": self.connections_created,
+            "connections_reused": self.connections_reused,
+            "pool_waits": self.pool_waits,
+            "pool_wait_seconds": round(self.pool_wait_seconds, 3),
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "openai_requests": self.openai_requests,
+            "pool_size": HTTP_POOL_SIZE,
+            "pool_per_host": HTTP_POOL_PER_HOST,
+            "openai_http2": openai_http2_enabled(),
+        }
+        if session is not None and not session.closed:
+            connector = session.connector
+            data["open_connections"] = sum(len(conns) for conns in connector._conns.values()) + len(connector._acquired)
+            data["in_use"] = len(connector._acquired)
+        return data
+
+metrics = PoolMetrics()
+
+def default_timeout():
+    return aiohttp.ClientTimeout(
+        total=HTTP_TOTAL_TIMEOUT, sock_connect=HTTP_CONNECT_TIMEOUT, sock_read=HTTP_READ_TIMEOUT
+    )
+
+def create_session(headers=None):
+    """풀 크기/타임아웃/지표 수집이 설정된 aiohttp 세션 (이벤트 루프 안에서 호출)"""
+    connector = aiohttp.TCPConnector(
+        limit=HTTP_POOL_SIZE,
+        limit_per_host=HTTP_POOL_PER_HOST,
+        keepalive_timeout=HTTP_KEEPALIVE_SECONDS,
+        ttl_dns_cache=300,
+    )
+    return aiohttp.ClientSession(
+        headers=headers,
+        connector=connector,
+        timeout=default_timeout(),
+        trace_configs=[metrics.trace_config()],
+    )
+
+def parse_retry_after(value):
+    """Retry-After 헤더(초 또는 HTTP 날짜)를 초로 바꾼다. 없거나 해석할 수 없으면 None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=datetime.timezone.utc)
+    return max(0.0, (when - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+
+def backoff_delay(attempt, retry_after=None):
+    """지수 백오프 + full jitter. Retry-After가 있으면 그 값을 우선한다."""
+    seconds = parse_retry_after(retry_after)
+    if seconds is not None:
+        return min(seconds, HTTP_BACKOFF_MAX)
+    return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * 2 ** attempt))
+
+async def request(session, method, url, retries=HTTP_RETRIES, retry_statuses=RETRY_STATUSES, **kwargs):
+    """
+    재시도가 포함된 요청. 응답 본문을 미리 읽어 두므로 반환된 응답에서
+    바로 .status, await .json(), await .text()를 쓸 수 있다.
+    연결 오류/타임아웃과 retry_statuses 응답은 retries번까지 다시 시도한다.
+    """
+    for attempt in range(retries + 1):
+        try:
+            async with session.request(method, url, **kwargs) as response:
+                await response.read()
+            if response.status not in retry_statuses or attempt == retries:
+                return response
+            delay = backoff_delay(attempt, response.headers.get("Retry-After"))
+            logger.warning(f"HTTP {response.status}, {delay:.1f}초 후 재시도: {url}")
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            if attempt == retries:
+                raise
+            delay = backoff_delay(attempt)
+            logger.warning(f"HTTP 연결 오류 ({type(e).__name__}), {delay:.1f}초 후 재시도: {url}")
+        metrics.retries += 1
+        await asyncio.sleep(delay)
+
+def openai_http2_enabled():
+    if OPENAI_HTTP2 == "auto":
+        return HTTP2_AVAILABLE
+    return OPENAI_HTTP2 == "true" and HTTP2_AVAILABLE
+
+def create_openai_http_client():
+    """OpenAI 클라이언트용 httpx 클라이언트 (풀 크기, 타임아웃, 가능하면 HTTP/2)"""
+    import httpx
+    from openai import DefaultAsyncHttpxClient
+
+    async def count_request(request):
+        metrics.openai_requests += 1
+
+    if OPENAI_HTTP2 == "true" and not HTTP2_AVAILABLE:
+        logger.warning("h2 패키지가 없어 OpenAI 요청에 HTTP/1.1을 사용합니다.")
+    return DefaultAsyncHttpxClient(
+        http2=openai_http2_enabled(),
+        limits=httpx.Limits(
+            max_connections=OPENAI_POOL_SIZE,
+            max_keepalive_connections=OPENAI_POOL_SIZE,
+            keepalive_expiry=HTTP_KEEPALIVE_SECONDS,
+        ),
+        timeout=httpx.Timeout(OPENAI_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+        event_hooks={"request": [count_request]},
+    )
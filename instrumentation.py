@@ -0,0 +1,187 @@
+import time
+import bisect
+import logging
+import threading
+import contextvars
+
+logger = logging.getLogger(__name__)
+
+# 파이프라인 단계는 수 ms(캐시, 파싱)부터 수십 초(LLM)까지 걸린다.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _label_text(names, values, extra=None):
+    pairs = list(zip(names, values)) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_label_text(self.labels, key)} {_number(value)}")
+        return lines
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            if index < len(self.buckets):
+                state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, state in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, state):
+                    cumulative += count
+                    le = ("le", _number(float(bound)))
+                    lines.append(f"{self.name}_bucket{_label_text(self.labels, key, le)} {cumulative}")
+                lines.append(f"{self.name}_bucket{_label_text(self.labels, key, ('le', '+Inf'))} {state[-1]}")
+                lines.append(f"{self.name}_sum{_label_text(self.labels, key)} {_number(state[-2])}")
+                lines.append(f"{self.name}_count{_label_text(self.labels, key)} {state[-1]}")
+        return lines
+
+class Registry:
+    """
+    Prometheus 텍스트 형식으로 내보내는 최소한의 지표 모음.
+    collector는 렌더링 시점에 (이름, 설명, 값) 목록을 돌려주는 함수로, 다른 모듈의 현재 값을 게이지로 노출한다.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, help, labels=()):
+        metric = Counter(name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, help, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        self._collectors.append(collector)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            try:
+                for name, help, value in collector():
+                    lines.append(f"# HELP {name} {help}")
+                    lines.append(f"# TYPE {name} gauge")
+                    lines.append(f"{name} {_number(value)}")
+            except Exception as e:
+                logger.error(f"지표 수집 중 오류: {e}", exc_info=True)
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+STAGE_SECONDS = registry.histogram("boj_stage_seconds", "파이프라인 단계별 소요 시간(초)", ["stage"])
+STAGE_FAILURES = registry.counter("boj_stage_failures_total", "파이프라인 단계별 실패 수", ["stage"])
+LLM_CALLS = registry.counter("boj_llm_calls_total", "LLM 호출 수", ["kind"])
+LLM_TOKENS = registry.counter("boj_llm_tokens_total", "LLM 토큰 사용량", ["kind", "type"])
+CACHE_LOOKUPS = registry.counter("boj_cache_lookups_total", "캐시 조회 결과", ["cache", "result"])
+PROBLEMS = registry.counter("boj_problems_total", "문제 처리 결과", ["status"])
+DUPLICATE_SOURCES = registry.counter("boj_duplicate_sources_total", "중복(미러) 블로그 수", ["stage"])
+
+# 요청(문제) 하나의 단계별 소요 시간 기록. llm_calls처럼 process_problem에서 시작한다.
+timings = contextvars.ContextVar("timings", default=None)
+
+class span:
+    """
+    단계 하나의 소요 시간 측정 (with / async with 모두 사용 가능).
+    끝나면 boj_stage_seconds 히스토그램에 기록하고, 현재 요청의 timings 목록에도 남긴다.
+    예외가 나거나 fail()을 호출하면 실패로 센다 (취소는 실패로 세지 않음).
+    """
+
+    def __init__(self, stage, **detail):
+        self.stage = stage
+        self.detail = detail
+        self.failed = False
+        self._started = None
+
+    def fail(self):
+        self.failed = True
+
+    def __enter__(self):
+        self._started = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.monotonic() - self._started
+        cancelled = exc_type is not None and exc_type.__name__ == "CancelledError"
+        failed = self.failed or (exc_type is not None and not cancelled)
+        STAGE_SECONDS.observe(elapsed, stage=self.stage)
+        if failed:
+            STAGE_FAILURES.inc(stage=self.stage)
+        entries = timings.get()
+        if entries is not None:
+            entry = {"stage": self.stage, "elapsed": round(elapsed, 4), "ok": not failed and not cancelled}
+            entry.update(self.detail)
+            entries.append(entry)
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return self.__exit__(exc_type, exc, tb)
+
+def cache_lookup(cache, hit):
+    CACHE_LOOKUPS.inc(cache=cache, result="hit" if hit else "miss")
+
+def record_llm_tokens(kind, prompt_tokens, completion_tokens):
+    LLM_CALLS.inc(kind=kind)
+    LLM_TOKENS.inc(prompt_tokens or 0, kind=kind, type="prompt")
+    LLM_TOKENS.inc(completion_tokens or 0, kind=kind, type="completion")
+
+def summarize_timings(entries, total=None):
+    """요청 하나의 단계별 합계와 개별 구간 목록"""
+    by_stage = {}
+    for entry in entries:
+        by_stage[entry["stage"]] = round(by_stage.get(entry["stage"], 0) + entry["elapsed"], 4)
+    summary = {"by_stage": by_stage, "spans": entries}
+    if total is not None:
+        summary["total"] = round(total, 4)
+    return summary
@@ -0,0 +1,516 @@
+import json
+import time
+import uuid
+import random
+import sqlite3
+import asyncio
+import logging
+import datetime
+import threading
+
+logger = logging.getLogger(__name__)
+
+# 실행 중 임대가 만료되는 일이 max_attempts번 반복된 작업(프로세스를 죽이는 작업 등)에 남기는 오류
+LEASE_EXHAUSTED_ERROR = "작업 임대가 반복해서 만료되어 재시도를 중단했습니다."
+
+def _new_job(problem_id, payload, max_attempts, now):
+    return {
+        "id": uuid.uuid4().hex,
+        "problem_id": problem_id,
+        "payload": payload or {},
+        "status": "queued",
+        "attempts": 0,
+        "max_attempts": max_attempts,
+        "available_at": now,
+        "lease_owner": None,
+        "lease_expires_at": None,
+        "result": None,
+        "error": None,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+def public_job(job):
+    """API 응답용 작업 정보 (임대 정보 제외)"""
+    if job is None:
+        return None
+    return {key: job[key] for key in (
+        "id", "problem_id", "status", "attempts", "max_attempts",
+        "result", "error", "created_at", "updated_at"
+    )}
+
+class SQLiteJobQueue:
+    """
+    로컬 SQLite 작업 큐 (테스트/단일 인스턴스용).
+    queued → running(임대) → succeeded/failed 순으로 진행하며,
+    임대가 만료된 running 작업은 다시 가져갈 수 있다.
+    """
+
+    def __init__(self, path, max_attempts=3):
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, problem_id TEXT NOT NULL, payload TEXT, status TEXT NOT NULL, "
+                "attempts INTEGER NOT NULL, max_attempts INTEGER NOT NULL, available_at REAL NOT NULL, "
+                "lease_owner TEXT, lease_expires_at REAL, result TEXT, error TEXT, "
+                "created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, available_at)"
+            )
+
+    @staticmethod
+    def _row(row):
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"] or "{}")
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def enqueue(self, problem_id, payload=None):
+        job = _new_job(problem_id, payload, self.max_attempts, time.time())
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (id, problem_id, payload, status, attempts, max_attempts, "
+                "available_at, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job["id"], problem_id, json.dumps(job["payload"]), "queued", 0,
+                 self.max_attempts, job["available_at"], job["created_at"], job["updated_at"])
+            )
+        return job["id"]
+
+    def enqueue_unique(self, problem_id, payload=None):
+        """같은 문제의 대기/실행 중인 작업이 없을 때만 추가한다. (job_id, 새로 추가했는지)"""
+        job = _new_job(problem_id, payload, self.max_attempts, time.time())
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT id FROM jobs WHERE problem_id = ? AND status IN ('queued', 'running') "
+                "ORDER BY created_at LIMIT 1", (problem_id,)
+            ).fetchone()
+            if row is not None:
+                return row["id"], False
+            self._conn.execute(
+                "INSERT INTO jobs (id, problem_id, payload, status, attempts, max_attempts, "
+                "available_at, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job["id"], problem_id, json.dumps(job["payload"]), "queued", 0,
+                 self.max_attempts, job["available_at"], job["created_at"], job["updated_at"])
+            )
+        return job["id"], True
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row(row)
+
+    def find_active(self, problem_id):
+        """같은 문제의 대기/실행 중인 작업 (없으면 None)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM jobs WHERE problem_id = ? AND status IN ('queued', 'running') "
+                "ORDER BY created_at LIMIT 1", (problem_id,)
+            ).fetchone()
+        return self._row(row)
+
+    def claim(self, worker_id, lease_seconds):
+        """
+        실행 가능한 작업 하나를 임대한다 (대기 중이거나 임대가 만료된 작업).
+        임대가 만료된 작업이 이미 max_attempts번 시도됐으면 다시 실행하지 않고 failed로 바꾼다.
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            while True:
+                row = self._conn.execute(
+                    "SELECT * FROM jobs WHERE (status = 'queued' AND available_at <= ?) "
+                    "OR (status = 'running' AND lease_expires_at < ?) "
+                    "ORDER BY available_at LIMIT 1", (now, now)
+                ).fetchone()
+                if row is None:
+                    return None
+                if row["status"] != "running":
+                    break
+                if row["attempts"] < row["max_attempts"]:
+                    logger.warning(f"임대가 만료된 작업 회수: {row['id']} (문제 {row['problem_id']})")
+                    break
+                logger.error(f"임대가 만료된 작업의 시도 횟수 초과: {row['id']} (문제 {row['problem_id']})")
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = ?, lease_owner = NULL, "
+                    "lease_expires_at = NULL, updated_at = ? WHERE id = ?",
+                    (LEASE_EXHAUSTED_ERROR, now, row["id"])
+                )
+            self._conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, lease_owner = ?, "
+                "lease_expires_at = ?, updated_at = ? WHERE id = ?",
+                (worker_id, now + lease_seconds, now, row["id"])
+            )
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+        return self._row(row)
+
+    def heartbeat(self, job_id, worker_id, lease_seconds):
+        """임대 연장. 이미 다른 워커가 가져간 경우 False."""
+        now = time.time()
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET lease_expires_at = ?, updated_at = ? "
+                "WHERE id = ? AND lease_owner = ? AND status = 'running'",
+                (now + lease_seconds, now, job_id, worker_id)
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id, worker_id, result, status="succeeded", error=None):
+        now = time.time()
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, lease_owner = NULL, "
+                "lease_expires_at = NULL, updated_at = ? WHERE id = ? AND lease_owner = ?",
+                (status, json.dumps(result, ensure_ascii=False), error, now, job_id, worker_id)
+            )
+        return cursor.rowcount == 1
+
+    def fail(self, job_id, worker_id, error, retry_delay):
+        """실패 처리: 시도 횟수가 남아 있으면 retry_delay 후 다시 대기열로, 아니면 failed."""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE id = ? AND lease_owner = ?",
+                (job_id, worker_id)
+            ).fetchone()
+            if row is None:
+                return None
+            status = "queued" if row["attempts"] < row["max_attempts"] else "failed"
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, available_at = ?, lease_owner = NULL, "
+                "lease_expires_at = NULL, updated_at = ? WHERE id = ?",
+                (status, error, now + retry_delay, now, job_id)
+            )
+        return status
+
+class FirestoreJobQueue:
+    """
+    Firestore 작업 큐 (운영용, 여러 인스턴스가 공유).
+    작업 임대는 트랜잭션으로 처리한다.
+    문제별 활성 작업은 {collection}_active/{problem_id} 문서로 가리켜, 같은 문제의 작업이 두 번 들어가지 않게 한다.
+    (status, available_at) / (status, lease_expires_at) 복합 색인이 필요하다.
+    """
+
+    def __init__(self, db, collection="jobs", max_attempts=3):
+        from google.cloud import firestore as gcloud_firestore
+
+        self.db = db
+        self.collection = db.collection(collection)
+        self.active = db.collection(f"{collection}_active")
+        self.max_attempts = max_attempts
+        self._transactional = gcloud_firestore.transactional
+
+    @staticmethod
+    def _ts(value):
+        return datetime.datetime.fromtimestamp(value, datetime.timezone.utc)
+
+    @staticmethod
+    def _from_doc(doc):
+        if not doc.exists:
+            return None
+        job = doc.to_dict()
+        for key in ("available_at", "lease_expires_at", "created_at", "updated_at"):
+            if isinstance(job.get(key), datetime.datetime):
+                job[key] = job[key].timestamp()
+        return job
+
+    def _job_data(self, job):
+        data = dict(job)
+        for key in ("available_at", "created_at", "updated_at"):
+            data[key] = self._ts(job[key])
+        return data
+
+    def enqueue(self, problem_id, payload=None):
+        job = _new_job(problem_id, payload, self.max_attempts, time.time())
+        self.collection.document(job["id"]).set(self._job_data(job))
+        return job["id"]
+
+    def enqueue_unique(self, problem_id, payload=None):
+        """
+        같은 문제의 대기/실행 중인 작업이 없을 때만 추가한다. (job_id, 새로 추가했는지)
+        활성 작업 문서를 읽고 쓰는 것을 한 트랜잭션으로 처리하므로, 동시에 요청해도 하나만 추가된다.
+        """
+        active_ref = self.active.document(str(problem_id))
+
+        @self._transactional
+        def add(transaction):
+            active = active_ref.get(transaction=transaction)
+            job_id = (active.to_dict() or {}).get("job_id") if active.exists else None
+            if job_id:
+                job = self._from_doc(self.collection.document(job_id).get(transaction=transaction))
+                if job is not None and job["status"] in ("queued", "running"):
+                    return job_id, False
+            job = _new_job(problem_id, payload, self.max_attempts, time.time())
+            transaction.set(self.collection.document(job["id"]), self._job_data(job))
+            transaction.set(active_ref, {"job_id": job["id"], "updated_at": self._ts(job["created_at"])})
+            return job["id"], True
+
+        return add(self.db.transaction())
+
+    def get(self, job_id):
+        return self._from_doc(self.collection.document(job_id).get())
+
+    def find_active(self, problem_id):
+        docs = list(
+            self.collection.where("problem_id", "==", problem_id)
+            .where("status", "in", ["queued", "running"]).limit(1).stream()
+        )
+        return self._from_doc(docs[0]) if docs else None
+
+    def claim(self, worker_id, lease_seconds):
+        now = self._ts(time.time())
+        candidates = list(
+            self.collection.where("status", "==", "queued").where("available_at", "<=", now)
+            .order_by("available_at").limit(5).stream()
+        ) + list(
+            self.collection.where("status", "==", "running").where("lease_expires_at", "<", now)
+            .limit(5).stream()
+        )
+        for candidate in candidates:
+            job = self._try_lease(candidate.reference, worker_id, lease_seconds)
+            if job is not None:
+                return job
+        return None
+
+    def _try_lease(self, ref, worker_id, lease_seconds):
+        @self._transactional
+        def lease(transaction):
+            snapshot = ref.get(transaction=transaction)
+            job = self._from_doc(snapshot)
+            now = time.time()
+            if job is None:
+                return None
+            claimable = (
+                (job["status"] == "queued" and job["available_at"] <= now)
+                or (job["status"] == "running" and (job.get("lease_expires_at") or 0) < now)
+            )
+            if not claimable:
+                return None
+            if job["status"] == "running":
+                if job["attempts"] >= job["max_attempts"]:
+                    logger.error(f"임대가 만료된 작업의 시도 횟수 초과: {job['id']} (문제 {job['problem_id']})")
+                    transaction.update(ref, {
+                        "status": "failed",
+                        "error": LEASE_EXHAUSTED_ERROR,
+                        "lease_owner": None,
+                        "lease_expires_at": None,
+                        "updated_at": self._ts(now),
+                    })
+                    return None
+                logger.warning(f"임대가 만료된 작업 회수: {job['id']} (문제 {job['problem_id']})")
+            update = {
+                "status": "running",
+                "attempts": job["attempts"] + 1,
+                "lease_owner": worker_id,
+                "lease_expires_at": self._ts(now + lease_seconds),
+                "updated_at": self._ts(now),
+            }
+            transaction.update(ref, update)
+            job.update(update, lease_expires_at=now + lease_seconds, updated_at=now)
+            return job
+
+        return lease(self.db.transaction())
+
+    def heartbeat(self, job_id, worker_id, lease_seconds):
+        ref = self.collection.document(job_id)
+
+        @self._transactional
+        def extend(transaction):
+            job = self._from_doc(ref.get(transaction=transaction))
+            if job is None or job.get("lease_owner") != worker_id or job["status"] != "running":
+                return False
+            now = time.time()
+            transaction.update(ref, {
+                "lease_expires_at": self._ts(now + lease_seconds),
+                "updated_at": self._ts(now),
+            })
+            return True
+
+        return extend(self.db.transaction())
+
+    def complete(self, job_id, worker_id, result, status="succeeded", error=None):
+        """결과 기록. 임대를 잃어 다른 워커가 가져간 작업이면 쓰지 않고 False."""
+        ref = self.collection.document(job_id)
+
+        @self._transactional
+        def finish(transaction):
+            job = self._from_doc(ref.get(transaction=transaction))
+            if job is None or job.get("lease_owner") != worker_id:
+                return False
+            transaction.update(ref, {
+                "status": status,
+                "result": result,
+                "error": error,
+                "lease_owner": None,
+                "lease_expires_at": None,
+                "updated_at": self._ts(time.time()),
+            })
+            return True
+
+        return finish(self.db.transaction())
+
+    def fail(self, job_id, worker_id, error, retry_delay):
+        """실패 처리 (소유 확인과 쓰기를 한 트랜잭션으로). 임대를 잃은 작업이면 None."""
+        ref = self.collection.document(job_id)
+
+        @self._transactional
+        def mark(transaction):
+            job = self._from_doc(ref.get(transaction=transaction))
+            if job is None or job.get("lease_owner") != worker_id:
+                return None
+            now = time.time()
+            status = "queued" if job["attempts"] < job["max_attempts"] else "failed"
+            transaction.update(ref, {
+                "status": status,
+                "error": error,
+                "available_at": self._ts(now + retry_delay),
+                "lease_owner": None,
+                "lease_expires_at": None,
+                "updated_at": self._ts(now),
+            })
+            return status
+
+        return mark(self.db.transaction())
+
+class WorkerPool:
+    """
+    작업 큐를 소비하는 비동기 워커 풀 (전역 이벤트 루프에서 실행).
+    - 작업 실행 중에는 heartbeat_interval마다 임대를 연장하고 (임대를 잃으면 실행을 취소)
+    - 예외가 나면 지수 백오프(+지터) 후 재시도하며
+    - handler 결과에 error가 있으면 재시도 없이 failed로 기록한다.
+    큐 접근은 블로킹 I/O이므로 스레드에서 수행한다.
+    """
+
+    def __init__(self, queue, handler, concurrency=4, lease_seconds=120, heartbeat_interval=30,
+                 poll_interval=2.0, backoff_base=5.0, backoff_max=300.0, on_heartbeat=None,
+                 maintenance=None, maintenance_interval=300, max_heartbeat_failures=3):
+        self.queue = queue
+        self.handler = handler
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.heartbeat_interval = heartbeat_interval
+        self.poll_interval = poll_interval
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.on_heartbeat = on_heartbeat
+        self.maintenance = maintenance
+        self.maintenance_interval = maintenance_interval
+        self.max_heartbeat_failures = max_heartbeat_failures
+        self.worker_id = f"worker-{uuid.uuid4().hex[:8]}"
+        self._tasks = []
+        self._wakeup = None
+
+    def start(self):
+        """이벤트 루프 스레드 안에서 호출해야 한다."""
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.ensure_future(self._worker(i)) for i in range(self.concurrency)]
+        if self.maintenance is not None:
+            self._tasks.append(asyncio.ensure_future(self._maintenance_loop()))
+        logger.info(f"작업 워커 {self.concurrency}개 시작 ({self.worker_id})")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self):
+        """새 작업이 들어왔음을 알려 대기 중인 워커를 깨운다 (이벤트 루프 안에서 호출)."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _backoff(self, attempts):
+        delay = min(self.backoff_max, self.backoff_base * (2 ** max(0, attempts - 1)))
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _worker(self, index):
+        worker_id = f"{self.worker_id}-{index}"
+        while True:
+            try:
+                job = await asyncio.to_thread(self.queue.claim, worker_id, self.lease_seconds)
+            except Exception as e:
+                logger.error(f"작업 임대 중 오류: {e}", exc_info=True)
+                job = None
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job, worker_id)
+
+    async def _heartbeat(self, job, worker_id, task):
+        """
+        임대를 연장한다. 임대를 잃었거나 연장이 max_heartbeat_failures번 연속 실패하면
+        (곧 다른 워커가 가져갈 작업이므로) 실행 중인 task를 취소하고 끝낸다.
+        """
+        failures = 0
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                owned = await asyncio.to_thread(self.queue.heartbeat, job["id"], worker_id, self.lease_seconds)
+            except Exception as e:
+                failures += 1
+                logger.error(f"작업 {job['id']} 임대 연장 실패 ({failures}/{self.max_heartbeat_failures}): {e}")
+                if failures < self.max_heartbeat_failures:
+                    continue
+                logger.warning(f"작업 {job['id']}의 임대를 연장하지 못해 실행을 중단합니다.")
+                task.cancel()
+                return
+            if not owned:
+                logger.warning(f"작업 {job['id']}의 임대를 잃어 실행을 중단합니다.")
+                task.cancel()
+                return
+            failures = 0
+            if self.on_heartbeat is not None:
+                try:
+                    await self.on_heartbeat(job)
+                except Exception as e:
+                    logger.error(f"작업 {job['id']} heartbeat 처리 중 오류: {e}")
+
+    async def _run(self, job, worker_id):
+        logger.info(f"작업 시작: {job['id']} (문제 {job['problem_id']}, {job['attempts']}회차)")
+        task = asyncio.ensure_future(self.handler(job))
+        heartbeat = asyncio.ensure_future(self._heartbeat(job, worker_id, task))
+        try:
+            result = await task
+        except asyncio.CancelledError:
+            if not heartbeat.done():
+                raise
+            # heartbeat가 취소한 경우: 큐에는 쓰지 않고 임대가 만료되도록 둔다.
+            return
+        except Exception as e:
+            delay = self._backoff(job["attempts"])
+            logger.error(f"작업 {job['id']} 실패: {e}", exc_info=True)
+            status = await asyncio.to_thread(self.queue.fail, job["id"], worker_id, str(e), delay)
+            if status == "queued":
+                logger.info(f"  - {delay:.0f}초 후 재시도")
+            return
+        finally:
+            heartbeat.cancel()
+
+        status = "failed" if result.get("error") else "succeeded"
+        recorded = await asyncio.to_thread(
+            self.queue.complete, job["id"], worker_id, result, status, result.get("error")
+        )
+        if not recorded:
+            logger.warning(f"작업 {job['id']}의 임대를 잃어 결과를 기록하지 않았습니다.")
+            return
+        logger.info(f"작업 종료: {job['id']} ({status})")
+
+    async def _maintenance_loop(self):
+        while True:
+            try:
+                await self.maintenance()
+            except Exception as e:
+                logger.error(f"작업 큐 정리 중 오류: {e}", exc_info=True)
+            await asyncio.sleep(self.maintenance_interval)
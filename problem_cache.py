@@ -0,0 +1,141 @@
+import json
+import hashlib
+import logging
+import datetime
+import threading
+
+from cache import LRUCache, content_hash
+
+logger = logging.getLogger(__name__)
+
+def completed_payload(problem_id, problem_data):
+    """완료된 문제 문서에서 /get-problem-code 응답 본문을 만든다. 완료되지 않았거나 코드가 없으면 None."""
+    if not problem_data or problem_data.get('status') != 'completed' or not problem_data.get('code'):
+        return None
+    return {
+        "status": "success",
+        "problem_id": problem_id,
+        "code": problem_data.get('code', ''),
+        "github_upload": problem_data.get('github_upload', '실패 또는 미수행'),
+        "github_file": problem_data.get('github_file'),
+        "sources": problem_data.get('sources', []),
+    }
+
+def source_fingerprint(urls, results):
+    """
+    출처 URL과 각 본문의 해시로 만든 지문. 지문이 같으면 통합 코드를 다시 만들 필요가 없다.
+    본문 해시가 없는 결과(예전 캐시 항목)는 추출한 코드와 요약으로 대신한다.
+    """
+    parts = []
+    for url, result in zip(urls, results):
+        if not result:
+            continue
+        body_hash = result.get("body_hash") or content_hash(f"{result.get('code', '')}\n{result.get('summary', '')}")
+        parts.append(f"{url}\n{body_hash}")
+    return hashlib.sha256("\n\n".join(parts).encode("utf-8")).hexdigest()
+
+def payload_etag(payload):
+    body = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()[:32]
+
+class ProblemCodeCache:
+    """
+    완료된 문제 코드의 읽기 캐시 (read-through).
+    Firestore on_snapshot 리스너를 켜면 리스너 시작 이후 완료된 문서의 추가/변경/삭제를 받아 캐시를 갱신한다.
+    (이전에 완료된 문서는 처음 조회할 때 읽으므로, 시작할 때 모든 코드를 받지 않는다.)
+    리스너가 변경을 놓치는 경우에 대비해 listen_ttl이 지나면 다시 읽고,
+    리스너가 오류로 멈추면 TTL(ttl) 모드로 돌아간다. 리스너가 꺼져 있으면 ttl이 지나야 다시 Firestore에서 읽는다.
+    값은 (응답 본문, ETag) 튜플.
+    """
+
+    def __init__(self, db, max_entries=2048, ttl=300, listen=False, listen_ttl=3600):
+        self.db = db
+        self.listen = listen
+        self.ttl = ttl
+        self._cache = LRUCache(max_entries=max_entries, ttl=listen_ttl if listen else ttl)
+        self._watch = None
+        self._failed = False
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def start(self):
+        """리스너 시작 (여러 번 호출해도 한 번만). 시작하지 못하면 TTL 모드로 동작한다."""
+        if not self.listen:
+            return
+        try:
+            with self._lock:
+                if self._watch is not None or self._failed:
+                    return
+                since = datetime.datetime.now(datetime.timezone.utc)
+                query = self.db.collection('problems').where('completed_at', '>=', since)
+                self._watch = query.on_snapshot(self._on_snapshot)
+            logger.info("문제 코드 캐시 리스너 시작")
+        except Exception as e:
+            self._fall_back(e)
+
+    def stop(self):
+        with self._lock:
+            if self._watch is not None:
+                self._watch.unsubscribe()
+                self._watch = None
+
+    def _listening(self):
+        return self._watch is not None and not self._failed and getattr(self._watch, "is_active", True)
+
+    def _fall_back(self, reason):
+        """리스너를 믿을 수 없게 되면 캐시를 비우고 TTL 모드로 돌아간다."""
+        with self._lock:
+            if self._failed:
+                return
+            self._failed = True
+            self._cache.ttl = self.ttl
+            self._cache.clear()
+        logger.error(f"문제 코드 캐시 리스너 중단, TTL({self.ttl}초) 모드로 전환: {reason}")
+
+    def _on_snapshot(self, docs, changes, read_time):
+        try:
+            for change in changes:
+                doc = change.document
+                # 쿼리에서 빠진 문서(REMOVED)는 삭제된 것
+                if change.type.name == 'REMOVED':
+                    self._cache.delete(doc.id)
+                    continue
+                payload = completed_payload(doc.id, doc.to_dict())
+                if payload is None:
+                    self._cache.delete(doc.id)
+                else:
+                    self._cache.set(doc.id, (payload, payload_etag(payload)))
+        except Exception as e:
+            self._fall_back(e)
+
+    def get(self, problem_id):
+        if self._watch is not None and not self._failed and not self._listening():
+            self._fall_back("리스너가 더 이상 동작하지 않습니다.")
+        entry = self._cache.get(problem_id)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def put(self, problem_id, problem_data):
+        """Firestore에서 읽은 문서로 캐시를 채운다. 캐시할 수 있으면 (본문, ETag), 아니면 None."""
+        payload = completed_payload(problem_id, problem_data)
+        if payload is None:
+            self._cache.delete(problem_id)
+            return None
+        entry = (payload, payload_etag(payload))
+        self._cache.set(problem_id, entry)
+        return entry
+
+    def invalidate(self, problem_id):
+        self._cache.delete(problem_id)
+
+    def stats(self):
+        return {
+            "entries": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "listening": self._listening(),
+        }
@@ -1,18 +1,34 @@
 import os
+import json
+import time
+import queue
 import asyncio
-import concurrent.futures
-import base64
+import atexit
+import threading
+import contextvars
 import logging
-import urllib.parse
-import requests
-from bs4 import BeautifulSoup
+import aiohttp
 from dotenv import load_dotenv
-from openai import OpenAI
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
-import firebase_admin
-from firebase_admin import credentials
-from firebase_admin import firestore
+from cache import LRUCache, SQLiteCache, FirestoreCache, TieredCache, DEFAULT_CACHE_DB_PATH, content_hash
+from search_quota import SearchQuota, SearchQuotaExceeded
+from scheduler import StageLimits, BatchScheduler
+import blog_extractor
+import prompt_builder
+from blog_extractor import extract_article, fetch_url_for
+from prompt_builder import build_summary_prompt, build_integration_prompt, build_problem_context
+from code_check import find_complete_solution
+from verifier import JavaVerifier
+from problem_store import ProblemStore, ProblemCrawler, MISSING
+from job_queue import SQLiteJobQueue, FirestoreJobQueue, WorkerPool, public_job
+from single_flight import SingleFlight, FirestoreLease
+from problem_cache import ProblemCodeCache, source_fingerprint
+from code_dedup import collapse_duplicates, code_fingerprint, shape_fingerprint
+import http_client
+from instrumentation import registry, span, timings, cache_lookup, record_llm_tokens, summarize_timings, PROBLEMS, DUPLICATE_SOURCES
+from github_uploader import GitHubClient, GitHubBatchUploader, UPLOADED, UNCHANGED, FAILED, git_blob_sha
+from firestore_writer import FirestoreWriteBuffer, commit_in_batches
 
 # Flask 애플리케이션 초기화
 app = Flask(__name__)
@@ -28,37 +44,550 @@ load_dotenv()  # 로컬 개발 환경에서만 필요
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Firebase 초기화
-# Cloud Run에서는 기본 인증 사용 (별도 인증 파일 불필요)
-try:
-    firebase_admin.initialize_app()
-    db = firestore.client()
-    logger.info("Firebase 연결 성공")
-    FIREBASE_ENABLED = True
-except Exception as e:
-    logger.error(f"Firebase 초기화 오류: {e}", exc_info=True)
-    FIREBASE_ENABLED = False
-
-# 최적화를 위한 전역 HTTP 세션(Session) 생성
-session = requests.Session()
-session.headers.update({
+# Firebase / OpenAI 클라이언트는 import 시점이 아니라 처음 사용할 때 초기화한다.
+# (인증 정보 조회와 무거운 라이브러리 import가 콜드 스타트의 /health 응답을 막지 않도록)
+_firebase_lock = threading.Lock()
+_firebase_db = None
+_firebase_ready = None  # None: 아직 초기화 전, True/False: 초기화 결과
+
+def get_db():
+    """Firestore 클라이언트 (첫 호출 때 Firebase 초기화, 실패하면 None)"""
+    global _firebase_db, _firebase_ready
+    if _firebase_ready is None:
+        with _firebase_lock:
+            if _firebase_ready is None:
+                # Cloud Run에서는 기본 인증 사용 (별도 인증 파일 불필요)
+                try:
+                    import firebase_admin
+                    from firebase_admin import firestore
+                    try:
+                        firebase_admin.get_app()
+                    except ValueError:
+                        firebase_admin.initialize_app()
+                    _firebase_db = firestore.client()
+                    logger.info("Firebase 연결 성공")
+                    _firebase_ready = True
+                except Exception as e:
+                    logger.error(f"Firebase 초기화 오류: {e}", exc_info=True)
+                    _firebase_ready = False
+    return _firebase_db
+
+def firebase_enabled():
+    return get_db() is not None
+
+async def firebase_enabled_async():
+    """이벤트 루프 안에서 쓰는 firebase_enabled (초기화가 필요하면 스레드에서 수행)"""
+    if _firebase_ready is None:
+        return await asyncio.to_thread(firebase_enabled)
+    return _firebase_ready
+
+def server_timestamp():
+    from firebase_admin import firestore
+    return firestore.SERVER_TIMESTAMP
+
+class _LazyFirestore:
+    """import 시점에 만들어지는 캐시에 넘기는 대리 객체. 실제 사용할 때 Firestore를 초기화한다."""
+
+    def __getattr__(self, name):
+        db = get_db()
+        if db is None:
+            raise RuntimeError("Firebase가 비활성화되어 있습니다.")
+        return getattr(db, name)
+
+lazy_db = _LazyFirestore()
+
+# 공통 HTTP 헤더
+HTTP_HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
                   "AppleWebKit/537.36 (KHTML, like Gecko) "
                   "Chrome/91.0.4472.124 Safari/537.36",
     "Accept-Language": "ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7"
+}
+
+# OpenAI API 비동기 클라이언트 (지연 생성)
+_openai_client = None
+_openai_lock = threading.Lock()
+
+def get_openai_client():
+    global _openai_client
+    if _openai_client is None:
+        with _openai_lock:
+            if _openai_client is None:
+                from openai import AsyncOpenAI
+                _openai_client = AsyncOpenAI(
+                    api_key=os.environ.get("OPENAI_API_KEY"),
+                    max_retries=http_client.OPENAI_MAX_RETRIES,
+                    http_client=http_client.create_openai_http_client(),
+                )
+    return _openai_client
+
+# 블로그 추출/요약 결과 캐시 설정
+# URL 단위(코드 + 요약)와 본문 해시 단위(요약) 두 가지 키로 저장한다.
+BLOG_CACHE_TTL = int(os.getenv("BLOG_CACHE_TTL", 7 * 24 * 3600))
+BLOG_CACHE_MEMORY_SIZE = int(os.getenv("BLOG_CACHE_MEMORY_SIZE", 512))
+BLOG_CACHE_MAX_ROWS = int(os.getenv("BLOG_CACHE_MAX_ROWS", 20000))
+BLOG_CACHE_FIRESTORE = os.getenv("BLOG_CACHE_FIRESTORE", "false").lower() == "true"
+
+def _build_blog_cache():
+    stores = []
+    try:
+        stores.append(SQLiteCache(DEFAULT_CACHE_DB_PATH, table="blog_cache",
+                                  max_rows=BLOG_CACHE_MAX_ROWS, ttl=BLOG_CACHE_TTL))
+    except Exception as e:
+        logger.warning(f"로컬 블로그 캐시를 열 수 없습니다: {e}")
+    if BLOG_CACHE_FIRESTORE:
+        stores.append(FirestoreCache(lazy_db, collection="blog_cache", ttl=BLOG_CACHE_TTL))
+    return TieredCache(LRUCache(BLOG_CACHE_MEMORY_SIZE, ttl=BLOG_CACHE_TTL), stores)
+
+blog_cache = _build_blog_cache()
+
+# 검색 결과 캐시 및 할당량 설정
+# 검색 결과는 (검색어 템플릿, problem_id) 단위로 저장한다.
+# velog/네이버 블로그/Gist 등도 추출할 수 있으므로 검색 범위는 환경 변수로 넓힐 수 있다.
+SEARCH_QUERY_TEMPLATE = os.getenv("SEARCH_QUERY_TEMPLATE", "site:tistory.com 백준 {problem_id} 자바 풀이")
+SEARCH_API_URL = os.getenv("SEARCH_API_URL", "https://www.googleapis.com/customsearch/v1")
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", 7 * 24 * 3600))
+SEARCH_EMPTY_CACHE_TTL = int(os.getenv("SEARCH_EMPTY_CACHE_TTL", 24 * 3600))
+SEARCH_DAILY_QUOTA = int(os.getenv("SEARCH_DAILY_QUOTA", 100))
+SEARCH_PER_MINUTE = int(os.getenv("SEARCH_PER_MINUTE", 100))
+# 일괄 프리페치는 이만큼의 할당량을 /generate 요청용으로 남겨둔다.
+SEARCH_PREFETCH_RESERVE = int(os.getenv("SEARCH_PREFETCH_RESERVE", 10))
+
+def _build_search_cache():
+    stores = []
+    try:
+        stores.append(SQLiteCache(DEFAULT_CACHE_DB_PATH, table="search_cache", ttl=SEARCH_CACHE_TTL))
+    except Exception as e:
+        logger.warning(f"로컬 검색 캐시를 열 수 없습니다: {e}")
+    if BLOG_CACHE_FIRESTORE:
+        stores.append(FirestoreCache(lazy_db, collection="search_cache", ttl=SEARCH_CACHE_TTL))
+    return TieredCache(LRUCache(1024, ttl=SEARCH_CACHE_TTL), stores)
+
+search_cache = _build_search_cache()
+search_quota = SearchQuota(SEARCH_DAILY_QUOTA, SEARCH_PER_MINUTE,
+                           store=search_cache.stores[0] if search_cache.stores else None)
+
+# LLM 호출당 입력 토큰 예산
+SUMMARY_TOKEN_BUDGET = int(os.getenv("SUMMARY_TOKEN_BUDGET", 3000))
+INTEGRATION_TOKEN_BUDGET = int(os.getenv("INTEGRATION_TOKEN_BUDGET", 12000))
+
+# 블로그에서 완성된 풀이(Main 클래스 + main 메서드 + 괄호 짝, javac가 있으면 컴파일)를
+# 찾은 경우 요약 호출을 건너뛰고, 선택적으로 통합 호출도 건너뛴다.
+SKIP_SUMMARY_FOR_COMPLETE = os.getenv("SKIP_SUMMARY_FOR_COMPLETE", "true").lower() == "true"
+SKIP_INTEGRATION_FOR_COMPLETE = os.getenv("SKIP_INTEGRATION_FOR_COMPLETE", "false").lower() == "true"
+COMPLETE_CHECK_JAVAC = os.getenv("COMPLETE_CHECK_JAVAC", "true").lower() == "true"
+
+# 투기적 과다 요청 모드: 검색 결과 후보를 더 많이 동시에 가져오고
+# 쓸 만한 결과가 목표 개수만큼 모이면 나머지 요청은 취소한다.
+SPECULATIVE_FETCH = os.getenv("SPECULATIVE_FETCH", "false").lower() == "true"
+SPECULATIVE_CANDIDATES = int(os.getenv("SPECULATIVE_CANDIDATES", 10))
+SPECULATIVE_TARGET = int(os.getenv("SPECULATIVE_TARGET", 3))
+# 블로그 요청 1건의 제한 시간 (초). 재시도하지 않으므로 느린 호스트 하나가 이 시간 넘게 문제를 붙잡지 않는다.
+BLOG_FETCH_TIMEOUT = float(os.getenv("BLOG_FETCH_TIMEOUT", 10))
+
+# 같은(거의 같은) 코드를 올린 블로그는 통합 프롬프트에 한 번만 넣고, 미러로 기록해 다음 검색부터 가져오지 않는다.
+CODE_DEDUP = os.getenv("CODE_DEDUP", "true").lower() == "true"
+CODE_DEDUP_THRESHOLD = float(os.getenv("CODE_DEDUP_THRESHOLD", 0.8))
+SEARCH_MAX_RESULTS = 10  # Custom Search API 한 번에 받을 수 있는 최대 결과 수
+
+# 업로드 전 검증: 통합 코드와 블로그의 완성 풀이를 javac로 컴파일하고 문제의 예제 입출력으로 실행해
+# 통과하는 첫 후보(통합 코드 우선)를 쓴다. samples(기본) | compile(컴파일만) | off
+# javac/java가 없으면 검증을 건너뛴다. VERIFY_REQUIRED이면 통과한 후보가 없을 때 업로드하지 않고 실패 처리한다.
+# 블로그/LLM 코드는 신뢰할 수 없으므로 네트워크 네임스페이스를 분리해 실행하고, 분리할 수 없는 환경이면
+# 검증하지 않는다 (verification.status = unavailable). VERIFY_ALLOW_NETWORK=true는 로컬 개발용이며 운영에서 켜면 안 된다.
+# 배포 이미지(Dockerfile)에는 JDK가 들어 있고, 네트워크 네임스페이스를 만들 수 없는 실행 환경이면 unavailable로 보고된다.
+# 완성 코드 판단의 javac도 검증과 같은 동시 실행 제한(VERIFY_WORKERS)을 쓴다.
+VERIFY_MODE = os.getenv("VERIFY_MODE", "samples").lower()
+VERIFY_REQUIRED = os.getenv("VERIFY_REQUIRED", "true").lower() == "true"
+VERIFY_MAX_CANDIDATES = int(os.getenv("VERIFY_MAX_CANDIDATES", 4))
+verifier = JavaVerifier(
+    workers=int(os.getenv("VERIFY_WORKERS", max(1, (os.cpu_count() or 2) // 2))),
+    compile_timeout=int(os.getenv("JAVAC_TIMEOUT", 20)),
+    run_timeout=float(os.getenv("VERIFY_RUN_TIMEOUT", 5)),
+    memory_mb=int(os.getenv("VERIFY_MEMORY_MB", 256)),
+    isolate_network=os.getenv("VERIFY_ALLOW_NETWORK", "false").lower() != "true",
+)
+if VERIFY_MODE != "off" and not verifier.available():
+    logger.warning("javac/java/prlimit이 없어 업로드 전 코드 검증을 하지 않습니다 (verification.status=unavailable).")
+
+# BOJ 문제 정보(제목, 제한, 본문, 예제 입출력, 태그) 로컬 인덱스
+# /crawl-problems로 미리 채워 두고, 없는 문제는 파이프라인에서 한 번 가져와 저장한다.
+# 검증은 저장된 예제를, 코드 통합 프롬프트는 저장된 문제 본문을 쓴다.
+# 크롤러는 요청 사이를 BOJ_CRAWL_INTERVAL초 이상 띄우고, 403/429를 받으면 BOJ_CRAWL_BACKOFF초 쉰다.
+BOJ_PROBLEM_URL = os.getenv("BOJ_PROBLEM_URL", "https://www.acmicpc.net/problem/{problem_id}")
+PROBLEM_STORE_PATH = os.getenv("PROBLEM_STORE_PATH", "/tmp/autobackjoon_problems.sqlite3")
+PROBLEM_INFO_MAX_AGE = int(os.getenv("PROBLEM_INFO_MAX_AGE", 30 * 24 * 3600))  # 0이면 다시 가져오지 않음
+PROBLEM_INFO_TIMEOUT = float(os.getenv("PROBLEM_INFO_TIMEOUT", 10))
+PROBLEM_CONTEXT_TOKENS = int(os.getenv("PROBLEM_CONTEXT_TOKENS", 800))
+BOJ_CRAWL_INTERVAL = float(os.getenv("BOJ_CRAWL_INTERVAL", 1.0))
+BOJ_CRAWL_BACKOFF = float(os.getenv("BOJ_CRAWL_BACKOFF", 60))
+CRAWL_PROBLEMS_MAX = int(os.getenv("CRAWL_PROBLEMS_MAX", 2000))
+
+# 현재 처리 중인 문제의 LLM 호출 기록 (process_problem마다 새 리스트)
+llm_calls = contextvars.ContextVar("llm_calls", default=None)
+
+# 파이프라인 단계별 동시 실행 제한 (모든 요청이 공유)
+stage_limits = StageLimits({
+    "search": int(os.getenv("SEARCH_CONCURRENCY", 2)),
+    "fetch": int(os.getenv("FETCH_CONCURRENCY", 16)),
+    "llm": int(os.getenv("LLM_CONCURRENCY", 8)),
+    "github": int(os.getenv("GITHUB_CONCURRENCY", 2)),
 })
 
-# OpenAI API 클라이언트 초기화 
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+# /run-daily 일괄 처리 설정
+RUN_DAILY_BATCH_SIZE = int(os.getenv("RUN_DAILY_BATCH_SIZE", 1))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", 4))
+# Cloud Run 요청 타임아웃과, 그 전에 새 작업을 멈출 여유 시간 (초)
+REQUEST_TIMEOUT_SECONDS = int(os.getenv("REQUEST_TIMEOUT_SECONDS", 300))
+BATCH_DEADLINE_MARGIN = int(os.getenv("BATCH_DEADLINE_MARGIN", 30))
+
+# 작업 큐 설정: /generate는 작업을 등록하고 바로 job_id를 반환하며,
+# 같은 프로세스의 워커 풀이 큐에서 작업을 가져가 처리한다.
+# (Cloud Run에서는 요청이 없을 때도 CPU가 할당되도록 설정해야 워커가 계속 동작한다.)
+JOB_QUEUE_ENABLED = os.getenv("JOB_QUEUE_ENABLED", "true").lower() == "true"
+# 지정하지 않으면 Firebase를 쓸 수 있을 때 firestore, 아니면 sqlite
+JOB_QUEUE_BACKEND = os.getenv("JOB_QUEUE_BACKEND")
+JOB_QUEUE_DB_PATH = os.getenv("JOB_QUEUE_DB_PATH", "/tmp/autobackjoon_jobs.sqlite3")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 4))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", 120))
+JOB_HEARTBEAT_SECONDS = int(os.getenv("JOB_HEARTBEAT_SECONDS", 30))
+# 이 시간 동안 갱신이 없는 'processing' 문제는 중단된 것으로 보고 'pending'으로 되돌린다.
+STALE_PROCESSING_SECONDS = int(os.getenv("STALE_PROCESSING_SECONDS", 900))
+
+_job_queue = None
+_worker_pool = None
+_job_queue_lock = threading.Lock()
+
+# 같은 problem_id에 대한 동시 생성 요청 합치기 (프로세스 내 + 선택적으로 인스턴스 간)
+SINGLE_FLIGHT_FIRESTORE = os.getenv("SINGLE_FLIGHT_FIRESTORE", "false").lower() == "true"
+SINGLE_FLIGHT_LEASE_SECONDS = int(os.getenv("SINGLE_FLIGHT_LEASE_SECONDS", 600))
+
+# /get-problem-code 읽기 캐시 (리스너가 꺼져 있거나 멈추면 TTL로 갱신)
+# 리스너가 켜져 있어도 변경을 놓칠 수 있으므로 PROBLEM_CODE_CACHE_LISTEN_TTL이 지나면 다시 읽는다.
+PROBLEM_CODE_CACHE_SIZE = int(os.getenv("PROBLEM_CODE_CACHE_SIZE", 2048))
+PROBLEM_CODE_CACHE_TTL = int(os.getenv("PROBLEM_CODE_CACHE_TTL", 300))
+PROBLEM_CODE_CACHE_LISTEN_TTL = int(os.getenv("PROBLEM_CODE_CACHE_LISTEN_TTL", 3600))
+PROBLEM_CODE_CACHE_LISTENER = os.getenv("PROBLEM_CODE_CACHE_LISTENER", "true").lower() == "true"
+PROBLEM_CODE_MAX_AGE = int(os.getenv("PROBLEM_CODE_MAX_AGE", 0))
+
+_problem_code_cache = None
+
+def get_problem_code_cache():
+    """/get-problem-code 읽기 캐시 (Firebase를 쓸 수 있을 때만, 지연 생성)"""
+    global _problem_code_cache
+    if _problem_code_cache is None and firebase_enabled():
+        with _firebase_lock:
+            if _problem_code_cache is None:
+                _problem_code_cache = ProblemCodeCache(
+                    get_db(),
+                    max_entries=PROBLEM_CODE_CACHE_SIZE,
+                    ttl=PROBLEM_CODE_CACHE_TTL,
+                    listen=PROBLEM_CODE_CACHE_LISTENER,
+                    listen_ttl=PROBLEM_CODE_CACHE_LISTEN_TTL,
+                )
+                # 리스너는 한 번만 시작한다 (실패하면 캐시가 TTL 모드로 돌아간다).
+                _problem_code_cache.start()
+    return _problem_code_cache
+
+# /generate 결과 캐시 정책: reuse는 완료된 코드를 그대로 돌려주고, refresh는 항상 새로 만든다.
+# GENERATION_CACHE_MAX_AGE(초)보다 오래된 결과는 출처를 다시 확인한다 (0이면 제한 없음).
+GENERATION_CACHE_POLICY = os.getenv("GENERATION_CACHE_POLICY", "reuse").lower()
+GENERATION_CACHE_MAX_AGE = int(os.getenv("GENERATION_CACHE_MAX_AGE", 0))
+GENERATION_CACHE_POLICIES = ('reuse', 'refresh')
+STORED_RESULT_FIELDS = ['status', 'code', 'sources', 'source_fingerprint', 'completed_at',
+                        'github_status', 'github_upload']
+
+# /list-problems 페이지 크기와 기본 필드 (code는 크기가 커서 기본으로 제외)
+LIST_PAGE_SIZE = int(os.getenv("LIST_PAGE_SIZE", 50))
+LIST_MAX_PAGE_SIZE = int(os.getenv("LIST_MAX_PAGE_SIZE", 200))
+LIST_DEFAULT_FIELDS = ['problem_id', 'status', 'error', 'github_upload', 'github_file', 'sources', 'processing_at']
+PROBLEM_STATUSES = ['pending', 'processing', 'completed', 'failed']
+PROBLEM_COUNTS_TTL = int(os.getenv("PROBLEM_COUNTS_TTL", 60))
+problem_counts_cache = LRUCache(max_entries=1, ttl=PROBLEM_COUNTS_TTL)
 
-def fetch_google_results(problem_id):
+# 문제 상태 쓰기: FIRESTORE_WRITE_DELAY 동안 모인 여러 문제의 갱신을 한 WriteBatch로 커밋한다.
+FIRESTORE_WRITE_DELAY = float(os.getenv("FIRESTORE_WRITE_DELAY", 0.2))
+FIRESTORE_WRITE_MAX_BATCH = int(os.getenv("FIRESTORE_WRITE_MAX_BATCH", 500))
+ADD_PROBLEMS_MAX = int(os.getenv("ADD_PROBLEMS_MAX", 10000))
+
+# GitHub 업로드: batch_delay 동안 모인 풀이를 한 커밋으로 올린다.
+GITHUB_BATCH_DELAY = float(os.getenv("GITHUB_BATCH_DELAY", 2.0))
+GITHUB_BATCH_MAX_FILES = int(os.getenv("GITHUB_BATCH_MAX_FILES", 20))
+GITHUB_RATE_LIMIT_MAX_WAIT = int(os.getenv("GITHUB_RATE_LIMIT_MAX_WAIT", 60))
+_github_uploaders = {}
+
+generation_flights = SingleFlight()
+_generation_lease = None
+
+def get_generation_lease():
+    """인스턴스 간 중복 실행 방지 임대 (SINGLE_FLIGHT_FIRESTORE이고 Firebase를 쓸 수 있을 때만)"""
+    global _generation_lease
+    if _generation_lease is None and SINGLE_FLIGHT_FIRESTORE and firebase_enabled():
+        with _firebase_lock:
+            if _generation_lease is None:
+                _generation_lease = FirestoreLease(get_db(), collection="locks",
+                                                   lease_seconds=SINGLE_FLIGHT_LEASE_SECONDS)
+    return _generation_lease
+
+# 워커당 하나의 장기 실행 이벤트 루프
+# gunicorn 스레드들은 run_async()로 이 루프에 코루틴을 제출하고 결과를 기다린다.
+_loop = None
+_loop_lock = threading.Lock()
+
+# 이벤트 루프 안에서만 생성/사용되는 비동기 클라이언트들
+_http_session = None
+_async_db = None
+_problem_writer = None
+_problem_crawler = None
+
+def get_event_loop():
+    """백그라운드 스레드에서 동작하는 전역 이벤트 루프를 반환 (없으면 생성)"""
+    global _loop
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=_loop.run_forever, name="pipeline-loop", daemon=True)
+            thread.start()
+    return _loop
+
+def run_async(coro, timeout=None):
+    """동기 코드(Flask 핸들러)에서 코루틴을 전역 이벤트 루프에 제출하고 결과를 기다린다."""
+    future = asyncio.run_coroutine_threadsafe(coro, get_event_loop())
+    return future.result(timeout)
+
+async def _close_async_clients():
+    if _problem_writer is not None:
+        # 버퍼에 남은 상태 갱신을 먼저 커밋한다.
+        await _problem_writer.close()
+    if _http_session is not None and not _http_session.closed:
+        await _http_session.close()
+    if _openai_client is not None:
+        await _openai_client.close()
+
+@atexit.register
+def shutdown_event_loop():
+    """워커 종료 시 비동기 클라이언트를 닫고 이벤트 루프를 정지"""
+    if _loop is None or _loop.is_closed() or not _loop.is_running():
+        return
+    try:
+        run_async(_close_async_clients(), timeout=5)
+    except Exception as e:
+        logger.warning(f"비동기 클라이언트 종료 중 오류: {e}")
+    _loop.call_soon_threadsafe(_loop.stop)
+
+async def get_http_session():
+    """이벤트 루프에 묶인 공용 aiohttp 세션 (지연 생성)"""
+    global _http_session
+    if _http_session is None or _http_session.closed:
+        _http_session = http_client.create_session(headers=HTTP_HEADERS)
+    return _http_session
+
+def get_async_db():
+    """파이프라인용 비동기 Firestore 클라이언트 (이벤트 루프 안에서 지연 생성)"""
+    global _async_db
+    if _async_db is None:
+        from firebase_admin import firestore_async
+        get_db()  # Firebase 앱 초기화
+        _async_db = firestore_async.client()
+    return _async_db
+
+def _on_problem_written(problem_id):
+    if _problem_code_cache is not None:
+        _problem_code_cache.invalidate(problem_id)
+
+def get_problem_writer():
+    """문제 문서 상태 갱신용 write-behind 버퍼 (이벤트 루프 안에서 지연 생성)"""
+    global _problem_writer
+    if _problem_writer is None:
+        _problem_writer = FirestoreWriteBuffer(
+            get_async_db, 'problems',
+            flush_delay=FIRESTORE_WRITE_DELAY,
+            max_writes=FIRESTORE_WRITE_MAX_BATCH,
+            on_written=_on_problem_written,
+        )
+    return _problem_writer
+
+_problem_store = None
+_problem_store_lock = threading.Lock()
+
+def get_problem_store():
+    """BOJ 문제 정보 SQLite 인덱스 (지연 생성)"""
+    global _problem_store
+    if _problem_store is None:
+        with _problem_store_lock:
+            if _problem_store is None:
+                _problem_store = ProblemStore(PROBLEM_STORE_PATH)
+    return _problem_store
+
+async def fetch_problem_page(problem_id):
+    """BOJ 문제 페이지의 (HTTP 상태, 본문)"""
+    session = await get_http_session()
+    # fetch 슬롯은 실제 요청 동안만 잡는다. 크롤러의 요청 간격/차단 대기 중에는 블로그 요청이 슬롯을 쓸 수 있다.
+    # 429는 크롤러가 긴 대기(BOJ_CRAWL_BACKOFF)로 처리하므로 여기서는 재시도하지 않는다.
+    async with stage_limits.slot("fetch"):
+        response = await http_client.request(session, "GET", BOJ_PROBLEM_URL.format(problem_id=problem_id),
+                                             retry_statuses=(500, 502, 503, 504))
+        return response.status, await response.text()
+
+def get_problem_crawler():
+    """문제 페이지 크롤러 (이벤트 루프 안에서 지연 생성, 요청 간격은 모든 호출이 공유)"""
+    global _problem_crawler
+    if _problem_crawler is None:
+        _problem_crawler = ProblemCrawler(get_problem_store(), fetch_problem_page,
+                                          interval=BOJ_CRAWL_INTERVAL, backoff=BOJ_CRAWL_BACKOFF)
+    return _problem_crawler
+
+def record_llm_call(kind, prompt_info, usage, elapsed):
+    """LLM 호출 1회의 입력 크기/실제 토큰 사용량/지연 시간을 기록"""
+    call = {
+        "kind": kind,
+        "estimated_tokens": prompt_info["tokens"],
+        "original_tokens": prompt_info["original_tokens"],
+        "trimmed": prompt_info["trimmed"],
+        "prompt_tokens": getattr(usage, "prompt_tokens", None),
+        "completion_tokens": getattr(usage, "completion_tokens", None),
+        "elapsed": round(elapsed, 3),
+    }
+    logger.info(
+        f"    ⤷ LLM[{kind}] 입력 {call['estimated_tokens']}토큰(원본 {call['original_tokens']}), "
+        f"실제 prompt={call['prompt_tokens']} completion={call['completion_tokens']}, {call['elapsed']}s"
+    )
+    record_llm_tokens(kind, call["prompt_tokens"] or call["estimated_tokens"], call["completion_tokens"])
+    calls = llm_calls.get()
+    if calls is not None:
+        calls.append(call)
+
+def summarize_llm_calls(calls):
+    """문제 하나의 LLM 사용량 합계"""
+    return {
+        "calls": len(calls),
+        "prompt_tokens": sum(call["prompt_tokens"] or call["estimated_tokens"] for call in calls),
+        "completion_tokens": sum(call["completion_tokens"] or 0 for call in calls),
+        "saved_tokens": sum(call["original_tokens"] - call["estimated_tokens"] for call in calls),
+        # estimated_tokens/original_tokens/saved_tokens를 센 방식 (prompt/completion_tokens는 API usage 값)
+        "token_counter": prompt_builder.token_counter(),
+        "elapsed": round(sum(call["elapsed"] for call in calls), 3),
+        "details": calls,
+    }
+
+def get_job_queue():
+    """설정된 백엔드의 작업 큐 (지연 생성)"""
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            backend = JOB_QUEUE_BACKEND or ("firestore" if firebase_enabled() else "sqlite")
+            if backend == "firestore" and firebase_enabled():
+                _job_queue = FirestoreJobQueue(get_db(), collection="jobs", max_attempts=JOB_MAX_ATTEMPTS)
+            else:
+                _job_queue = SQLiteJobQueue(JOB_QUEUE_DB_PATH, max_attempts=JOB_MAX_ATTEMPTS)
+            logger.info(f"작업 큐 백엔드: {type(_job_queue).__name__}")
+    return _job_queue
+
+async def run_generation_job(job):
+    # payload에는 /generate에서 받은 캐시 정책(cache, max_age)이 들어 있다.
+    return await generate_problem(job["problem_id"], **(job.get("payload") or {}))
+
+async def touch_problem(job):
+    """작업 하트비트마다 문제 문서의 갱신 시각을 기록 (중단 감지용)"""
+    await update_problem(job["problem_id"], {'heartbeat_at': server_timestamp()}, wait=False)
+
+async def recover_stale_problems():
+    """오랫동안 갱신이 없는 'processing' 문제를 'pending'으로 되돌린다."""
+    if not await firebase_enabled_async():
+        return
+
+    def recover():
+        cutoff = time.time() - STALE_PROCESSING_SECONDS
+        stale = []
+        for doc in get_db().collection('problems').where('status', '==', 'processing').stream():
+            data = doc.to_dict()
+            last_seen = data.get('heartbeat_at') or data.get('processing_at')
+            if last_seen is not None and last_seen.timestamp() >= cutoff:
+                continue
+            stale.append(doc)
+        writes = [(doc.reference, {'status': 'pending', 'recovered_at': server_timestamp()}) for doc in stale]
+        commit_in_batches(get_db(), writes, op="update")
+        return [doc.id for doc in stale]
+
+    recovered = await asyncio.to_thread(recover)
+    if recovered:
+        logger.warning(f"중단된 문제 {len(recovered)}개를 대기 상태로 되돌렸습니다: {recovered}")
+
+async def _start_worker_pool():
+    global _worker_pool
+    if _worker_pool is None:
+        # 큐 생성 시 Firebase 초기화가 필요할 수 있으므로 이벤트 루프 밖에서 만든다.
+        job_queue = await asyncio.to_thread(get_job_queue)
+    if _worker_pool is None:
+        _worker_pool = WorkerPool(
+            job_queue, run_generation_job,
+            concurrency=JOB_WORKERS,
+            lease_seconds=JOB_LEASE_SECONDS,
+            heartbeat_interval=JOB_HEARTBEAT_SECONDS,
+            on_heartbeat=touch_problem,
+            maintenance=recover_stale_problems
+        )
+        _worker_pool.start()
+    return _worker_pool
+
+def start_job_workers(wait=True):
+    """전역 이벤트 루프에서 작업 워커 풀을 시작 (이미 시작했다면 무시)"""
+    if JOB_QUEUE_ENABLED and _worker_pool is None:
+        future = asyncio.run_coroutine_threadsafe(_start_worker_pool(), get_event_loop())
+        if wait:
+            future.result()
+
+def start_job_workers_in_background():
+    # 첫 요청(/health 포함)이 큐/Firebase 초기화를 기다리지 않도록 결과를 기다리지 않는다.
+    start_job_workers(wait=False)
+
+def enqueue_generation(problem_id, options=None):
+    """문제 생성 작업을 큐에 넣고 job_id를 반환 (같은 문제의 작업이 이미 대기/실행 중이면 그 작업)"""
+    job_id, created = get_job_queue().enqueue_unique(problem_id, payload=options)
+    if not created:
+        logger.info(f"문제 {problem_id}의 작업이 이미 있습니다: {job_id}")
+        return job_id
+    start_job_workers()
+    get_event_loop().call_soon_threadsafe(_worker_pool.notify)
+    return job_id
+
+async def update_problem(problem_id, data, wait=True):
+    """
+    Firestore 문제 문서를 비동기로 갱신 (실패해도 파이프라인은 계속 진행).
+    갱신은 쓰기 버퍼를 거쳐 다른 문제의 갱신과 함께 배치로 커밋된다.
+    wait=False이면 커밋을 기다리지 않는다 (중간 상태, 하트비트용).
+    """
+    if not await firebase_enabled_async():
+        return
+    try:
+        problem_writer = get_problem_writer()
+        if not wait:
+            await problem_writer.update(problem_id, data, wait=False)
+            return
+        async with span("firestore_write") as write_span:
+            if not await problem_writer.update(problem_id, data):
+                write_span.fail()
+    except Exception as e:
+        logger.error(f"Firebase 상태 업데이트 오류: {e}", exc_info=True)
+
+async def fetch_google_results(problem_id, reserve=0, limit=3):
     """
     Google Custom Search JSON API를 이용해
     '백준 {problem_id} 자바 풀이 site:tistory.com' 형태로 검색 후,
-    Tistory 링크 최대 3개를 반환하는 함수.
+    Tistory 링크 최대 limit개(기본 3개, API 한 번에 최대 10개)를 반환하는 함수.
+    결과는 캐시되며, 할당량이 부족하면 SearchQuotaExceeded를 발생시킨다.
     """
     logger.info(f"[1/4] Google Custom Search로 백준 {problem_id} 검색 중...")
 
+    cache_key = f"search:{SEARCH_QUERY_TEMPLATE}:{problem_id}"
+    cached = await search_cache.aget(cache_key)
+    cache_lookup("search", cached is not None)
+    if cached is not None:
+        results = cached[:limit]
+        logger.info(f"  - 검색 캐시 적중: {len(results)}개의 Tistory 링크")
+        return results
+
     # 환경 변수에서 API 키와 CSE ID 가져오기
     API_KEY = os.getenv("GCP_API_KEY")  # GCP에서 발급한 API 키
     CX_ID = os.getenv("CSE_ID")         # Custom Search Engine ID
@@ -67,83 +596,162 @@ def fetch_google_results(problem_id):
         logger.error("GCP_API_KEY 또는 CSE_ID가 설정되지 않았습니다.")
         return []
 
-    search_query = f"site:tistory.com 백준 {problem_id} 자바 풀이"
-    url = f"https://www.googleapis.com/customsearch/v1?q={search_query}&cx={CX_ID}&key={API_KEY}"
+    search_query = SEARCH_QUERY_TEMPLATE.format(problem_id=problem_id)
+    url = SEARCH_API_URL
+    params = {"q": search_query, "cx": CX_ID, "key": API_KEY}
 
     try:
-        response = session.get(url)
-        response.raise_for_status()
-        data = response.json()
+        async with stage_limits.slot("search"):
+            await search_quota.acquire(reserve=reserve)
+            async with span("search"):
+                session = await get_http_session()
+                # 429는 할당량 관리(note_rate_limited)에 맡기고 여기서는 재시도하지 않는다.
+                response = await http_client.request(session, "GET", url, params=params,
+                                                     retry_statuses=(500, 502, 503, 504))
+                if response.status == 429:
+                    # 문제 자체의 실패가 아니므로 호출 측에서 대기 상태로 되돌리도록 할당량 예외로 알린다.
+                    retry_after = http_client.parse_retry_after(response.headers.get("Retry-After"))
+                    search_quota.note_rate_limited(60 if retry_after is None else retry_after)
+                    raise SearchQuotaExceeded("검색 API 요청이 제한되었습니다 (429).")
+                response.raise_for_status()
+                data = await response.json()
 
         items = data.get("items", [])
         all_links = [item["link"] for item in items if "link" in item]
+        await search_cache.aset(cache_key, all_links,
+                                SEARCH_CACHE_TTL if all_links else SEARCH_EMPTY_CACHE_TTL)
 
-        # 최대 3개만 반환
-        results = all_links[:3]
+        # 최대 limit개만 반환
+        results = all_links[:limit]
         logger.info(f"  - {len(results)}개의 Tistory 링크를 찾았습니다.")
         return results
 
-    except requests.RequestException as e:
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
         logger.error(f"Error fetching Google results: {e}", exc_info=True)
         return []
 
-def extract_code_and_summary_from_blog(blog_url):
+async def prefetch_search_results(problem_ids):
+    """
+    여러 문제의 검색 결과를 미리 캐시에 채운다 (스케줄러용 일괄 처리).
+    /generate 요청용 예약 할당량에 닿으면 중단한다.
+    """
+    summary = {"fetched": [], "failed": [], "skipped": []}
+    for problem_id in problem_ids:
+        try:
+            links = await fetch_google_results(problem_id, reserve=SEARCH_PREFETCH_RESERVE)
+        except SearchQuotaExceeded as e:
+            logger.warning(f"검색 프리페치 중단: {e}")
+            summary["skipped"] = [pid for pid in problem_ids
+                                  if pid not in summary["fetched"] and pid not in summary["failed"]]
+            break
+        (summary["fetched"] if links else summary["failed"]).append(problem_id)
+    return summary
+
+async def extract_code_and_summary_from_blog(blog_url, fetch_timeout=BLOG_FETCH_TIMEOUT, revalidate=False,
+                                             summarize=True):
+    """
+    블로그 하나의 코드와 요약.
+    revalidate이면 URL 캐시를 건너뛰고 본문을 새로 가져온다.
+    summarize가 False이면 요약은 만들지 않는다 (summary는 None, 본문은 text에 남는다).
+    중복 출처를 합치고 출처 지문을 비교한 뒤 필요한 결과만 summarize_blog_result로 요약한다.
+    """
+    # 이미 처리한 URL이면 네트워크/LLM 호출 없이 바로 반환
+    if not revalidate:
+        cached = await blog_cache.aget(f"url:{blog_url}")
+        cache_lookup("blog", cached is not None)
+        if cached is not None:
+            logger.info(f"  - 블로그 캐시 적중: {blog_url}")
+            return {"summary": cached["summary"], "code": cached["code"], "complete": cached.get("complete"),
+                    "body_hash": cached.get("body_hash")}
+
     logger.info(f"  - 블로그 페이지 요청: {blog_url}")
     try:
-        response = session.get(blog_url)
-        response.raise_for_status()
-    except requests.RequestException as e:
+        async with stage_limits.slot("fetch"), span("blog_fetch", url=blog_url):
+            session = await get_http_session()
+            # 네이버 블로그처럼 본문이 다른 주소에 있는 사이트는 실제 본문 주소로 요청
+            timeout = aiohttp.ClientTimeout(total=fetch_timeout, sock_connect=http_client.HTTP_CONNECT_TIMEOUT)
+            # 다른 블로그 후보가 있으므로 재시도 없이 한 번만 요청한다.
+            response = await http_client.request(session, "GET", fetch_url_for(blog_url),
+                                                 retries=0, timeout=timeout)
+            response.raise_for_status()
+            html = await response.text()
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
         logger.error(f"블로그 요청 에러: {e}", exc_info=True)
         return None
 
     try:
-        soup = BeautifulSoup(response.text, "html.parser")
+        # CPU 작업이므로 이벤트 루프가 아닌 스레드에서 파싱
+        async with span("parse", url=blog_url):
+            parsed = await asyncio.to_thread(extract_article, html, blog_url)
     except Exception as e:
         logger.error("블로그 HTML 파싱 중 오류", exc_info=True)
         return None
 
-    # 주 콘텐츠 추출 (티스토리 테마에 따라 다를 수 있음)
-    main_content_div = soup.find('div', class_='tt_article_useless_p_margin contents_style')
-    if not main_content_div:
+    if not parsed:
         logger.warning("블로그 메인 콘텐츠를 찾지 못했습니다.")
         return None
-
-    # 스크립트/스타일 제거
-    for tag in main_content_div.find_all(['script', 'style']):
-        tag.decompose()
+    blog_text_full, code_blocks = parsed
+    code_combined = "\n\n".join(code_blocks)
 
     # 텍스트 일부만 표시
-    blog_text_full = main_content_div.get_text(separator="\n", strip=True)
     blog_text_preview = blog_text_full[:50] + "..." if len(blog_text_full) > 50 else blog_text_full
     logger.info(f"    ⤷ 블로그 텍스트(일부): {blog_text_preview}")
 
-    # 코드 블록 추출
-    code_blocks = []
-    for pre_tag in main_content_div.find_all('pre'):
-        code_tag = pre_tag.find('code')
-        if code_tag:
-            code_text = code_tag.get_text(separator="\n", strip=True)
-            if code_text:
-                code_blocks.append(code_text)
-    code_combined = "\n\n".join(code_blocks)
     if code_combined:
         logger.info("    ⤷ 코드 블록을 추출했습니다.")
     else:
         logger.info("    ⤷ 코드 블록이 없습니다.")
 
-    # Claude 4o mini로 요약 요청
-    summary_prompt = (
-        "다음은 블로그의 설명 부분입니다. 이를 요약해주세요.\n\n설명 내용:\n"
-        f"{blog_text_full}"
-    )
+    complete = await find_complete_solution(code_blocks, use_javac=COMPLETE_CHECK_JAVAC, slots=verifier.slots())
+    if complete:
+        logger.info("    ⤷ 완성된 풀이 코드로 판단됨")
+
+    result = {"summary": None, "code": code_combined if code_combined else "", "complete": complete,
+              "body_hash": content_hash(blog_text_full), "text": blog_text_full}
+    if not summarize:
+        return result
+    return await summarize_blog_result(blog_url, result)
+
+async def summarize_blog_result(blog_url, result):
+    """extract_code_and_summary_from_blog(summarize=False)의 결과에 요약을 채우고 URL 캐시에 기록한다."""
+    if result is None or result.get("summary") is not None:
+        return result
+    result = dict(result)
+    blog_text_full = result.pop("text", "")
+    # 같은 본문을 이미 요약했다면 (다른 URL, 미러 글 등) 요약을 재사용
+    body_hash = result["body_hash"]
+    if result["complete"] and SKIP_SUMMARY_FOR_COMPLETE:
+        # 완성 코드는 통합 단계에서 그대로 쓰이므로 설명 요약이 필요 없다.
+        summary = ""
+    else:
+        summary = await blog_cache.aget(f"summary:{body_hash}")
+        cache_lookup("summary", summary is not None)
+        if summary is not None:
+            logger.info("    ⤷ 요약 캐시 적중")
+        else:
+            summary = await summarize_blog_text(blog_text_full, result["code"])
+            if summary:
+                await blog_cache.aset(f"summary:{body_hash}", summary)
+
+    result["summary"] = summary
+    if summary or result["complete"]:
+        await blog_cache.aset(f"url:{blog_url}", result)
+    return result
+
+async def summarize_blog_text(blog_text_full, code_combined=""):
+    # Claude 4o mini로 요약 요청 (코드/중복 문구를 뺀 설명만, 토큰 예산 안에서)
+    summary_prompt, prompt_info = build_summary_prompt(blog_text_full, code_combined, SUMMARY_TOKEN_BUDGET)
     try:
-        summary_response = client.chat.completions.create(
-            model="gpt-4o-mini",  # GPT-4o-mini 모델로 변경
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant for summarizing text."},
-                {"role": "user", "content": summary_prompt}
-            ]
-        )
+        started = time.monotonic()
+        async with stage_limits.slot("llm"), span("llm_summary"):
+            summary_response = await get_openai_client().chat.completions.create(
+                model="gpt-4o-mini",  # GPT-4o-mini 모델로 변경
+                messages=[
+                    {"role": "system", "content": "You are a helpful assistant for summarizing text."},
+                    {"role": "user", "content": summary_prompt}
+                ]
+            )
+        record_llm_call("summary", prompt_info, summary_response.usage, time.monotonic() - started)
         summary = summary_response.choices[0].message.content.strip()
         # 요약 일부만 로그로 확인
         summary_preview = summary[:60] + "..." if len(summary) > 60 else summary
@@ -151,188 +759,635 @@ def extract_code_and_summary_from_blog(blog_url):
     except Exception as e:
         logger.error(f"요약 생성 에러: {e}", exc_info=True)
         summary = ""
+    return summary
 
-    return {"summary": summary, "code": code_combined if code_combined else ""}
-
-async def process_blog_urls(blog_urls):
+async def process_blog_urls(blog_urls, revalidate=False, summarize=True):
     logger.info(f"[2/4] 블로그 {len(blog_urls)}개 동시 처리 시작")
-    loop = asyncio.get_event_loop()
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        tasks = [
-            loop.run_in_executor(executor, extract_code_and_summary_from_blog, url)
-            for url in blog_urls
-        ]
-        results = await asyncio.gather(*tasks)
+    results = await asyncio.gather(
+        *(extract_code_and_summary_from_blog(url, revalidate=revalidate, summarize=summarize)
+          for url in blog_urls)
+    )
     logger.info("모든 블로그 처리 완료")
     return results
 
-def send_results_to_gpt(results):
+async def process_blog_urls_speculative(candidates, target, revalidate=False, summarize=True):
+    """
+    후보 블로그를 모두 동시에 처리하되, 코드나 요약이 있는 결과가 target개 모이면
+    나머지 요청을 취소한다. 반환값은 (사용한 URL 목록, 결과 목록)이며 검색 순위 순으로 정렬된다.
+    summarize가 False이면 요약 대신 본문이 있는 결과를 쓸 만한 것으로 본다.
+    """
+    logger.info(f"[2/4] 블로그 후보 {len(candidates)}개 동시 처리 시작 (목표 {target}개)")
+    tasks = {
+        asyncio.ensure_future(extract_code_and_summary_from_blog(url, revalidate=revalidate,
+                                                                 summarize=summarize)): rank
+        for rank, url in enumerate(candidates)
+    }
+    usable = {}
+    pending = set(tasks)
+    try:
+        while pending and len(usable) < target:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    logger.error(f"블로그 처리 중 오류: {task.exception()}")
+                    continue
+                result = task.result()
+                if result and (result.get("code") or result.get("summary") or result.get("text")):
+                    usable[tasks[task]] = result
+    finally:
+        # 목표를 채웠거나 호출 측이 취소된 경우 남은 요청은 모두 취소
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    ranks = sorted(usable)[:target]
+    logger.info(f"블로그 처리 완료: 사용 {len(ranks)}개, 취소 {len(pending)}개")
+    return [candidates[rank] for rank in ranks], [usable[rank] for rank in ranks]
+
+async def drop_known_mirrors(urls):
+    """
+    이전에 같은 코드의 미러로 확인된 글은, 같은 묶음의 글이 앞 순위에 있으면 빼서 가져오지 않는다.
+    반환값은 (가져올 URL 목록, 뺀 URL 목록).
+    """
+    canonicals = await asyncio.gather(*(blog_cache.aget(f"mirror:{url}") for url in urls))
+    kept, skipped, seen = [], [], set()
+    for url, canonical in zip(urls, canonicals):
+        group = canonical or url
+        if group in seen:
+            skipped.append(url)
+            continue
+        seen.add(group)
+        kept.append(url)
+    if skipped:
+        DUPLICATE_SOURCES.inc(len(skipped), stage="skipped_fetch")
+        logger.info(f"  - 알려진 미러 글 {len(skipped)}개는 가져오지 않습니다: {skipped}")
+    return kept, skipped
+
+async def collapse_duplicate_sources(urls, results):
+    """
+    코드가 같거나 거의 같은 블로그 결과를 하나로 합치고 (프롬프트에 같은 코드를 여러 번 넣지 않도록),
+    미러 관계를 블로그 캐시에 기록한다. 반환값은 (URL 목록, 결과 목록, {미러 URL: 원본 URL}).
+    거의 같은 코드(shingle 유사도)는 이번 검색 결과끼리만 비교한다. 다른 검색에서 먼저 본 글과는
+    정규화한 코드가 같거나 식별자 이름만 다른 경우에만 미러로 판단한다.
+    미러는 요약하기 전에 빼고, 원본이 이번 결과에 없으면 캐시된 원본 결과로 바꾼다
+    (캐시에도 없으면 유일한 사본이므로 남긴다).
+    """
+    urls, results, mirrors = await asyncio.to_thread(
+        collapse_duplicates, urls, results, CODE_DEDUP_THRESHOLD
+    )
+    if mirrors:
+        DUPLICATE_SOURCES.inc(len(mirrors), stage="collapsed")
+        logger.info(f"  - 중복 코드 블로그 {len(mirrors)}개를 합쳤습니다: {mirrors}")
+
+    # 정규화한 코드 해시, 식별자 이름을 지운 코드 해시 → 처음 본 URL (문제/검색에 관계없이 공유)
+    indexed = {}
+    for url, result in zip(urls, results):
+        code = result.get("code") if result else None
+        for kind, fingerprint in (("code", code_fingerprint(code)), ("shape", shape_fingerprint(code))):
+            if fingerprint is None:
+                continue
+            first = await blog_cache.aget(f"{kind}:{fingerprint}")
+            if first is None:
+                await blog_cache.aset(f"{kind}:{fingerprint}", url, BLOG_CACHE_TTL)
+            elif first != url:
+                indexed.setdefault(url, first)
+
+    kept_urls, kept_results = [], []
+    for url, result in zip(urls, results):
+        canonical = indexed.get(url)
+        if canonical is not None:
+            canonical = indexed.get(canonical, canonical)
+        if canonical is None or canonical == url:
+            kept_urls.append(url)
+            kept_results.append(result)
+            continue
+        mirrors[url] = canonical
+        if canonical in urls or canonical in kept_urls:
+            continue
+        cached = await blog_cache.aget(f"url:{canonical}")
+        if cached is None:
+            kept_urls.append(url)
+            kept_results.append(result)
+        else:
+            kept_urls.append(canonical)
+            kept_results.append(dict(cached))
+    replaced = [url for url in urls if url not in kept_urls]
+    if replaced:
+        DUPLICATE_SOURCES.inc(len(replaced), stage="indexed")
+        logger.info(f"  - 이전에 본 글과 같은 코드의 블로그 {len(replaced)}개를 뺐습니다: {replaced}")
+
+    for mirror, canonical in mirrors.items():
+        await blog_cache.aset(f"mirror:{mirror}", mirrors.get(canonical, canonical), BLOG_CACHE_TTL)
+    return kept_urls, kept_results, mirrors
+
+async def get_problem_info(problem_id, fetch=True):
+    """
+    저장된 BOJ 문제 정보. 없거나 PROBLEM_INFO_MAX_AGE보다 오래됐으면 페이지를 가져와 저장한다.
+    fetch=False면 저장된 정보만 쓴다. BOJ에 없는 문제이거나 가져오지 못하면 None.
+    """
+    if not str(problem_id).isdigit():
+        return None
+    store = get_problem_store()
+    stored = await asyncio.to_thread(store.get, problem_id)
+    fresh = stored is not None and (
+        not PROBLEM_INFO_MAX_AGE or time.time() - stored["fetched_at"] < PROBLEM_INFO_MAX_AGE
+    )
+    cache_lookup("problem_info", fresh)
+    if fresh or not fetch:
+        return None if stored is None or stored["status"] == MISSING else stored
+
+    try:
+        async with span("problem_fetch"):
+            return await get_problem_crawler().fetch_one(problem_id)
+    except Exception as e:
+        logger.warning(f"문제 {problem_id} 정보를 가져오지 못했습니다: {e}")
+        # 새로 가져오지 못하면 오래된 정보라도 쓴다.
+        return stored if stored is not None and stored["status"] != MISSING else None
+
+async def verify_solution(problem_id, code, results, problem=None):
+    """
+    통합 코드와 블로그의 완성 풀이를 함께 검증해 통과한 첫 후보(통합 코드 우선)를 고른다.
+    problem(저장된 문제 정보)이 없으면 예제 없이 컴파일만 확인한다.
+    반환값은 (고른 코드 또는 None, 검증 요약). 검증할 수 없으면 코드를 그대로 돌려준다.
+    """
+    if VERIFY_MODE == "off":
+        return code, {"status": "skipped"}
+    reason = await verifier.unavailable_reason()
+    if reason:
+        logger.warning(f"[검증] 검증할 수 없어 코드를 검증 없이 사용합니다: {reason}")
+        return code, {"status": "unavailable", "reason": reason}
+
+    samples, special_judge = [], False
+    if VERIFY_MODE == "samples" and problem:
+        samples, special_judge = problem["samples"], problem["special_judge"]
+    elif VERIFY_MODE == "samples":
+        logger.warning(f"문제 {problem_id}의 예제가 없어 컴파일만 확인합니다.")
+    candidates = [("integrated", code)] + [
+        (f"blog{idx}", result["complete"])
+        for idx, result in enumerate(results, start=1) if result and result.get("complete")
+    ]
+    logger.info(f"[검증] 후보 {len(candidates)}개, 예제 {len(samples)}개"
+                f"{' (스페셜 저지)' if special_judge else ''}")
+    async with span("verify") as verify_span:
+        chosen, reports = await verifier.first_passing(candidates[:VERIFY_MAX_CANDIDATES], samples, special_judge)
+        if chosen is None:
+            verify_span.fail()
+
+    summary = {
+        "status": reports[-1]["status"] if chosen else "failed",
+        "candidate": chosen[0] if chosen else None,
+        "samples": len(samples),
+        "special_judge": special_judge,
+        "reports": reports,
+    }
+    if chosen is None:
+        logger.error(f"[검증] 통과한 후보가 없습니다: {[report['status'] for report in reports]}")
+        return None, summary
+    if chosen[0] != "integrated":
+        logger.warning(f"[검증] 통합 코드 대신 {chosen[0]}의 풀이를 사용합니다.")
+    return chosen[1], summary
+
+async def send_results_to_gpt(results, on_token=None, problem=None):
     logger.info("[3/4] 블로그 코드 통합 요청 중...")
-    prompt = (
+    header = (
         "다음은 여러 블로그에서 추출한 요약과 코드입니다. "
         "완성된 코드가 있다면, 이를 사용해주세요. "
         "그렇지 않다면 이를 사용해서 같은 결과값이 나올 수 있는 단일 Java 코드를 작성해주세요. "
         "기존 코드를 최대한 활용하고 크게 변경하지 마세요. "
         "답변은 다른 말 한마디 없이 단순 코드 텍스트만 포함되어야 합니다 백틱도 없습니다.\n\n"
     )
-    for idx, result in enumerate(results, start=1):
-        if not result:
-            continue
-        summary = result.get('summary', '')
-        code = result.get('code', '')
-        prompt += f"### Blog {idx} 요약:\n{summary}\n### Blog {idx} 코드:\n{code}\n\n"
+    # 문제 본문(입출력 형식, 제한)이 있으면 블로그 내용보다 먼저 넣는다.
+    header += build_problem_context(problem, PROBLEM_CONTEXT_TOKENS)
+    prompt, prompt_info = build_integration_prompt(header, results, INTEGRATION_TOKEN_BUDGET)
 
+    messages = [
+        {"role": "system", "content": "You are a coding assistant for integrating and refining code."},
+        {"role": "user", "content": prompt}
+    ]
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",  # GPT-4o-mini 모델로 변경
-            messages=[
-                {"role": "system", "content": "You are a coding assistant for integrating and refining code."},
-                {"role": "user", "content": prompt}
-            ]
-        )
-        integrated_code = response.choices[0].message.content.strip()
+        started = time.monotonic()
+        async with stage_limits.slot("llm"), span("llm_integration"):
+            if on_token is None:
+                response = await get_openai_client().chat.completions.create(
+                    model="gpt-4o-mini",  # GPT-4o-mini 모델로 변경
+                    messages=messages
+                )
+                usage = response.usage
+                integrated_code = response.choices[0].message.content.strip()
+            else:
+                # 스트리밍 모드: 생성되는 토큰을 on_token으로 바로 전달
+                stream = await get_openai_client().chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=messages,
+                    stream=True,
+                    stream_options={"include_usage": True}
+                )
+                parts = []
+                usage = None
+                async for chunk in stream:
+                    # 사용량은 choices가 비어 있는 마지막 청크에 담겨 온다.
+                    if getattr(chunk, "usage", None):
+                        usage = chunk.usage
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        parts.append(delta)
+                        await on_token(delta)
+                integrated_code = "".join(parts).strip()
+        record_llm_call("integration", prompt_info, usage, time.monotonic() - started)
         logger.info("  - 최종 통합 코드 생성 완료")
         return integrated_code
     except Exception as e:
         logger.error(f"통합 코드 생성 에러: {e}", exc_info=True)
         return None
 
-def upload_to_github(file_name, file_content, repo, branch, token):
+def get_github_uploader(repo, branch, token):
+    """저장소/브랜치별 배치 업로더 (이벤트 루프 안에서 호출)"""
+    key = (repo, branch, token)
+    uploader = _github_uploaders.get(key)
+    if uploader is None:
+        client = GitHubClient(
+            get_http_session, token,
+            limiter=lambda: stage_limits.slot("github"),
+            max_wait=GITHUB_RATE_LIMIT_MAX_WAIT,
+        )
+        uploader = GitHubBatchUploader(
+            client, repo, branch,
+            batch_delay=GITHUB_BATCH_DELAY,
+            max_files=GITHUB_BATCH_MAX_FILES,
+        )
+        _github_uploaders[key] = uploader
+    return uploader
+
+async def upload_to_github(file_name, file_content, repo, branch, token):
+    """
+    GitHub 업로드. 결과는 UPLOADED, UNCHANGED(저장소의 파일과 내용이 같아 커밋하지 않음), FAILED 중 하나.
+    """
     logger.info("[4/4] GitHub에 최종 코드 업로드 중...")
     if not (repo and token):
         logger.error("GitHub 정보가 설정되지 않았습니다.")
-        return False
-
-    url = f"https://api.github.com/repos/{repo}/contents/{file_name}"
-    encoded_content = base64.b64encode(file_content.encode()).decode()
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Accept": "application/vnd.github.v3+json"
-    }
+        return FAILED
 
     try:
-        response = session.get(url, headers=headers)
-        if response.status_code == 200:
-            sha = response.json().get('sha')
-            data = {
-                "message": f"Update {file_name}",
-                "content": encoded_content,
-                "branch": branch,
-                "sha": sha
-            }
-        elif response.status_code == 404:
-            data = {
-                "message": f"Add {file_name}",
-                "content": encoded_content,
-                "branch": branch
-            }
-        else:
-            logger.error(f"GitHub 파일 체크 실패: {response.status_code}")
-            return False
-
-        response = session.put(url, headers=headers, json=data)
-        if response.status_code in [200, 201]:
+        uploader = get_github_uploader(repo, branch, token)
+        result = await uploader.upload(file_name, file_content, message=f"Update {file_name}")
+        if result == UPLOADED:
             logger.info(f"✅ GitHub 업로드 성공: {file_name}")
-            return True
+        elif result == UNCHANGED:
+            logger.info(f"GitHub 파일 내용이 같아 업로드를 생략: {file_name}")
         else:
-            logger.error(f"❌ GitHub 업로드 실패: {response.status_code}")
-            logger.error(response.json())
-            return False
+            logger.error(f"❌ GitHub 업로드 실패: {file_name}")
+        return result
     except Exception as e:
         logger.error("GitHub 업로드 도중 오류", exc_info=True)
-        return False
+        return FAILED
+
+async def notify(progress, event, data):
+    """진행 상황 콜백이 있으면 이벤트를 전달 (스트리밍 응답용)"""
+    if progress is not None:
+        await progress(event, data)
+
+def github_fields(problem_id, github_status):
+    """GitHub 업로드 결과를 문제 문서/응답 필드로 변환"""
+    # 내용이 같아 커밋을 생략한 경우에도 저장소에는 같은 파일이 있으므로 성공으로 본다.
+    github_result = github_status in (UPLOADED, UNCHANGED)
+    return {
+        'github_upload': "성공" if github_result else "실패 또는 미수행",
+        'github_file': f"BOJ_{problem_id}.java" if github_result else None,
+        'github_status': github_status,
+    }
+
+async def publish_to_github(problem_id, code, progress=None):
+    """GitHub 업로드 단계 (설정이 없으면 "skipped")"""
+    repo = os.getenv("GITHUB_REPO")
+    branch = os.getenv("GITHUB_BRANCH", "main")
+    token = os.getenv("GITHUB_TOKEN")
+    file_name = f"BOJ_{problem_id}.java"
+
+    if not (repo and token):
+        return "skipped"
+    await notify(progress, "progress", {"stage": 4, "message": "GitHub 업로드 중"})
+    # 동시 실행 수 제한은 업로더의 API 호출 단위로 적용된다 (배치가 모일 수 있도록).
+    async with span("github") as github_span:
+        github_status = await upload_to_github(file_name, code, repo, branch, token)
+        if github_status == FAILED:
+            github_span.fail()
+    return github_status
+
+async def process_problem(problem_id, progress=None, previous=None):
+    """
+    문제 하나에 대해 검색 → 블로그 처리 → 코드 통합 → GitHub 업로드를 수행.
+    progress가 주어지면 단계별 진행 상황과 통합 코드 토큰을
+    progress(event, data) 형태로 전달한다.
+    previous(이전에 완료된 문제 문서)가 있으면 블로그 본문을 URL 캐시 없이 새로 가져와 출처 지문을 비교하고,
+    같으면 요약/통합 단계를 건너뛰고 저장된 코드로 GitHub 단계만 다시 수행한다.
+    """
+    # 이 문제에서 발생하는 LLM 호출 기록 시작
+    calls = []
+    llm_calls.set(calls)
+    # 단계별 소요 시간 기록 시작
+    spans = []
+    timings.set(spans)
+    started = time.monotonic()
+
+    # Firebase 문제 상태 업데이트 (커밋을 기다리지 않고, 다음 상태와 합쳐질 수 있음)
+    await update_problem(problem_id, {
+        'status': 'processing',
+        'processing_at': server_timestamp()
+    }, wait=False)
 
-async def process_problem(problem_id):
-    # Firebase 문제 상태 업데이트
-    if FIREBASE_ENABLED:
-        try:
-            problem_ref = db.collection('problems').document(problem_id)
-            problem_ref.update({
-                'status': 'processing'
-            })
-        except Exception as e:
-            logger.error(f"Firebase 상태 업데이트 오류: {e}", exc_info=True)
-    
     # 1. Google Custom Search API
-    tistory_links = fetch_google_results(problem_id)
+    await notify(progress, "progress", {"stage": 1, "message": "블로그 검색 중"})
+    try:
+        limit = SPECULATIVE_CANDIDATES if SPECULATIVE_FETCH else 3
+        if CODE_DEDUP:
+            # 검색 결과는 한 번에 최대 10개를 받아 캐시하므로, 미러를 뺀 뒤 limit개를 채운다.
+            candidates = await fetch_google_results(problem_id, limit=max(limit, SEARCH_MAX_RESULTS))
+            tistory_links = (await drop_known_mirrors(candidates))[0][:limit]
+        else:
+            tistory_links = await fetch_google_results(problem_id, limit=limit)
+    except SearchQuotaExceeded as e:
+        logger.error(f"검색 할당량 부족: {e}")
+
+        # 할당량 문제는 문제 자체의 실패가 아니므로 대기 상태로 되돌림
+        await update_problem(problem_id, {
+            'status': 'pending'
+        })
+
+        PROBLEMS.inc(status="requeued")
+        return {"error": "검색 할당량이 부족합니다. 나중에 다시 시도해주세요."}
     if not tistory_links:
         logger.error("검색된 Tistory 링크가 없습니다.")
-        
+
         # Firebase 문제 상태 업데이트 (실패)
-        if FIREBASE_ENABLED:
-            try:
-                problem_ref = db.collection('problems').document(problem_id)
-                problem_ref.update({
-                    'status': 'failed',
-                    'error': "검색된 Tistory 링크가 없습니다."
-                })
-            except Exception as e:
-                logger.error(f"Firebase 상태 업데이트 오류: {e}", exc_info=True)
-        
+        await update_problem(problem_id, {
+            'status': 'failed',
+            'error': "검색된 Tistory 링크가 없습니다."
+        })
+
+        PROBLEMS.inc(status="failed")
         return {"error": "검색된 Tistory 링크가 없습니다."}
 
     logger.info("검색된 Tistory 링크 목록:")
     for idx, link in enumerate(tistory_links, start=1):
         logger.info(f"  {idx}. {link}")
 
-    # 2. 블로그들 동시 처리 (요약 + 코드)
-    results = await process_blog_urls(tistory_links)
+    # 문제 정보(본문, 예제)는 블로그 처리와 동시에 가져온다 (저장돼 있으면 로컬 조회로 끝난다).
+    problem_task = asyncio.ensure_future(get_problem_info(problem_id))
+
+    # 2. 블로그들 동시 처리 (코드 추출 → 중복 출처 합치기 → 남은 글만 요약)
+    # 이전 결과를 다시 확인하는 경우에는 URL 캐시 없이 본문을 새로 가져와 지문부터 비교하고,
+    # 출처가 바뀌었을 때만 요약한다.
+    revalidate = bool(previous and previous.get('code') and previous.get('source_fingerprint'))
+    await notify(progress, "progress", {"stage": 2, "message": "블로그 처리 중", "sources": tistory_links})
+    if SPECULATIVE_FETCH:
+        tistory_links, results = await process_blog_urls_speculative(tistory_links, SPECULATIVE_TARGET,
+                                                                     revalidate=revalidate, summarize=False)
+    else:
+        results = await process_blog_urls(tistory_links, revalidate=revalidate, summarize=False)
+    mirrors = {}
+    if CODE_DEDUP:
+        tistory_links, results, mirrors = await collapse_duplicate_sources(tistory_links, results)
+    fingerprint = source_fingerprint(tistory_links, results)
+    sources_unchanged = revalidate and previous['source_fingerprint'] == fingerprint
+    if not sources_unchanged:
+        if revalidate:
+            logger.info("출처 내용이 바뀌어 블로그를 요약합니다.")
+        results = list(await asyncio.gather(
+            *(summarize_blog_result(url, result) for url, result in zip(tistory_links, results))
+        ))
+    try:
+        # 크롤러 대기열이 길면 문제 정보 없이 진행한다 (가져오기는 계속되어 다음 실행부터 쓰인다).
+        problem = await asyncio.wait_for(asyncio.shield(problem_task), PROBLEM_INFO_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.warning(f"문제 {problem_id} 정보를 기다리지 못해 문제 본문 없이 진행합니다.")
+        problem = None
 
     # 3. 통합된 Java 코드 요청
-    final_result = send_results_to_gpt(results)
+    await notify(progress, "progress", {"stage": 3, "message": "코드 통합 중",
+                                        "usable": sum(1 for result in results if result)})
+    cache_status = "generated"
+    complete_codes = [result["complete"] for result in results if result and result.get("complete")]
+    if sources_unchanged:
+        # 출처와 본문이 그대로면 같은 코드가 나오므로 통합 LLM 호출 없이 저장된 코드를 쓴다.
+        logger.info("[3/4] 출처 내용이 바뀌지 않아 저장된 코드를 재사용합니다.")
+        final_result = previous['code']
+        cache_status = "sources_unchanged"
+        await notify(progress, "token", {"text": final_result})
+    elif complete_codes and SKIP_INTEGRATION_FOR_COMPLETE:
+        # 블로그에 완성된 풀이가 있으면 통합 LLM 호출 없이 그대로 사용
+        logger.info("[3/4] 완성된 블로그 코드를 그대로 사용합니다.")
+        final_result = complete_codes[0]
+        await notify(progress, "token", {"text": final_result})
+    else:
+        on_token = None
+        if progress is not None:
+            async def on_token(text):
+                await progress("token", {"text": text})
+        final_result = await send_results_to_gpt(results, on_token=on_token, problem=problem)
     if not final_result:
         logger.error("통합 코드 생성에 실패했습니다.")
-        
+
         # Firebase 문제 상태 업데이트 (실패)
-        if FIREBASE_ENABLED:
-            try:
-                problem_ref = db.collection('problems').document(problem_id)
-                problem_ref.update({
-                    'status': 'failed',
-                    'error': "통합 코드 생성에 실패했습니다."
-                })
-            except Exception as e:
-                logger.error(f"Firebase 상태 업데이트 오류: {e}", exc_info=True)
-        
+        await update_problem(problem_id, {
+            'status': 'failed',
+            'error': "통합 코드 생성에 실패했습니다."
+        })
+
+        PROBLEMS.inc(status="failed")
         return {"error": "통합 코드 생성에 실패했습니다."}
 
+    # 3-1. 업로드 전 검증 (컴파일 + 예제 실행)
+    await notify(progress, "progress", {"stage": 3, "message": "코드 검증 중"})
+    verified, verification = await verify_solution(problem_id, final_result, results, problem)
+    if verified is None and VERIFY_REQUIRED:
+        error = "검증을 통과한 코드가 없습니다."
+        await update_problem(problem_id, {
+            'status': 'failed',
+            'error': error,
+            'verification': verification
+        })
+
+        PROBLEMS.inc(status="failed")
+        return {"error": error, "verification": verification}
+    final_result = verified or final_result
+
     # 4. GitHub에 업로드 (선택적)
-    repo = os.getenv("GITHUB_REPO")
-    branch = os.getenv("GITHUB_BRANCH", "main")
-    token = os.getenv("GITHUB_TOKEN")
-    file_name = f"BOJ_{problem_id}.java"
-    
-    github_result = False
-    if repo and token:
-        github_result = upload_to_github(file_name, final_result, repo, branch, token)
+    github_status = await publish_to_github(problem_id, final_result, progress)
+    github = github_fields(problem_id, github_status)
     
     # Firebase 문제 상태 업데이트 (완료)
-    if FIREBASE_ENABLED:
-        try:
-            problem_ref = db.collection('problems').document(problem_id)
-            problem_ref.update({
-                'status': 'completed',
-                'code': final_result,
-                'github_upload': "성공" if github_result else "실패 또는 미수행",
-                'github_file': f"BOJ_{problem_id}.java" if github_result else None,
-                'sources': tistory_links
-            })
-        except Exception as e:
-            logger.error(f"Firebase 상태 업데이트 오류: {e}", exc_info=True)
+    await update_problem(problem_id, {
+        'status': 'completed',
+        'code': final_result,
+        **github,
+        'github_blob_sha': git_blob_sha(final_result),
+        'sources': tistory_links,
+        'source_fingerprint': fingerprint,
+        'verification': verification,
+        'completed_at': server_timestamp()
+    })
     
+    PROBLEMS.inc(status="completed")
     return {
         "problem_id": problem_id,
         "code": final_result,
-        "github_upload": "성공" if github_result else "실패 또는 미수행",
-        "github_file": f"BOJ_{problem_id}.java" if github_result else None,
-        "sources": tistory_links
+        **github,
+        "sources": tistory_links,
+        "mirrors": mirrors,
+        "verification": verification,
+        "cache": cache_status,
+        "llm_usage": summarize_llm_calls(calls),
+        "timings": summarize_timings(spans, time.monotonic() - started)
+    }
+
+async def load_stored_result(problem_id):
+    """완료된 문제 문서 (코드, 출처, 지문, 완료 시각). 없거나 완료되지 않았으면 None."""
+    if not await firebase_enabled_async():
+        return None
+    try:
+        async with span("firestore_read"):
+            snapshot = await get_async_db().collection('problems').document(problem_id).get(
+                field_paths=STORED_RESULT_FIELDS
+            )
+    except Exception as e:
+        logger.error(f"저장된 결과 조회 오류: {e}", exc_info=True)
+        return None
+    data = snapshot.to_dict() if snapshot.exists else None
+    if not data or data.get('status') != 'completed' or not data.get('code'):
+        return None
+    return data
+
+def stored_result_age(stored):
+    """완료 후 지난 시간(초). 완료 시각이 없는 예전 문서는 무한대."""
+    completed_at = stored.get('completed_at')
+    if completed_at is None:
+        return float("inf")
+    return time.time() - completed_at.timestamp()
+
+async def find_reusable_result(problem_id, cache=None, max_age=None):
+    """
+    캐시 정책에 따라 (바로 돌려줄 저장 결과, 출처를 다시 확인할 이전 결과)를 반환.
+    refresh이면 둘 다 None, 저장 결과가 max_age초보다 오래됐으면 두 번째 값으로 돌려준다.
+    """
+    if (cache or GENERATION_CACHE_POLICY) == "refresh":
+        return None, None
+    stored = await load_stored_result(problem_id)
+    if max_age is None:
+        max_age = GENERATION_CACHE_MAX_AGE or None
+    if stored is not None and max_age is not None and stored_result_age(stored) > max_age:
+        cache_lookup("generation", False)
+        return None, stored
+    cache_lookup("generation", stored is not None)
+    return stored, None
+
+async def reuse_stored_result(problem_id, stored, progress=None):
+    """저장된 완료 코드로 응답. 이전 GitHub 업로드가 실패했거나 수행되지 않았으면 그 단계만 다시 수행한다."""
+    spans = []
+    timings.set(spans)
+    started = time.monotonic()
+    logger.info(f"문제 {problem_id}: 저장된 코드를 재사용합니다.")
+
+    code = stored['code']
+    github_status = stored.get('github_status')
+    if github_status is None and stored.get('github_upload') == "성공":
+        github_status = UPLOADED  # github_status 필드가 생기기 전의 문서
+    if github_status not in (UPLOADED, UNCHANGED):
+        github_status = await publish_to_github(problem_id, code, progress)
+        if github_status != "skipped":
+            await update_problem(problem_id, github_fields(problem_id, github_status))
+    await notify(progress, "token", {"text": code})
+
+    PROBLEMS.inc(status="reused")
+    return {
+        "problem_id": problem_id,
+        "code": code,
+        **github_fields(problem_id, github_status),
+        "sources": stored.get('sources', []),
+        "cache": "reused",
+        "llm_usage": summarize_llm_calls([]),
+        "timings": summarize_timings(spans, time.monotonic() - started)
     }
 
+async def generate_problem(problem_id, progress=None, cache=None, max_age=None):
+    """
+    process_problem의 중복 실행 방지 버전. 모든 진입점(/generate, /run-daily, 작업 워커)은 이것을 쓴다.
+    같은 문제를 이미 처리 중이면 그 결과를 함께 기다리고,
+    Firestore 임대가 켜져 있으면 다른 인스턴스가 처리 중일 때도 그 결과를 기다린다.
+    cache가 reuse(기본)이면 완료된 코드를 파이프라인 없이 돌려주고,
+    max_age초보다 오래된 결과는 출처를 다시 확인한다. refresh이면 항상 새로 만든다.
+    """
+    stored, previous = await find_reusable_result(problem_id, cache, max_age)
+    if stored is not None:
+        return await reuse_stored_result(problem_id, stored, progress)
+
+    async def compute(publish):
+        acquired = False
+        generation_lease = await asyncio.to_thread(get_generation_lease) if SINGLE_FLIGHT_FIRESTORE else None
+        if generation_lease is not None:
+            acquired = await generation_lease.acquire(problem_id)
+            if not acquired:
+                logger.info(f"다른 인스턴스가 문제 {problem_id}를 처리 중이므로 결과를 기다립니다.")
+                result = await generation_lease.wait_result(problem_id)
+                if result is not None:
+                    return result
+        result = None
+        try:
+            result = await process_problem(problem_id, progress=publish, previous=previous)
+            return result
+        finally:
+            if acquired:
+                await generation_lease.release(problem_id, result)
+
+    return await generation_flights.run(problem_id, compute, progress=progress)
+
+# 콜드 스타트 예열: 지연 생성하는 클라이언트들을 미리 만든다.
+# background(기본)는 import 직후 별도 스레드에서, off는 첫 사용 때 초기화한다.
+# Cloud Run 시작 프로브를 /warmup으로 지정하면 예열이 끝난 뒤 트래픽을 받는다.
+WARM_UP_ON_START = os.getenv("WARM_UP_ON_START", "background").lower()
+_warm_up_lock = threading.Lock()
+_warm_up_report = None
+
+def warm_up():
+    """Firebase, OpenAI 클라이언트, HTTP 세션, 문제 코드 캐시 리스너, 추출 엔진, 토크나이저를 초기화하고 단계별 소요 시간(초)을 반환"""
+    global _warm_up_report
+    with _warm_up_lock:
+        if _warm_up_report is not None:
+            return _warm_up_report
+        steps = [
+            ("firebase", get_db),
+            ("openai", get_openai_client),
+            ("http_session", lambda: run_async(get_http_session(), timeout=10)),
+            ("problem_code_cache", get_problem_code_cache),
+            ("extractor", blog_extractor.warm_up),
+            ("tokenizer", prompt_builder.get_encoding),
+        ]
+        report = {}
+        for name, step in steps:
+            started = time.perf_counter()
+            try:
+                step()
+            except Exception as e:
+                logger.warning(f"예열 단계 {name} 실패: {e}")
+            report[name] = round(time.perf_counter() - started, 3)
+        logger.info(f"예열 완료: {report}")
+        _warm_up_report = report
+        return report
+
+# 예열 엔드포인트 (시작 프로브용)
+@app.route('/warmup', methods=['GET'])
+def warm_up_endpoint():
+    report = warm_up()
+    return jsonify({"status": "warm", "seconds": report})
+
 # 건강 체크 엔드포인트
 @app.route('/health', methods=['GET'])
 def health_check():
     """상태 확인 엔드포인트"""
-    firebase_status = "enabled" if FIREBASE_ENABLED else "disabled"
+    # 헬스 체크가 Firebase 초기화를 기다리지 않도록 현재 상태만 보고한다.
+    firebase_status = {True: "enabled", False: "disabled", None: "not_initialized"}[_firebase_ready]
     return jsonify({
         "status": "healthy",
         "firebase": firebase_status
@@ -348,12 +1403,12 @@ def add_problem():
     if not problem_id:
         return jsonify({"error": "problem_id가 필요합니다."}), 400
     
-    if not FIREBASE_ENABLED:
+    if not firebase_enabled():
         return jsonify({"error": "Firebase가 비활성화되어 있습니다."}), 500
     
     try:
         # Firebase에 문제 추가
-        db.collection('problems').document(problem_id).set({
+        get_db().collection('problems').document(problem_id).set({
             'problem_id': problem_id,
             'status': 'pending'
         })
@@ -366,29 +1421,146 @@ def add_problem():
         logger.error(f"문제 추가 중 오류: {e}", exc_info=True)
         return jsonify({"error": str(e)}), 500
 
+def parse_problem_ids(data):
+    """
+    /add-problems 본문에서 문제 ID 목록을 만든다 (입력 순서 유지, 중복 제거).
+    problem_ids: ["1000", 1001, ...], ranges: [[1000, 1099], "2000-2010", ...] (양 끝 포함)
+    """
+    for key in ('problem_ids', 'ranges'):
+        if not isinstance(data.get(key) or [], list):
+            raise TypeError(f"{key}는 목록이어야 합니다.")
+    problem_ids = [str(problem_id).strip() for problem_id in data.get('problem_ids') or []]
+    for item in data.get('ranges') or []:
+        start, end = item.split('-', 1) if isinstance(item, str) else item
+        start, end = int(start), int(end)
+        if start > end:
+            raise ValueError(f"잘못된 범위입니다: {item}")
+        if end - start + 1 > ADD_PROBLEMS_MAX:
+            raise ValueError(f"범위가 너무 큽니다: {item}")
+        problem_ids.extend(str(problem_id) for problem_id in range(start, end + 1))
+    for problem_id in problem_ids:
+        if not problem_id or '/' in problem_id:
+            raise ValueError(f"잘못된 문제 ID입니다: {problem_id!r}")
+    return list(dict.fromkeys(problem_ids))
+
+# 문제 일괄 추가 엔드포인트
+@app.route('/add-problems', methods=['POST'])
+def add_problems():
+    """
+    여러 문제를 WriteBatch(최대 500개씩)로 한꺼번에 추가하는 엔드포인트.
+    이미 있는 문제는 건너뛰고, overwrite=true이면 대기 상태로 다시 만든다.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        problem_ids = parse_problem_ids(data)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"problem_ids 또는 ranges가 올바르지 않습니다: {e}"}), 400
+
+    if not problem_ids:
+        return jsonify({"error": "problem_ids 또는 ranges가 필요합니다."}), 400
+    if len(problem_ids) > ADD_PROBLEMS_MAX:
+        return jsonify({"error": f"한 번에 최대 {ADD_PROBLEMS_MAX}개까지 추가할 수 있습니다."}), 400
+
+    if not firebase_enabled():
+        return jsonify({"error": "Firebase가 비활성화되어 있습니다."}), 500
+
+    try:
+        problems_ref = get_db().collection('problems')
+        refs = [problems_ref.document(problem_id) for problem_id in problem_ids]
+        existing = set()
+        if not data.get('overwrite'):
+            # 존재 여부만 필요하므로 한 번의 일괄 조회로 status 필드만 읽는다.
+            existing = {doc.id for doc in get_db().get_all(refs, field_paths=['status']) if doc.exists}
+        writes = [
+            (ref, {'problem_id': ref.id, 'status': 'pending'})
+            for ref in refs if ref.id not in existing
+        ]
+        commits = commit_in_batches(get_db(), writes)
+        problem_counts_cache.delete("counts")
+        problem_code_cache = _problem_code_cache
+        if problem_code_cache is not None:
+            for ref, _ in writes:
+                problem_code_cache.invalidate(ref.id)
+
+        logger.info(f"문제 {len(writes)}개 추가 (이미 있음 {len(existing)}개, 커밋 {commits}회)")
+        return jsonify({
+            "status": "success",
+            "added": len(writes),
+            "skipped": [problem_id for problem_id in problem_ids if problem_id in existing],
+            "commits": commits
+        })
+    except Exception as e:
+        logger.error(f"문제 일괄 추가 중 오류: {e}", exc_info=True)
+        return jsonify({"error": str(e)}), 500
+
+def count_problems_by_status():
+    """
+    상태별 문제 수. 문서를 읽지 않는 Firestore 집계(count) 쿼리를 쓰고,
+    결과는 PROBLEM_COUNTS_TTL 동안 메모리에 유지한다.
+    """
+    counts = problem_counts_cache.get("counts")
+    if counts is not None:
+        return counts
+    problems_ref = get_db().collection('problems')
+    counts = {}
+    for status in PROBLEM_STATUSES:
+        result = problems_ref.where('status', '==', status).count(alias="count").get()
+        counts[status] = int(result[0][0].value)
+    counts['total'] = int(problems_ref.count(alias="count").get()[0][0].value)
+    problem_counts_cache.set("counts", counts)
+    return counts
+
 # 문제 목록 조회 엔드포인트
 @app.route('/list-problems', methods=['GET'])
 def list_problems():
-    """문제 목록을 반환하는 엔드포인트"""
-    if not FIREBASE_ENABLED:
+    """
+    문제 목록을 페이지 단위로 반환하는 엔드포인트.
+    쿼리 파라미터: limit, cursor(이전 응답의 next_cursor), status, fields(쉼표 구분),
+    include_code(true면 code 포함), counts(false면 상태별 개수 생략)
+    """
+    if not firebase_enabled():
         return jsonify({"error": "Firebase가 비활성화되어 있습니다."}), 500
     
     try:
-        problems_ref = db.collection('problems')
-        problems = list(problems_ref.stream())
+        limit = min(max(int(request.args.get('limit', LIST_PAGE_SIZE)), 1), LIST_MAX_PAGE_SIZE)
+    except ValueError:
+        return jsonify({"error": "limit는 정수여야 합니다."}), 400
+    
+    status = request.args.get('status')
+    if status and status not in PROBLEM_STATUSES:
+        return jsonify({"error": f"status는 {', '.join(PROBLEM_STATUSES)} 중 하나여야 합니다."}), 400
+    
+    fields = request.args.get('fields')
+    fields = [field.strip() for field in fields.split(',') if field.strip()] if fields else list(LIST_DEFAULT_FIELDS)
+    if request.args.get('include_code', 'false').lower() == 'true' and 'code' not in fields:
+        fields.append('code')
+    
+    try:
+        query = get_db().collection('problems')
+        if status:
+            query = query.where('status', '==', status)
+        query = query.order_by('__name__').select(fields)
+        cursor = request.args.get('cursor')
+        if cursor:
+            query = query.start_after({'__name__': cursor})
+        # 다음 페이지가 있는지 알기 위해 하나 더 읽는다.
+        problems = list(query.limit(limit + 1).stream())
         
         problem_list = []
-        for problem in problems:
-            problem_data = problem.to_dict()
+        for problem in problems[:limit]:
             problem_list.append({
                 'id': problem.id,
-                'data': problem_data
+                'data': problem.to_dict()
             })
         
-        return jsonify({
+        response = {
             "status": "success",
-            "problems": problem_list
-        })
+            "problems": problem_list,
+            "next_cursor": problems[limit - 1].id if len(problems) > limit else None
+        }
+        if request.args.get('counts', 'true').lower() == 'true':
+            response["counts"] = count_problems_by_status()
+        return jsonify(response)
     except Exception as e:
         logger.error(f"문제 목록 조회 중 오류: {e}", exc_info=True)
         return jsonify({"error": str(e)}), 500
@@ -397,12 +1569,13 @@ def list_problems():
 @app.route('/delete-problem/<problem_id>', methods=['DELETE'])
 def delete_problem(problem_id):
     """Firebase에서 문제 삭제"""
-    if not FIREBASE_ENABLED:
+    if not firebase_enabled():
         return jsonify({"error": "Firebase가 비활성화되어 있습니다."}), 500
     
     try:
-        problem_ref = db.collection('problems').document(problem_id)
+        problem_ref = get_db().collection('problems').document(problem_id)
         problem_ref.delete()
+        get_problem_code_cache().invalidate(problem_id)
         
         return jsonify({
             "status": "success",
@@ -412,6 +1585,20 @@ def delete_problem(problem_id):
         logger.error(f"문제 삭제 중 오류: {e}", exc_info=True)
         return jsonify({"error": str(e)}), 500
 
+def parse_cache_options(data):
+    """쿼리 파라미터/JSON 본문의 캐시 정책 (cache=reuse|refresh, max_age=초). 잘못된 값이면 ValueError."""
+    cache = str(request.args.get('cache') or data.get('cache') or GENERATION_CACHE_POLICY).lower()
+    if cache not in GENERATION_CACHE_POLICIES:
+        raise ValueError(f"cache는 {', '.join(GENERATION_CACHE_POLICIES)} 중 하나여야 합니다.")
+    max_age = request.args.get('max_age', data.get('max_age'))
+    if max_age is not None and max_age != '':
+        max_age = int(max_age)
+        if max_age < 0:
+            raise ValueError("max_age는 0 이상이어야 합니다.")
+    else:
+        max_age = None
+    return {"cache": cache, "max_age": max_age}
+
 # 문제 코드 생성 엔드포인트
 @app.route('/generate', methods=['POST'])
 def generate_solution():
@@ -421,29 +1608,145 @@ def generate_solution():
     
     if not problem_id:
         return jsonify({"error": "problem_id가 필요합니다."}), 400
+
+    try:
+        options = parse_cache_options(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     
-    # 비동기 함수를 동기적으로 실행
-    import asyncio
-    result = asyncio.run(process_problem(problem_id))
+    # 기본은 작업 큐에 등록하고 바로 반환, wait=true이면 기존처럼 끝날 때까지 기다림
+    wait = str(request.args.get('wait') or data.get('wait', '')).lower() == 'true'
+    if JOB_QUEUE_ENABLED and not wait:
+        # 재사용할 수 있는 완료 결과가 있으면 작업을 만들지 않고 바로 응답
+        stored, _ = run_async(find_reusable_result(problem_id, **options))
+        if stored is not None:
+            result = run_async(reuse_stored_result(problem_id, stored))
+        else:
+            job_id = enqueue_generation(problem_id, options)
+            return jsonify({
+                "status": "queued",
+                "job_id": job_id,
+                "problem_id": problem_id,
+                "status_url": f"/jobs/{job_id}"
+            }), 202
+    else:
+        # 전역 이벤트 루프에서 비동기 파이프라인 실행
+        result = run_async(generate_problem(problem_id, **options))
+    # 단계별 소요 시간은 timings=true일 때만 포함 (합쳐진 요청끼리 결과를 공유하므로 복사본에서 제거)
+    if str(request.args.get('timings') or data.get('timings', '')).lower() != 'true':
+        result = {key: value for key, value in result.items() if key != 'timings'}
     return jsonify(result)
 
+# 작업 상태 조회 엔드포인트
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """/generate로 등록한 작업의 상태와 결과를 반환"""
+    try:
+        job = get_job_queue().get(job_id)
+    except Exception as e:
+        logger.error(f"작업 조회 중 오류: {e}", exc_info=True)
+        return jsonify({"error": str(e)}), 500
+
+    if job is None:
+        return jsonify({"error": f"작업 {job_id}를 찾을 수 없습니다."}), 404
+    return jsonify(public_job(job))
+
+def is_scheduler_authorized():
+    """SCHEDULER_SECRET이 설정된 경우 Bearer 토큰을 확인"""
+    secret = os.getenv('SCHEDULER_SECRET')
+    auth_header = request.headers.get('Authorization')
+    return not secret or auth_header == f"Bearer {secret}"
+
+# 문제 코드 생성 스트리밍 엔드포인트 (Server-Sent Events)
+STREAM_TERMINAL_EVENTS = ("result", "failed")
+STREAM_DONE_ID = "done"
+
+@app.route('/generate-stream', methods=['GET', 'POST'])
+def generate_solution_stream():
+    """
+    /generate의 스트리밍 버전.
+    progress(단계 진행), token(통합 코드 조각) 이벤트 뒤에 result(최종 결과) 또는 failed(파이프라인 실패)를
+    한 번 보내고 스트림을 닫는다. failed는 EventSource의 연결 오류(error) 이벤트와 구별하기 위한 이름이다.
+    EventSource 사용을 위해 GET ?problem_id= 도 허용한다. 마지막 이벤트에는 id: done이 붙으므로,
+    그 뒤 자동 재연결(Last-Event-ID: done)에는 204로 응답해 작업을 다시 시작하지 않는다.
+    """
+    if request.headers.get('Last-Event-ID') == STREAM_DONE_ID:
+        return Response(status=204)
+
+    data = request.get_json(silent=True) or {}
+    problem_id = request.args.get('problem_id') or data.get('problem_id')
+
+    if not problem_id:
+        return jsonify({"error": "problem_id가 필요합니다."}), 400
+
+    try:
+        options = parse_cache_options(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    events = queue.Queue()
+
+    async def progress(event, payload):
+        events.put((event, payload))
+
+    async def run():
+        try:
+            result = await generate_problem(problem_id, progress=progress, **options)
+            events.put(("failed" if result.get("error") else "result", result))
+        except Exception as e:
+            logger.error(f"스트리밍 생성 중 오류: {e}", exc_info=True)
+            events.put(("failed", {"error": str(e)}))
+        finally:
+            events.put(None)
+
+    # 클라이언트 연결이 끊겨도 파이프라인은 끝까지 실행해 Firestore 상태를 마무리한다.
+    asyncio.run_coroutine_threadsafe(run(), get_event_loop())
+
+    def stream():
+        while True:
+            try:
+                item = events.get(timeout=15)
+            except queue.Empty:
+                # 프록시가 연결을 끊지 않도록 주기적으로 주석 라인 전송
+                yield ": keep-alive\n\n"
+                continue
+            if item is None:
+                break
+            event, payload = item
+            if event in STREAM_TERMINAL_EVENTS:
+                yield f"id: {STREAM_DONE_ID}\nevent: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+                break
+            yield f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+    return Response(stream_with_context(stream()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
 # 문제 처리 엔드포인트 (일일 자동 실행용)
 @app.route('/run-daily', methods=['POST'])
 def run_daily_problem():
     """Cloud Scheduler에서 호출할 일일 실행 엔드포인트"""
     # 간단한 인증 (선택사항)
-    secret = os.getenv('SCHEDULER_SECRET')
-    auth_header = request.headers.get('Authorization')
-    
-    if secret and (not auth_header or auth_header != f"Bearer {secret}"):
+    if not is_scheduler_authorized():
         return jsonify({"error": "Unauthorized"}), 401
     
-    if not FIREBASE_ENABLED:
+    if not firebase_enabled():
         return jsonify({"error": "Firebase가 비활성화되어 있습니다."}), 500
     
+    # 일괄 처리 크기 (쿼리 파라미터 > JSON 본문 > 환경 변수 순)
+    body = request.get_json(silent=True) or {}
+    try:
+        batch_size = int(request.args.get('batch_size') or body.get('batch_size') or RUN_DAILY_BATCH_SIZE)
+    except (TypeError, ValueError):
+        return jsonify({"error": "batch_size는 정수여야 합니다."}), 400
+
+    if batch_size > 1:
+        return run_daily_batch(batch_size)
+
     try:
         # 1. Firebase에서 처리되지 않은 문제 가져오기
-        problems_ref = db.collection('problems').where('status', '==', 'pending').limit(1)
+        problems_ref = get_db().collection('problems').where('status', '==', 'pending').limit(1)
         problems = list(problems_ref.stream())
         
         if not problems:
@@ -454,8 +1757,7 @@ def run_daily_problem():
         problem_id = problem_doc.id
         
         # 2. 문제 처리
-        import asyncio
-        result = asyncio.run(process_problem(problem_id))
+        result = run_async(generate_problem(problem_id))
         
         return jsonify({
             "status": "success",
@@ -467,74 +1769,221 @@ def run_daily_problem():
         logger.error(f"일일 작업 실행 중 오류: {e}", exc_info=True)
         return jsonify({"error": str(e)}), 500
     
+def run_daily_batch(batch_size):
+    """대기 중인 문제를 최대 batch_size개까지 병렬로 처리하고 문제별 요약을 반환"""
+    started = time.monotonic()
+    deadline = started + REQUEST_TIMEOUT_SECONDS - BATCH_DEADLINE_MARGIN
+
+    try:
+        problems_ref = get_db().collection('problems').where('status', '==', 'pending').limit(batch_size)
+        problem_ids = [problem.id for problem in problems_ref.stream()]
+
+        if not problem_ids:
+            return jsonify({"message": "처리할 문제가 없습니다."}), 200
+
+        logger.info(f"일괄 처리 시작: {len(problem_ids)}개 문제 (동시 {BATCH_CONCURRENCY}개)")
+        scheduler = BatchScheduler(generate_problem, concurrency=BATCH_CONCURRENCY)
+        results = run_async(scheduler.run(problem_ids, deadline))
+
+        counts = {}
+        for result in results:
+            counts[result["status"]] = counts.get(result["status"], 0) + 1
+
+        return jsonify({
+            "status": "success",
+            "batch_size": batch_size,
+            "counts": counts,
+            "elapsed": round(time.monotonic() - started, 2),
+            "results": results
+        })
+    except Exception as e:
+        logger.error(f"일괄 작업 실행 중 오류: {e}", exc_info=True)
+        return jsonify({"error": str(e)}), 500
+
+def _runtime_gauges():
+    """/metrics에 함께 내보내는 현재 값 (HTTP 풀, 검색 할당량, 캐시)"""
+    gauges = []
+    for key, value in http_client.metrics.snapshot(_http_session).items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            gauges.append((f"boj_http_{key}", f"HTTP 풀 {key}", value))
+    quota = search_quota.snapshot()
+    gauges.append(("boj_search_quota_used", "오늘 사용한 검색 호출 수", quota["used"]))
+    gauges.append(("boj_search_quota_remaining", "오늘 남은 검색 호출 수", quota["remaining"]))
+    gauges.append(("boj_blog_cache_memory_entries", "블로그 캐시 메모리 항목 수", len(blog_cache.memory)))
+    if _problem_writer is not None:
+        for key, value in _problem_writer.stats().items():
+            gauges.append((f"boj_firestore_writer_{key}", f"문제 상태 쓰기 버퍼 {key}", value))
+    if _problem_store is not None:
+        for status, count in _problem_store.stats().items():
+            gauges.append((f"boj_problem_store_{status}", f"저장된 문제 정보 수 ({status})", count))
+    return gauges
+
+registry.add_collector(_runtime_gauges)
+
+# Prometheus 지표 엔드포인트
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
+# HTTP 커넥션 풀 현황
+@app.route('/http-stats', methods=['GET'])
+def get_http_stats():
+    return jsonify(http_client.metrics.snapshot(_http_session))
+
+# 검색 결과 일괄 프리페치 엔드포인트 (스케줄러용)
+@app.route('/prefetch-search', methods=['POST'])
+def prefetch_search():
+    """대기 중인 모든 문제의 검색 결과를 미리 캐시에 채우는 엔드포인트"""
+    if not is_scheduler_authorized():
+        return jsonify({"error": "Unauthorized"}), 401
+
+    if not firebase_enabled():
+        return jsonify({"error": "Firebase가 비활성화되어 있습니다."}), 500
+
+    try:
+        problems_ref = get_db().collection('problems').where('status', '==', 'pending')
+        problem_ids = [problem.id for problem in problems_ref.stream()]
+
+        summary = run_async(prefetch_search_results(problem_ids))
+
+        return jsonify({
+            "status": "success",
+            "result": summary,
+            "quota": search_quota.snapshot()
+        })
+    except Exception as e:
+        logger.error(f"검색 프리페치 중 오류: {e}", exc_info=True)
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/crawl-problems', methods=['POST'])
+def crawl_problems():
+    """
+    BOJ 문제 정보(본문, 예제, 태그)를 미리 가져와 로컬 인덱스에 채우는 엔드포인트.
+    problem_ids/ranges가 없으면 대기 중인 문제를 대상으로 한다.
+    저장된 지 refresh_after초(기본 PROBLEM_INFO_MAX_AGE)가 안 된 문제는 건너뛰고,
+    요청 시간 제한 안에서 끝내지 못한 문제는 skipped로 돌려준다.
+    """
+    if not is_scheduler_authorized():
+        return jsonify({"error": "Unauthorized"}), 401
+
+    data = request.get_json(silent=True) or {}
+    try:
+        problem_ids = parse_problem_ids(data)
+        refresh_after = int(data.get('refresh_after', PROBLEM_INFO_MAX_AGE))
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"요청 값이 올바르지 않습니다: {e}"}), 400
+
+    try:
+        if not problem_ids and firebase_enabled():
+            problems_ref = get_db().collection('problems').where('status', '==', 'pending')
+            problem_ids = [problem.id for problem in problems_ref.stream()]
+        problem_ids = [problem_id for problem_id in problem_ids if problem_id.isdigit()]
+        if not problem_ids:
+            return jsonify({"error": "가져올 문제가 없습니다."}), 400
+        if len(problem_ids) > CRAWL_PROBLEMS_MAX:
+            return jsonify({"error": f"한 번에 최대 {CRAWL_PROBLEMS_MAX}개까지 가져올 수 있습니다."}), 400
+
+        started = time.monotonic()
+        deadline = started + REQUEST_TIMEOUT_SECONDS - BATCH_DEADLINE_MARGIN
+        summary = run_async(get_problem_crawler().crawl(problem_ids, refresh_after or None, deadline))
+        logger.info(f"문제 정보 크롤링: 새로 {len(summary['fetched'])}개, 없음 {len(summary['missing'])}개, "
+                    f"실패 {len(summary['failed'])}개, 남음 {len(summary['skipped'])}개")
+        return jsonify({
+            "status": "success",
+            "result": summary,
+            "elapsed": round(time.monotonic() - started, 2),
+            "store": get_problem_store().stats()
+        })
+    except Exception as e:
+        logger.error(f"문제 정보 크롤링 중 오류: {e}", exc_info=True)
+        return jsonify({"error": str(e)}), 500
+
+# BOJ 문제 정보 조회 엔드포인트
+# 저장된 정보만 돌려주고, BOJ에서 새로 가져오는 것은 스케줄러 인증이 있을 때만 한다.
+@app.route('/problem-info/<problem_id>', methods=['GET'])
+def problem_info(problem_id):
+    try:
+        info = run_async(get_problem_info(problem_id, fetch=is_scheduler_authorized()))
+    except Exception as e:
+        logger.error(f"문제 {problem_id} 정보 조회 중 오류: {e}", exc_info=True)
+        return jsonify({"error": str(e), "status": "error"}), 500
+    if info is None:
+        return jsonify({"error": f"문제 {problem_id} 정보를 찾을 수 없습니다.", "status": "not_found"}), 404
+    return jsonify(info)
+
+# 검색 할당량 조회 엔드포인트
+@app.route('/search-quota', methods=['GET'])
+def get_search_quota():
+    """Custom Search API 일일 사용량과 제한 상태를 반환"""
+    return jsonify(search_quota.snapshot())
+
 # 특정 문제의 코드 조회 엔드포인트
 @app.route('/get-problem-code/<problem_id>', methods=['GET'])
 def get_problem_code(problem_id):
-    """Firebase에서 특정 문제의 코드를 조회하는 엔드포인트"""
-    if not FIREBASE_ENABLED:
+    """
+    특정 문제의 코드를 조회하는 엔드포인트.
+    완료된 문제는 메모리 캐시에서 바로 응답하고, If-None-Match가 ETag와 같으면 304를 반환한다.
+    """
+    if not firebase_enabled():
         return jsonify({"error": "Firebase가 비활성화되어 있습니다.", "status": "error"}), 500
     
     try:
-        logger.info(f"문제 {problem_id}의 코드 조회 시작")
-        # Firebase에서 문제 정보 조회
-        problem_ref = db.collection('problems').document(problem_id)
-        problem_doc = problem_ref.get()
+        problem_code_cache = get_problem_code_cache()
+        entry = problem_code_cache.get(problem_id)
+        if entry is None:
+            # 캐시에 없으면 Firebase에서 문제 정보 조회
+            problem_doc = get_db().collection('problems').document(problem_id).get()
+            
+            if not problem_doc.exists:
+                logger.warning(f"문제 {problem_id}를 Firebase에서 찾을 수 없음")
+                return jsonify({
+                    "error": f"문제 {problem_id}를 찾을 수 없습니다.", 
+                    "status": "not_found"
+                }), 404
+            
+            problem_data = problem_doc.to_dict()
+            logger.debug(f"Firebase에서 가져온 문제 {problem_id} 데이터: {problem_data}")
+            
+            # 완료된 문제가 아닌 경우
+            if problem_data.get('status') != 'completed':
+                logger.warning(f"문제 {problem_id}가 완료되지 않음. 현재 상태: {problem_data.get('status')}")
+                return jsonify({
+                    "error": "완료되지 않은 문제입니다.",
+                    "status": problem_data.get('status', 'unknown')
+                }), 404
+            
+            # 코드가 없는 경우
+            if not problem_data.get('code'):
+                logger.warning(f"문제 {problem_id}의 code 필드가 없거나 비어있음")
+                return jsonify({
+                    "error": "완료된 문제이지만 코드가 비어있습니다.",
+                    "status": "completed"
+                }), 404
+            
+            entry = problem_code_cache.put(problem_id, problem_data)
+            logger.info(f"문제 {problem_id}의 코드 조회 성공 (코드 길이: {len(problem_data['code'])}자, "
+                        f"참고 자료 {len(problem_data.get('sources', []))}개)")
         
-        if not problem_doc.exists:
-            logger.warning(f"문제 {problem_id}를 Firebase에서 찾을 수 없음")
-            return jsonify({
-                "error": f"문제 {problem_id}를 찾을 수 없습니다.", 
-                "status": "not_found"
-            }), 404
-        
-        problem_data = problem_doc.to_dict()
-        logger.info(f"Firebase에서 가져온 문제 {problem_id} 데이터: {problem_data}")
-        
-        # 완료된 문제가 아닌 경우
-        if problem_data.get('status') != 'completed':
-            logger.warning(f"문제 {problem_id}가 완료되지 않음. 현재 상태: {problem_data.get('status')}")
-            return jsonify({
-                "error": "완료되지 않은 문제입니다.",
-                "status": problem_data.get('status', 'unknown')
-            }), 404
-        
-        # 코드가 없는 경우
-        if 'code' not in problem_data:
-            logger.warning(f"문제 {problem_id}에 code 필드가 없음")
-            return jsonify({
-                "error": "완료된 문제이지만 코드 필드가 없습니다.",
-                "status": "completed"
-            }), 404
-        
-        if not problem_data.get('code'):
-            logger.warning(f"문제 {problem_id}의 code 필드가 비어있음")
-            return jsonify({
-                "error": "완료된 문제이지만 코드가 비어있습니다.",
-                "status": "completed"
-            }), 404
-        
-        logger.info(f"문제 {problem_id}의 코드 조회 성공 (코드 길이: {len(problem_data.get('code', ''))}자)")
-        
-        # 소스 정보 로깅
-        sources = problem_data.get('sources', [])
-        if sources:
-            logger.info(f"문제 {problem_id}의 참고 자료: {len(sources)}개")
+        payload, etag = entry
+        if etag in request.if_none_match:
+            response = Response(status=304)
         else:
-            logger.info(f"문제 {problem_id}의 참고 자료 없음")
-        
-        # 문제 코드와 관련 정보 반환
-        return jsonify({
-            "status": "success",
-            "problem_id": problem_id,
-            "code": problem_data.get('code', ''),
-            "github_upload": problem_data.get('github_upload', '실패 또는 미수행'),
-            "github_file": problem_data.get('github_file'),
-            "sources": sources
-        })
+            # 문제 코드와 관련 정보 반환
+            response = jsonify(payload)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = f"public, max-age={PROBLEM_CODE_MAX_AGE}, must-revalidate"
+        return response
     except Exception as e:
         logger.error(f"문제 {problem_id} 코드 조회 중 오류: {e}", exc_info=True)
         return jsonify({"error": str(e), "status": "error"}), 500
 
+if WARM_UP_ON_START == "background":
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+
+# 첫 요청 때 작업 워커 풀 시작 (다른 인스턴스가 등록한 작업도 처리)
+if JOB_QUEUE_ENABLED:
+    app.before_first_request(start_job_workers_in_background)
+
 # 애플리케이션 실행
 if __name__ == "__main__":
     port = int(os.environ.get('PORT', 8080))
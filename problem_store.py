@@ -0,0 +1,232 @@
+import re
+import html
+import json
+import time
+import sqlite3
+import asyncio
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# 저장 상태: ok(파싱 완료), missing(BOJ에 없는 문제 번호, 다시 가져오지 않음)
+OK = "ok"
+MISSING = "missing"
+
+LIMIT_RE = re.compile(r"([\d.]+)")
+SAMPLE_RE = re.compile(r'<pre[^>]*\bid="sample-(input|output)-(\d+)"[^>]*>(.*?)</pre>', re.S)
+SPECIAL_JUDGE_RE = re.compile(r"problem-label-spj|스페셜 저지")
+TAG_RE = re.compile(r"<[^>]+>")
+
+def parse_samples(page_html):
+    """BOJ 문제 페이지에서 ([(예제 입력, 예제 출력), ...], 스페셜 저지 여부)를 추출"""
+    found = {}
+    for kind, number, text in SAMPLE_RE.findall(page_html):
+        text = html.unescape(TAG_RE.sub("", text)).replace("\r\n", "\n")
+        found.setdefault(int(number), {})[kind] = text
+    samples = [
+        (sample["input"], sample["output"])
+        for _, sample in sorted(found.items())
+        if "input" in sample and "output" in sample
+    ]
+    return samples, bool(SPECIAL_JUDGE_RE.search(page_html))
+
+def _text(node):
+    if node is None:
+        return ""
+    return "\n".join(line.strip() for line in node.get_text("\n").splitlines() if line.strip())
+
+def parse_problem_page(page_html):
+    """BOJ 문제 페이지에서 제목, 시간/메모리 제한, 본문(설명/입력/출력/제한), 예제, 태그를 추출"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(page_html, "html.parser")
+    title = soup.find(id="problem_title")
+    time_limit = memory_limit = None
+    info = soup.find(id="problem-info")
+    cells = info.select("tbody td") if info is not None else []
+    if len(cells) >= 2:
+        found = LIMIT_RE.search(cells[0].get_text())
+        time_limit = float(found.group(1)) if found else None
+        found = LIMIT_RE.search(cells[1].get_text())
+        memory_limit = int(float(found.group(1))) if found else None
+    samples, special_judge = parse_samples(page_html)
+    tags = soup.select("#problem_tags a") or soup.select("#problem_tags li")
+    return {
+        "title": title.get_text(strip=True) if title is not None else "",
+        "time_limit": time_limit,      # 초
+        "memory_limit": memory_limit,  # MB
+        "statement": {
+            "description": _text(soup.find(id="problem_description")),
+            "input": _text(soup.find(id="problem_input")),
+            "output": _text(soup.find(id="problem_output")),
+            "limit": _text(soup.find(id="problem_limit")),
+        },
+        "samples": samples,
+        "special_judge": special_judge,
+        "tags": list(dict.fromkeys(tag.get_text(strip=True) for tag in tags if tag.get_text(strip=True))),
+    }
+
+class ProblemStore:
+    """
+    BOJ 문제 메타데이터(제목, 제한, 본문, 예제 입출력, 태그)의 로컬 SQLite 인덱스.
+    문제 번호가 기본 키이므로 조회는 인덱스 한 번으로 끝나고, 본문/예제/태그는 JSON 열로 저장한다.
+    """
+
+    def __init__(self, path, table="problems"):
+        self.path = path
+        self.table = table
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "problem_id INTEGER PRIMARY KEY, status TEXT NOT NULL, title TEXT, "
+                "time_limit REAL, memory_limit INTEGER, statement TEXT, samples TEXT, "
+                "special_judge INTEGER NOT NULL DEFAULT 0, tags TEXT, fetched_at REAL NOT NULL)"
+            )
+
+    @staticmethod
+    def _row(row):
+        if row is None:
+            return None
+        (problem_id, status, title, time_limit, memory_limit,
+         statement, samples, special_judge, tags, fetched_at) = row
+        return {
+            "problem_id": str(problem_id),
+            "status": status,
+            "title": title,
+            "time_limit": time_limit,
+            "memory_limit": memory_limit,
+            "statement": json.loads(statement or "{}"),
+            "samples": [tuple(sample) for sample in json.loads(samples or "[]")],
+            "special_judge": bool(special_judge),
+            "tags": json.loads(tags or "[]"),
+            "fetched_at": fetched_at,
+        }
+
+    def get(self, problem_id):
+        """저장된 문제 정보 (없으면 None, BOJ에 없는 번호면 status가 missing)"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT problem_id, status, title, time_limit, memory_limit, statement, samples, "
+                f"special_judge, tags, fetched_at FROM {self.table} WHERE problem_id = ?",
+                (int(problem_id),)
+            ).fetchone()
+        return self._row(row)
+
+    def put(self, problem_id, info):
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (problem_id, status, title, time_limit, memory_limit, "
+                "statement, samples, special_judge, tags, fetched_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (int(problem_id), OK, info["title"], info["time_limit"], info["memory_limit"],
+                 json.dumps(info["statement"], ensure_ascii=False),
+                 json.dumps(info["samples"], ensure_ascii=False),
+                 int(info["special_judge"]), json.dumps(info["tags"], ensure_ascii=False), time.time())
+            )
+
+    def mark_missing(self, problem_id):
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (problem_id, status, fetched_at) VALUES (?, ?, ?)",
+                (int(problem_id), MISSING, time.time())
+            )
+
+    def known(self, problem_ids, max_age=None):
+        """이미 저장된(max_age초 이내에 가져온) 문제 번호 집합"""
+        cutoff = time.time() - max_age if max_age else 0
+        ids = [int(problem_id) for problem_id in problem_ids]
+        known = set()
+        with self._lock:
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT problem_id FROM {self.table} WHERE problem_id IN ({placeholders}) "
+                    "AND fetched_at >= ?", (*chunk, cutoff)
+                ).fetchall()
+                known.update(str(problem_id) for (problem_id,) in rows)
+        return known
+
+    def stats(self):
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT status, COUNT(*) FROM {self.table} GROUP BY status"
+            ).fetchall()
+        return dict(rows)
+
+class ProblemCrawler:
+    """
+    문제 페이지를 가져와 ProblemStore에 채우는 크롤러.
+    요청 사이 간격을 interval초 이상으로 유지하고(사이트 부하와 차단 방지),
+    403/429를 받으면 backoff초 동안 멈췄다가 한 번 더 시도한 뒤, 또 막히면 중단한다.
+    fetch(problem_id)는 (HTTP 상태, 본문)을 돌려주는 코루틴이다.
+    """
+
+    def __init__(self, store, fetch, interval=1.0, backoff=60.0):
+        self.store = store
+        self.fetch = fetch
+        self.interval = interval
+        self.backoff = backoff
+        self._lock = None
+        self._next_at = 0.0
+
+    async def _wait_turn(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            delay = self._next_at - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next_at = loop.time() + self.interval
+
+    async def fetch_one(self, problem_id):
+        """문제 하나를 가져와 저장하고 저장된 정보를 반환 (BOJ에 없으면 None, 차단되면 PermissionError)"""
+        for attempt in range(2):
+            await self._wait_turn()
+            status, page = await self.fetch(problem_id)
+            if status in (403, 429):
+                if attempt == 0:
+                    logger.warning(f"문제 페이지 요청이 제한되었습니다 ({status}), {self.backoff:.0f}초 대기")
+                    self._next_at = asyncio.get_running_loop().time() + self.backoff
+                    continue
+                raise PermissionError(f"문제 페이지 요청이 계속 제한됩니다 ({status})")
+            break
+        if status == 404:
+            await asyncio.to_thread(self.store.mark_missing, problem_id)
+            return None
+        if status != 200:
+            raise RuntimeError(f"문제 {problem_id} 페이지 요청 실패: {status}")
+        info = await asyncio.to_thread(parse_problem_page, page)
+        if not info["title"]:
+            raise RuntimeError(f"문제 {problem_id} 페이지를 해석하지 못했습니다.")
+        await asyncio.to_thread(self.store.put, problem_id, info)
+        return await asyncio.to_thread(self.store.get, problem_id)
+
+    async def crawl(self, problem_ids, refresh_after=None, deadline=None):
+        """
+        저장되지 않은(또는 refresh_after초보다 오래된) 문제를 순서대로 가져온다.
+        deadline(time.monotonic() 기준)이 지나거나 요청이 계속 제한되면 남은 문제는 skipped로 보고한다.
+        """
+        known = await asyncio.to_thread(self.store.known, problem_ids, refresh_after)
+        summary = {"fetched": [], "missing": [], "failed": [], "skipped": [], "cached": len(known)}
+        pending = [problem_id for problem_id in problem_ids if problem_id not in known]
+        for index, problem_id in enumerate(pending):
+            if deadline is not None and time.monotonic() + self.interval > deadline:
+                summary["skipped"] = pending[index:]
+                break
+            try:
+                info = await self.fetch_one(problem_id)
+            except PermissionError as e:
+                logger.warning(f"문제 크롤링 중단: {e}")
+                summary["skipped"] = pending[index:]
+                break
+            except Exception as e:
+                logger.error(f"문제 {problem_id} 크롤링 오류: {e}")
+                summary["failed"].append(problem_id)
+                continue
+            (summary["fetched"] if info else summary["missing"]).append(problem_id)
+        return summary
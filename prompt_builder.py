@@ -0,0 +1,165 @@
+import re
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# tiktoken(requirements.txt)으로 토큰 수를 세고, 불러오지 못하면 근사치를 사용
+# 인코딩 파일 로드가 무거우므로 처음 토큰을 셀 때 불러온다.
+# 인코딩 파일은 Docker 이미지 빌드 때 TIKTOKEN_CACHE_DIR에 받아 두므로 실행 중에는 내려받지 않는다.
+_encoding = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+
+def get_encoding():
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        with _encoding_lock:
+            if not _encoding_loaded:
+                try:
+                    import tiktoken
+                    _encoding = tiktoken.get_encoding("o200k_base")
+                except Exception:
+                    _encoding = None
+                _encoding_loaded = True
+    return _encoding
+
+def token_counter():
+    """토큰 수를 세는 방식: tiktoken(정확) 또는 estimate(글자 수 근사)"""
+    return "tiktoken" if get_encoding() is not None else "estimate"
+
+# 블로그 본문에 반복적으로 섞이는 UI/저작권 문구
+BOILERPLATE_RE = re.compile(
+    r"^(공감|구독하기|댓글|댓글\s*\d+|신고|신고하기|저작자표시|저작자표시\s*비영리.*|반응형|태그|관련글|"
+    r"이 글 공유하기|공유하기|게시글 관리|카테고리의 다른 글|.*티스토리툴바|Copyright.*|All rights reserved.*|"
+    r"[#>|·•\-]+)$",
+    re.I
+)
+
+def count_tokens(text):
+    """토큰 수 계산. tiktoken이 없으면 ASCII 4자당 1토큰, 그 외(한글 등) 문자당 약 0.7토큰으로 근사."""
+    if not text:
+        return 0
+    encoding = get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return int(ascii_chars / 4 + (len(text) - ascii_chars) * 0.7) + 1
+
+def truncate_to_tokens(text, budget):
+    """줄 단위로 앞에서부터 budget 토큰까지만 남긴다. 마지막 줄은 글자 단위로 자른다."""
+    if budget <= 0:
+        return ""
+    if count_tokens(text) <= budget:
+        return text
+    kept = []
+    used = 0
+    for line in text.split("\n"):
+        cost = count_tokens(line) + 1
+        if used + cost > budget:
+            # 들어갈 수 있는 만큼 비율로 자른 뒤, 넘치면 조금씩 줄인다.
+            cut = int(len(line) * (budget - used) / cost)
+            while cut > 0 and count_tokens(line[:cut]) + used > budget:
+                cut = int(cut * 0.9)
+            if cut > 0:
+                kept.append(line[:cut])
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(kept)
+
+def clean_prose(text, code=""):
+    """
+    설명 텍스트 정리: 코드 블록과 겹치는 줄, 반복되는 줄, 블로그 UI 문구를 제거한다.
+    (본문 텍스트에는 코드 블록 내용도 그대로 들어 있으므로 요약 입력에서는 빼도 된다.)
+    """
+    code_lines = set(line.strip() for line in code.split("\n") if line.strip())
+    seen = set()
+    kept = []
+    for line in text.split("\n"):
+        line = line.strip()
+        if not line or line in code_lines or line in seen or BOILERPLATE_RE.match(line):
+            continue
+        seen.add(line)
+        kept.append(line)
+    return "\n".join(kept)
+
+def build_summary_prompt(blog_text, code, budget):
+    """
+    요약용 프롬프트 구성. 반환값은 (prompt, info)이며 info에는
+    원본/최종 토큰 수와 잘림 여부가 들어 있다.
+    """
+    header = "다음은 블로그의 설명 부분입니다. 이를 요약해주세요.\n\n설명 내용:\n"
+    prose = clean_prose(blog_text, code)
+    body = truncate_to_tokens(prose, budget - count_tokens(header))
+    prompt = header + body
+    return prompt, {
+        "original_tokens": count_tokens(header + blog_text),
+        "tokens": count_tokens(prompt),
+        "trimmed": body != prose,
+    }
+
+def build_integration_prompt(header, results, budget):
+    """
+    코드 통합용 프롬프트 구성.
+    예산이 부족하면 요약(설명)을 먼저 줄이고, 그래도 넘치면 뒤쪽 블로그의 코드부터 뺀다.
+    반환값은 (prompt, info).
+    """
+    blogs = [(idx, result.get('summary', '') or '', result.get('code', '') or '')
+             for idx, result in enumerate(results, start=1) if result]
+
+    def section(idx, summary, code):
+        return f"### Blog {idx} 요약:\n{summary}\n### Blog {idx} 코드:\n{code}\n\n"
+
+    original = header + "".join(section(*blog) for blog in blogs)
+    original_tokens = count_tokens(original)
+    if original_tokens <= budget:
+        return original, {"original_tokens": original_tokens, "tokens": original_tokens, "trimmed": False}
+
+    # 1) 코드 우선 배정: 예산 안에 들어가는 블로그 코드만 순서대로 유지
+    remaining = budget - count_tokens(header) - sum(count_tokens(section(idx, "", "")) for idx, _, _ in blogs)
+    codes = {}
+    for idx, _, code in blogs:
+        cost = count_tokens(code)
+        if cost <= remaining:
+            codes[idx] = code
+            remaining -= cost
+        else:
+            codes[idx] = ""
+
+    # 2) 남은 예산을 요약들에 균등 배분
+    share = remaining // len(blogs) if blogs else 0
+    prompt = header + "".join(
+        section(idx, truncate_to_tokens(summary, share), codes[idx]) for idx, summary, _ in blogs
+    )
+    return prompt, {"original_tokens": original_tokens, "tokens": count_tokens(prompt), "trimmed": True}
+
+def build_problem_context(problem, budget):
+    """
+    통합 프롬프트 앞에 붙일 문제 정보(제목, 제한, 입출력 형식, 첫 예제).
+    설명 본문은 budget 토큰 안에 들어가는 만큼만 넣는다. 문제 정보가 없으면 빈 문자열.
+    """
+    if not problem or budget <= 0:
+        return ""
+    statement = problem.get("statement") or {}
+    limits = []
+    if problem.get("time_limit"):
+        limits.append(f"시간 제한 {problem['time_limit']:g}초")
+    if problem.get("memory_limit"):
+        limits.append(f"메모리 제한 {problem['memory_limit']}MB")
+    head = f"### 문제 {problem.get('problem_id', '')}: {problem.get('title', '')}\n"
+    if limits:
+        head += ", ".join(limits) + "\n"
+    tail = ""
+    for label, key in (("입력", "input"), ("출력", "output"), ("제한", "limit")):
+        if statement.get(key):
+            tail += f"#### {label}\n{statement[key]}\n"
+    if problem.get("samples"):
+        sample_input, sample_output = problem["samples"][0]
+        tail += f"#### 예제 입력 1\n{sample_input.rstrip()}\n#### 예제 출력 1\n{sample_output.rstrip()}\n"
+    description = ""
+    if statement.get("description"):
+        description = truncate_to_tokens(statement["description"], budget - count_tokens(head + tail) - 5)
+    context = head + (f"#### 설명\n{description}\n" if description else "") + tail
+    context = truncate_to_tokens(context, budget).rstrip("\n")
+    return context + "\n\n" if context else ""
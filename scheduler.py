@@ -0,0 +1,91 @@
+import time
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+class StageLimits:
+    """
+    파이프라인 단계별(search, fetch, llm, github) 동시 실행 수 제한.
+    세마포어는 이벤트 루프 안에서 처음 사용할 때 생성한다.
+    """
+
+    def __init__(self, limits):
+        self.limits = dict(limits)
+        self._semaphores = {}
+
+    def slot(self, stage):
+        semaphore = self._semaphores.get(stage)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.limits.get(stage, 1))
+            self._semaphores[stage] = semaphore
+        return semaphore
+
+class BatchScheduler:
+    """
+    여러 문제를 제한된 병렬도로 처리하는 스케줄러.
+    예상 처리 시간(최근 처리 시간의 이동 평균)을 기준으로
+    마감 시각 안에 끝낼 수 없는 문제는 새로 시작하지 않는다.
+    """
+
+    def __init__(self, handler, concurrency=4, estimate=60.0):
+        self.handler = handler
+        self.concurrency = concurrency
+        self.estimate = estimate
+
+    def _observe(self, elapsed):
+        # 지수 이동 평균으로 문제당 예상 처리 시간 갱신
+        self.estimate = 0.7 * self.estimate + 0.3 * elapsed
+
+    async def _run_one(self, problem_id):
+        started = time.monotonic()
+        try:
+            result = await self.handler(problem_id)
+        except Exception as e:
+            logger.error(f"문제 {problem_id} 일괄 처리 중 오류: {e}", exc_info=True)
+            result = {"error": str(e)}
+        elapsed = time.monotonic() - started
+        self._observe(elapsed)
+
+        summary = {
+            "problem_id": problem_id,
+            "status": "failed" if result.get("error") else "completed",
+            "elapsed": round(elapsed, 2),
+        }
+        if result.get("error"):
+            summary["error"] = result["error"]
+        else:
+            summary["github_upload"] = result.get("github_upload")
+            summary["sources"] = len(result.get("sources") or [])
+        return summary
+
+    async def run(self, problem_ids, deadline):
+        """
+        problem_ids를 순서대로 처리한다. deadline은 time.monotonic() 기준 마감 시각.
+        시작하지 못한 문제는 'skipped'로 보고한다.
+        """
+        pending = list(problem_ids)
+        running = set()
+        summaries = {}
+
+        while pending or running:
+            while pending and len(running) < self.concurrency:
+                if time.monotonic() + self.estimate > deadline:
+                    logger.warning(
+                        f"마감 시각이 가까워 남은 {len(pending)}개 문제는 시작하지 않습니다."
+                    )
+                    for problem_id in pending:
+                        summaries[problem_id] = {"problem_id": problem_id, "status": "skipped"}
+                    pending = []
+                    break
+                problem_id = pending.pop(0)
+                running.add(asyncio.ensure_future(self._run_one(problem_id)))
+
+            if not running:
+                break
+            done, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                summary = task.result()
+                summaries[summary["problem_id"]] = summary
+
+        return [summaries[problem_id] for problem_id in problem_ids]
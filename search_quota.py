@@ -0,0 +1,127 @@
+import time
+import asyncio
+import logging
+import datetime
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# Custom Search API 할당량은 태평양 시간 자정에 초기화된다.
+try:
+    from zoneinfo import ZoneInfo
+    QUOTA_TIMEZONE = ZoneInfo("America/Los_Angeles")
+except Exception:
+    QUOTA_TIMEZONE = datetime.timezone.utc
+
+class SearchQuotaExceeded(Exception):
+    """일일 검색 할당량을 모두 사용했을 때 발생"""
+
+class SearchQuota:
+    """
+    Google Custom Search API 사용량 추적기.
+    - 일일 사용량을 세고 (선택적으로 store에 저장해 재시작 후에도 유지)
+    - 분당 요청 수를 넘지 않도록 대기하며
+    - 429 응답을 받으면 Retry-After 동안 요청을 멈춘다.
+    reserve 인자로 일부 할당량을 대화형 요청(/generate)용으로 남겨둘 수 있다.
+    """
+
+    def __init__(self, daily_limit=100, per_minute_limit=100, store=None):
+        self.daily_limit = daily_limit
+        self.per_minute_limit = per_minute_limit
+        self.store = store
+        self.rate_limited = 0
+        self._day = None
+        self._used = 0
+        self._recent = deque()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+        self._async_lock = None
+
+    @staticmethod
+    def _today():
+        return datetime.datetime.now(QUOTA_TIMEZONE).date().isoformat()
+
+    def _roll_day(self):
+        today = self._today()
+        if today == self._day:
+            return
+        self._day = today
+        self._used = 0
+        if self.store is not None:
+            try:
+                self._used = self.store.get(f"search_quota:{today}") or 0
+            except Exception as e:
+                logger.warning(f"검색 할당량 기록을 읽을 수 없습니다: {e}")
+
+    @property
+    def used(self):
+        with self._lock:
+            self._roll_day()
+            return self._used
+
+    def remaining(self):
+        return max(0, self.daily_limit - self.used)
+
+    def record(self):
+        """검색 API 호출 1회를 기록"""
+        with self._lock:
+            self._roll_day()
+            self._used += 1
+            self._recent.append(time.monotonic())
+            if self.store is not None:
+                try:
+                    self.store.set(f"search_quota:{self._day}", self._used, 2 * 24 * 3600)
+                except Exception as e:
+                    logger.warning(f"검색 할당량 기록을 저장할 수 없습니다: {e}")
+
+    def note_rate_limited(self, retry_after=60):
+        """429 응답을 받은 경우 호출: retry_after초 동안 새 요청을 막는다."""
+        with self._lock:
+            self.rate_limited += 1
+            self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+        logger.warning(f"검색 API 429 응답: {retry_after}초 동안 검색을 중단합니다.")
+
+    def _wait_time(self):
+        now = time.monotonic()
+        with self._lock:
+            while self._recent and now - self._recent[0] >= 60:
+                self._recent.popleft()
+            wait = self._blocked_until - now
+            if len(self._recent) >= self.per_minute_limit:
+                wait = max(wait, 60 - (now - self._recent[0]))
+        return max(0.0, wait)
+
+    async def acquire(self, reserve=0, max_wait=60):
+        """
+        검색 1회분 할당량을 확보하고 사용량을 기록한다.
+        분당 제한/429 대기가 max_wait초를 넘거나 남은 할당량이 reserve 이하이면
+        SearchQuotaExceeded를 발생시킨다.
+        """
+        if self._async_lock is None:
+            self._async_lock = asyncio.Lock()
+        async with self._async_lock:
+            if self.remaining() <= reserve:
+                raise SearchQuotaExceeded(
+                    f"검색 할당량 부족 (사용 {self.used}/{self.daily_limit}, 예약 {reserve})"
+                )
+            wait = self._wait_time()
+            if wait > max_wait:
+                raise SearchQuotaExceeded(f"검색 API 대기 시간 초과 ({wait:.0f}초)")
+            if wait > 0:
+                logger.info(f"  - 검색 속도 제한으로 {wait:.1f}초 대기")
+                await asyncio.sleep(wait)
+            self.record()
+
+    def snapshot(self):
+        """현재 사용량 요약 (엔드포인트 노출용)"""
+        used = self.used
+        return {
+            "day": self._day,
+            "used": used,
+            "daily_limit": self.daily_limit,
+            "remaining": max(0, self.daily_limit - used),
+            "per_minute_limit": self.per_minute_limit,
+            "rate_limited": self.rate_limited,
+            "blocked_for": round(max(0.0, self._blocked_until - time.monotonic()), 1),
+        }
@@ -0,0 +1,153 @@
+import time
+import uuid
+import asyncio
+import logging
+import datetime
+
+logger = logging.getLogger(__name__)
+
+class _Flight:
+    def __init__(self):
+        self.task = None
+        self.history = []
+        self.subscribers = []
+
+    async def publish(self, event, data):
+        # 늦게 합류한 호출자에게도 앞선 진행 이벤트를 보여주기 위해 기록해 둔다.
+        self.history.append((event, data))
+        for subscriber in list(self.subscribers):
+            try:
+                await subscriber(event, data)
+            except Exception as e:
+                logger.warning(f"진행 이벤트 전달 실패: {e}")
+
+class SingleFlight:
+    """
+    같은 키에 대한 동시 호출을 하나의 실행으로 합친다 (이벤트 루프 안에서 사용).
+    먼저 온 호출이 실행을 시작하고, 나중에 온 호출은 같은 결과를 기다린다.
+    progress 콜백을 넘기면 지금까지의 진행 이벤트를 재생한 뒤 이후 이벤트를 받는다.
+    """
+
+    def __init__(self):
+        self._flights = {}
+
+    def in_flight(self, key):
+        return key in self._flights
+
+    async def run(self, key, factory, progress=None):
+        """factory(publish)는 진행 이벤트를 publish(event, data)로 알리는 코루틴을 반환해야 한다."""
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight()
+            self._flights[key] = flight
+            flight.task = asyncio.ensure_future(self._execute(key, flight, factory))
+        else:
+            logger.info(f"진행 중인 작업에 합류: {key}")
+
+        if progress is not None:
+            for event, data in list(flight.history):
+                await progress(event, data)
+            flight.subscribers.append(progress)
+        try:
+            # 한 호출자가 취소되어도 공유 실행은 계속되도록 shield
+            return await asyncio.shield(flight.task)
+        finally:
+            if progress is not None and progress in flight.subscribers:
+                flight.subscribers.remove(progress)
+
+    async def _execute(self, key, flight, factory):
+        try:
+            return await factory(flight.publish)
+        finally:
+            self._flights.pop(key, None)
+
+class FirestoreLease:
+    """
+    인스턴스 간 중복 실행 방지를 위한 Firestore 임대.
+    locks/{key} 문서에 소유자와 만료 시각을 기록하고, 끝나면 결과를 남긴 뒤 임대를 푼다.
+    임대를 얻지 못한 인스턴스는 결과가 기록될 때까지 기다린다.
+    """
+
+    def __init__(self, db, collection="locks", lease_seconds=600, poll_interval=2.0, result_ttl=300):
+        from google.cloud import firestore as gcloud_firestore
+
+        self.db = db
+        self.collection = db.collection(collection)
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.result_ttl = result_ttl
+        self.owner = f"instance-{uuid.uuid4().hex[:8]}"
+        self._transactional = gcloud_firestore.transactional
+
+    @staticmethod
+    def _ts(value):
+        return datetime.datetime.fromtimestamp(value, datetime.timezone.utc)
+
+    def _acquire(self, key):
+        ref = self.collection.document(key)
+
+        @self._transactional
+        def acquire(transaction):
+            snapshot = ref.get(transaction=transaction)
+            now = time.time()
+            data = snapshot.to_dict() if snapshot.exists else {}
+            lease_until = data.get("lease_until")
+            if data.get("owner") and lease_until is not None and lease_until.timestamp() > now:
+                return False
+            transaction.set(ref, {
+                "owner": self.owner,
+                "lease_until": self._ts(now + self.lease_seconds),
+                "result": None,
+                "released_at": None,
+            })
+            return True
+
+        return acquire(self.db.transaction())
+
+    def _release(self, key, result):
+        """결과를 남기고 임대를 푼다. 임대가 만료되어 다른 인스턴스가 가져갔으면 건드리지 않고 False."""
+        ref = self.collection.document(key)
+
+        @self._transactional
+        def release(transaction):
+            snapshot = ref.get(transaction=transaction)
+            data = snapshot.to_dict() if snapshot.exists else {}
+            if data.get("owner") != self.owner:
+                return False
+            transaction.set(ref, {
+                "owner": None,
+                "lease_until": None,
+                "result": result,
+                "released_at": self._ts(time.time()),
+            })
+            return True
+
+        return release(self.db.transaction())
+
+    async def acquire(self, key):
+        return await asyncio.to_thread(self._acquire, key)
+
+    async def release(self, key, result):
+        try:
+            if not await asyncio.to_thread(self._release, key, result):
+                logger.warning(f"임대가 이미 다른 인스턴스로 넘어가 결과를 기록하지 않았습니다: {key}")
+        except Exception as e:
+            logger.error(f"임대 해제 중 오류: {e}", exc_info=True)
+
+    async def wait_result(self, key):
+        """
+        다른 인스턴스의 실행 결과를 기다린다.
+        임대가 만료되었는데 결과가 없으면 None (호출 측이 직접 실행).
+        """
+        ref = self.collection.document(key)
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            snapshot = await asyncio.to_thread(ref.get)
+            data = snapshot.to_dict() if snapshot.exists else {}
+            if data.get("owner") is None:
+                released_at = data.get("released_at")
+                fresh = released_at is not None and time.time() - released_at.timestamp() < self.result_ttl
+                return data.get("result") if fresh else None
+            lease_until = data.get("lease_until")
+            if lease_until is None or lease_until.timestamp() <= time.time():
+                return None
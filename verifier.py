@@ -0,0 +1,215 @@
+import os
+import shutil
+import signal
+import asyncio
+import logging
+import tempfile
+
+from code_check import JAVAC
+
+logger = logging.getLogger(__name__)
+
+JAVA = shutil.which("java")
+# 자식 프로세스의 rlimit은 preexec_fn 대신 prlimit 래퍼로 건다 (스레드가 있는 프로세스에서 preexec_fn은 교착될 수 있다).
+PRLIMIT = shutil.which("prlimit")
+# 네트워크 격리: 사용자 네임스페이스 안에서 새 네트워크 네임스페이스(루프백만)로 실행한다.
+UNSHARE = shutil.which("unshare")
+
+# 검증 결과
+PASSED = "passed"              # 모든 예제 통과
+COMPILED = "compiled"          # 예제가 없어 컴파일만 확인
+COMPILE_ERROR = "compile_error"
+RUNTIME_ERROR = "runtime_error"
+TIMEOUT = "timeout"
+WRONG_ANSWER = "wrong_answer"
+ACCEPTABLE = (PASSED, COMPILED)
+
+def normalize_output(text):
+    """채점처럼 줄 끝 공백과 마지막 빈 줄은 무시"""
+    lines = [line.rstrip() for line in text.replace("\r\n", "\n").split("\n")]
+    while lines and not lines[-1]:
+        lines.pop()
+    return lines
+
+def _limit_command(cpu_seconds, file_bytes):
+    return [PRLIMIT, f"--cpu={cpu_seconds}:{cpu_seconds + 1}", f"--fsize={file_bytes}", "--core=0", "--"]
+
+def _isolate_command():
+    return [UNSHARE, "--user", "--map-root-user", "--net", "--"]
+
+class JavaVerifier:
+    """
+    후보 Java 코드를 로컬 javac로 컴파일하고 예제 입력으로 실행해 예제 출력과 비교한다.
+    - 후보마다 별도 임시 디렉터리에서, API 키 등이 없는 최소 환경 변수로 실행한다.
+    - 자식 프로세스에는 prlimit으로 CPU 시간/출력 파일 크기 제한(rlimit)을, JVM 힙 제한(-Xmx), 벽시계 시간 제한을 건다.
+      (JVM은 가상 메모리를 크게 예약하므로 RLIMIT_AS 대신 -Xmx로 메모리를 제한한다.)
+    - isolate_network이면 네트워크 네임스페이스를 분리해 외부(메타데이터 서버 포함)에 연결할 수 없게 한다.
+      파일 시스템은 분리하지 않으므로 서비스 계정 키 등 비밀 파일을 이미지/인스턴스에 두지 않아야 한다.
+    - 동시에 검증하는 후보 수는 workers개로 제한한다.
+    javac나 java가 없으면 available()이 False이고, 격리할 수 없는 환경이면 unavailable_reason()이 이유를 돌려준다.
+    """
+
+    def __init__(self, workers=2, compile_timeout=20, run_timeout=5, memory_mb=256, output_limit=1 << 20,
+                 isolate_network=True):
+        self.workers = workers
+        self.compile_timeout = compile_timeout
+        self.run_timeout = run_timeout
+        self.memory_mb = memory_mb
+        self.output_limit = output_limit
+        self.isolate_network = isolate_network
+        self._slots = None
+        self._isolation_error = None
+        self._isolation_checked = False
+        self.runs = 0
+
+    def slots(self):
+        """JVM을 띄우는 작업(검증, 완성 코드 판단의 javac)이 함께 쓰는 동시 실행 제한 (이벤트 루프 안에서 호출)"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+        return self._slots
+
+    def available(self):
+        return bool(JAVAC and JAVA and PRLIMIT)
+
+    async def _check_isolation(self):
+        """이 환경에서 네트워크 네임스페이스를 만들 수 있는지 한 번만 확인 (Cloud Run gen1 등에서는 불가)"""
+        if not UNSHARE:
+            return "unshare가 없습니다."
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *_isolate_command(), "true",
+                stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE,
+            )
+            _, stderr = await asyncio.wait_for(process.communicate(), 5)
+        except (OSError, asyncio.TimeoutError) as e:
+            return f"unshare 실행 실패: {e}"
+        if process.returncode != 0:
+            return f"네트워크 네임스페이스를 만들 수 없습니다: {stderr.decode(errors='replace').strip()[:200]}"
+        return None
+
+    async def unavailable_reason(self):
+        """검증을 할 수 없는 이유 (할 수 있으면 None)"""
+        if not self.available():
+            missing = [name for name, path in (("javac", JAVAC), ("java", JAVA), ("prlimit", PRLIMIT)) if not path]
+            return f"{', '.join(missing)}이(가) 없습니다."
+        if not self.isolate_network:
+            return None
+        if not self._isolation_checked:
+            self._isolation_error = await self._check_isolation()
+            self._isolation_checked = True
+        return self._isolation_error
+
+    @staticmethod
+    def _env(workdir):
+        return {
+            "PATH": os.environ.get("PATH", "/usr/bin:/bin"),
+            "HOME": workdir,
+            "LANG": "C.UTF-8",
+            "TMPDIR": workdir,
+        }
+
+    async def _run(self, args, workdir, timeout, stdin_path=None):
+        """(returncode, stdout, stderr)를 반환. 시간 제한을 넘기면 프로세스 그룹째 종료하고 None."""
+        cpu_seconds = int(timeout * 2) + 1  # JVM은 GC/JIT 스레드도 CPU 시간을 쓴다.
+        stdout_path = os.path.join(workdir, "stdout.txt")
+        stderr_path = os.path.join(workdir, "stderr.txt")
+        stdin = open(stdin_path, "rb") if stdin_path else asyncio.subprocess.DEVNULL
+        # 출력은 파일로 받아 RLIMIT_FSIZE로 크기를 제한한다 (파이프는 제한되지 않음).
+        with open(stdout_path, "wb") as stdout, open(stderr_path, "wb") as stderr:
+            try:
+                prefix = _isolate_command() if self.isolate_network else []
+                process = await asyncio.create_subprocess_exec(
+                    *prefix, *_limit_command(cpu_seconds, self.output_limit), *args,
+                    cwd=workdir, env=self._env(workdir),
+                    stdin=stdin, stdout=stdout, stderr=stderr,
+                    start_new_session=True,
+                )
+            finally:
+                if stdin_path:
+                    stdin.close()
+        self.runs += 1
+        try:
+            await asyncio.wait_for(process.wait(), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            await process.wait()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            return None
+        with open(stdout_path, "rb") as f:
+            out = f.read().decode("utf-8", errors="replace")
+        with open(stderr_path, "rb") as f:
+            err = f.read().decode("utf-8", errors="replace")
+        return process.returncode, out, err
+
+    async def verify(self, code, samples=(), special_judge=False):
+        """
+        코드 하나를 검증하고 {"status": ..., ...}를 반환.
+        스페셜 저지 문제는 출력 비교 없이 예제에서 정상 종료하는지만 본다.
+        """
+        async with self.slots():
+            with tempfile.TemporaryDirectory(prefix="boj_verify_") as workdir:
+                with open(os.path.join(workdir, "Main.java"), "w", encoding="utf-8") as f:
+                    f.write(code)
+                compiled = await self._run(
+                    [JAVAC, "-J-Xmx256m", "-encoding", "UTF-8", "-nowarn", "-d", workdir, "Main.java"],
+                    workdir, self.compile_timeout,
+                )
+                if compiled is None:
+                    return {"status": TIMEOUT, "stage": "compile"}
+                if compiled[0] != 0:
+                    return {"status": COMPILE_ERROR, "detail": compiled[2][:500]}
+                if not samples:
+                    return {"status": COMPILED}
+
+                command = [
+                    JAVA, f"-Xmx{self.memory_mb}m", "-Xss64m", "-XX:+UseSerialGC",
+                    "-XX:TieredStopAtLevel=1", "-Dfile.encoding=UTF-8", "-cp", workdir, "Main",
+                ]
+                for number, (sample_input, expected) in enumerate(samples, start=1):
+                    stdin_path = os.path.join(workdir, "stdin.txt")
+                    with open(stdin_path, "w", encoding="utf-8") as f:
+                        f.write(sample_input)
+                    ran = await self._run(command, workdir, self.run_timeout, stdin_path)
+                    if ran is None:
+                        return {"status": TIMEOUT, "sample": number}
+                    returncode, out, err = ran
+                    if returncode != 0:
+                        return {"status": RUNTIME_ERROR, "sample": number, "detail": err[-500:]}
+                    if not special_judge and normalize_output(out) != normalize_output(expected):
+                        return {"status": WRONG_ANSWER, "sample": number,
+                                "expected": expected[:200], "actual": out[:200]}
+                return {"status": PASSED, "samples": len(samples)}
+
+    async def first_passing(self, candidates, samples=(), special_judge=False):
+        """
+        [(이름, 코드), ...]를 동시에 검증하고, 우선순위(목록 순서)가 가장 높은 통과 후보를 고른다.
+        반환값은 (이름, 코드) 또는 None과 후보별 결과 목록. 고른 뒤 남은 검증은 취소한다.
+        """
+        unique = []
+        seen = set()
+        for name, code in candidates:
+            if code and code not in seen:
+                seen.add(code)
+                unique.append((name, code))
+
+        tasks = [asyncio.ensure_future(self.verify(code, samples, special_judge)) for _, code in unique]
+        reports = []
+        try:
+            for (name, code), task in zip(unique, tasks):
+                try:
+                    result = await task
+                except Exception as e:
+                    logger.error(f"코드 검증 중 오류 ({name}): {e}", exc_info=True)
+                    result = {"status": RUNTIME_ERROR, "detail": str(e)}
+                reports.append({"candidate": name, **result})
+                if result["status"] in ACCEPTABLE:
+                    return (name, code), reports
+            return None, reports
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)